@@ -0,0 +1,200 @@
+"""
+Tenant analytics computed with pandas.
+
+Entry points take plain column data ({column: list}) and return JSON-ready dicts, so they can
+run in a worker process: server.py streams projected cursors into columns and submits
+run_analysis to a ProcessPoolExecutor. Nothing here touches the database or the event loop.
+"""
+import numpy as np
+import pandas as pd
+
+# Fields server.py projects from active (not cancelled, not deleted) bookings
+BOOKING_COLUMNS = [
+    "id", "customer_id", "event_type", "event_date", "guest_count", "subtotal",
+    "discount_type", "discount_value", "discount_amount", "total_amount", "advance_paid",
+]
+NUMERIC_COLUMNS = ["guest_count", "subtotal", "discount_value", "discount_amount", "total_amount", "advance_paid"]
+
+
+def bookings_frame(columns: dict) -> pd.DataFrame:
+    """DataFrame of bookings with numeric columns coerced and event_date parsed"""
+    df = pd.DataFrame({name: columns.get(name, []) for name in BOOKING_COLUMNS})
+    for name in NUMERIC_COLUMNS:
+        df[name] = pd.to_numeric(df[name], errors="coerce").fillna(0.0)
+    df["event_date"] = pd.to_datetime(df["event_date"], format="%Y-%m-%d", errors="coerce")
+    df = df.dropna(subset=["event_date"])
+    df["event_type"] = df["event_type"].fillna("other")
+    df["month"] = df["event_date"].dt.strftime("%Y-%m")
+    return df
+
+
+def money(value) -> float:
+    return round(float(value), 2)
+
+
+def ratio(part, whole, digits: int = 1) -> float:
+    return round(float(part) / float(whole) * 100, digits) if whole else 0.0
+
+
+def customer_lifetime_value(df: pd.DataFrame, top: int = 20) -> dict:
+    """Revenue, collections and booking counts per customer; the top customers by revenue"""
+    if df.empty:
+        return {"customers": 0, "average_lifetime_value": 0.0, "median_lifetime_value": 0.0, "top_customers": []}
+    per_customer = df.groupby("customer_id").agg(
+        bookings=("id", "size"),
+        lifetime_value=("total_amount", "sum"),
+        collected=("advance_paid", "sum"),
+        first_event=("event_date", "min"),
+        last_event=("event_date", "max"),
+    )
+    per_customer["average_booking_value"] = per_customer["lifetime_value"] / per_customer["bookings"]
+    leaders = per_customer.sort_values(["lifetime_value", "bookings"], ascending=False).head(top)
+    return {
+        "customers": int(len(per_customer)),
+        "average_lifetime_value": money(per_customer["lifetime_value"].mean()),
+        "median_lifetime_value": money(per_customer["lifetime_value"].median()),
+        "top_customers": [
+            {
+                "customer_id": customer_id,
+                "bookings": int(row.bookings),
+                "lifetime_value": money(row.lifetime_value),
+                "collected": money(row.collected),
+                "average_booking_value": money(row.average_booking_value),
+                "first_event": row.first_event.strftime("%Y-%m-%d"),
+                "last_event": row.last_event.strftime("%Y-%m-%d"),
+            }
+            for customer_id, row in leaders.iterrows()
+        ],
+    }
+
+
+def event_type_mix(df: pd.DataFrame) -> dict:
+    """Share of bookings, revenue and guests per event type"""
+    mix = df.groupby("event_type").agg(
+        bookings=("id", "size"),
+        revenue=("total_amount", "sum"),
+        guests=("guest_count", "sum"),
+    ).sort_values("bookings", ascending=False)
+    total_bookings, total_revenue = len(df), df["total_amount"].sum()
+    return {
+        "total_bookings": int(total_bookings),
+        "total_revenue": money(total_revenue),
+        "event_types": [
+            {
+                "event_type": event_type,
+                "bookings": int(row.bookings),
+                "booking_share": ratio(row.bookings, total_bookings),
+                "revenue": money(row.revenue),
+                "revenue_share": ratio(row.revenue, total_revenue),
+                "average_guests": round(float(row.guests) / row.bookings, 1),
+            }
+            for event_type, row in mix.iterrows()
+        ],
+    }
+
+
+def guest_count_trends(df: pd.DataFrame, window: int = 3) -> dict:
+    """Average guest count per month, overall and per event type, with a rolling mean"""
+    if df.empty:
+        return {"window": window, "months": [], "by_event_type": {}}
+    monthly = df.groupby("month")["guest_count"].agg(["mean", "size"])
+    periods = pd.period_range(df["event_date"].min(), df["event_date"].max(), freq="M").strftime("%Y-%m")
+    monthly = monthly.reindex(periods)
+    rolling = monthly["mean"].rolling(window, min_periods=1).mean()
+    by_type = df.pivot_table(index="month", columns="event_type", values="guest_count", aggfunc="mean").reindex(periods)
+    return {
+        "window": window,
+        "months": [
+            {
+                "period": period,
+                "bookings": int(0 if np.isnan(size) else size),
+                "average_guests": None if np.isnan(mean) else round(float(mean), 1),
+                "rolling_average_guests": None if np.isnan(smoothed) else round(float(smoothed), 1),
+            }
+            for period, mean, size, smoothed in zip(periods, monthly["mean"], monthly["size"], rolling)
+        ],
+        "by_event_type": {
+            event_type: [None if np.isnan(v) else round(float(v), 1) for v in by_type[event_type]]
+            for event_type in by_type.columns
+        },
+    }
+
+
+def discount_leakage(df: pd.DataFrame) -> dict:
+    """Discounts given away against gross (pre-discount) charges, by month, event type and discount type"""
+    discounted = df["discount_amount"] > 0
+
+    def summarize(group: pd.DataFrame) -> dict:
+        gross = group["subtotal"].sum()
+        given = group["discount_amount"].sum()
+        return {
+            "bookings": int(len(group)),
+            "discounted_bookings": int((group["discount_amount"] > 0).sum()),
+            "gross": money(gross),
+            "discount": money(given),
+            "leakage_rate": ratio(given, gross, 2),
+        }
+
+    return {
+        **summarize(df),
+        "average_discount": money(df.loc[discounted, "discount_amount"].mean()) if discounted.any() else 0.0,
+        "by_month": [{"period": period, **summarize(group)} for period, group in df.groupby("month")],
+        "by_event_type": [{"event_type": event_type, **summarize(group)} for event_type, group in df.groupby("event_type")],
+        "by_discount_type": [
+            {"discount_type": discount_type, **summarize(group)}
+            for discount_type, group in df[discounted].groupby(df.loc[discounted, "discount_type"].fillna("percent"))
+        ],
+    }
+
+
+def repeat_customer_rates(df: pd.DataFrame) -> dict:
+    """Share of customers (and revenue) that came back, and new vs returning customers per month"""
+    if df.empty:
+        return {"customers": 0, "repeat_customers": 0, "repeat_rate": 0.0, "repeat_revenue_share": 0.0, "months": []}
+    df = df.sort_values(["event_date", "id"])
+    bookings_per_customer = df.groupby("customer_id")["id"].transform("size")
+    repeat = bookings_per_customer > 1
+    customers = df["customer_id"].nunique()
+    repeat_customers = df.loc[repeat, "customer_id"].nunique()
+
+    # A booking is "returning" when the customer had an earlier booking in the window
+    returning = df.groupby("customer_id").cumcount() > 0
+    monthly = pd.DataFrame({
+        "month": df["month"],
+        "customer_id": df["customer_id"],
+        "returning": returning,
+    }).groupby("month").agg(
+        customers=("customer_id", "nunique"),
+        returning_bookings=("returning", "sum"),
+        bookings=("returning", "size"),
+    )
+    return {
+        "customers": int(customers),
+        "repeat_customers": int(repeat_customers),
+        "repeat_rate": ratio(repeat_customers, customers),
+        "repeat_revenue_share": ratio(df.loc[repeat, "total_amount"].sum(), df["total_amount"].sum()),
+        "months": [
+            {
+                "period": period,
+                "customers": int(row.customers),
+                "bookings": int(row.bookings),
+                "returning_bookings": int(row.returning_bookings),
+                "returning_share": ratio(row.returning_bookings, row.bookings),
+            }
+            for period, row in monthly.iterrows()
+        ],
+    }
+
+
+ANALYSES = {
+    "customer-lifetime-value": customer_lifetime_value,
+    "event-mix": event_type_mix,
+    "guest-trends": guest_count_trends,
+    "discount-leakage": discount_leakage,
+    "repeat-customers": repeat_customer_rates,
+}
+
+
+def run_analysis(name: str, columns: dict, options: dict) -> dict:
+    """Worker entry point: build the bookings frame and run one named analysis"""
+    return ANALYSES[name](bookings_frame(columns), **options)
@@ -1,9 +1,16 @@
-from fastapi import FastAPI, APIRouter, HTTPException, Depends, status
+from fastapi import FastAPI, APIRouter, HTTPException, Depends, Query, Request, Response, status
+from fastapi.encoders import jsonable_encoder
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 from dotenv import load_dotenv
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, ReplaceOne, UpdateOne, UpdateMany
+from pymongo.errors import BulkWriteError, DuplicateKeyError
 import os
+import asyncio
+import time
+import json
+import hashlib
 import logging
 from pathlib import Path
 from pydantic import BaseModel, Field, ConfigDict, EmailStr
@@ -13,7 +20,11 @@ from datetime import datetime, timezone, timedelta
 import jwt
 import bcrypt
 from enum import Enum
+from collections import defaultdict, deque, OrderedDict
 from io import BytesIO
+import numpy as np
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
 from fastapi.responses import StreamingResponse
 from reportlab.lib.pagesizes import A4
 from reportlab.lib import colors
@@ -21,6 +32,8 @@ from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from reportlab.lib.units import inch
 
+import analytics
+
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
 
@@ -772,6 +785,15 @@ class BookingVendor(BaseModel):
     balance_due: float = 0
     status: str = "assigned"
     notes: str = ""
+    # Denormalized from the booking for the vendor schedule index
+    event_date: Optional[str] = None
+    slot: Optional[str] = None
+    hall_id: Optional[str] = None
+    booking_number: Optional[str] = None
+    booking_status: Optional[str] = None
+    # "date|slot" while the assignment commits the vendor; unique per vendor unless conflict_allowed
+    schedule_key: Optional[str] = None
+    conflict_allowed: bool = False
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 # ==================== EXPENSE MODELS ====================
@@ -816,15 +838,25 @@ class AlertType(str, Enum):
     LOW_ADVANCE = "low_advance"
     EVENT_TOMORROW = "event_tomorrow"
 
+class AlertStatus(str, Enum):
+    OPEN = "open"
+    RESOLVED = "resolved"
+    DISMISSED = "dismissed"
+
 class Alert(BaseModel):
     model_config = ConfigDict(extra="ignore")
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    tenant_id: Optional[str] = None
     alert_type: AlertType
     priority: AlertPriority
     title: str
     message: str
     booking_id: Optional[str] = None
+    event_date: Optional[str] = None
+    status: AlertStatus = AlertStatus.OPEN
     is_resolved: bool = False
+    resolved_at: Optional[str] = None
+    resolved_by: Optional[str] = None  # user id, or "system" when the condition cleared
     created_at: datetime = Field(default_factory=lambda: datetime.now(timezone.utc))
 
 # ==================== NOTIFICATION MODELS ====================
@@ -832,6 +864,7 @@ class NotificationType(str, Enum):
     BOOKING_CONFIRMATION = "booking_confirmation"
     PAYMENT_REMINDER = "payment_reminder"
     EVENT_REMINDER = "event_reminder"
+    BOOKING_CHANGE = "booking_change"
 
 class NotificationLog(BaseModel):
     model_config = ConfigDict(extra="ignore")
@@ -1025,6 +1058,196 @@ async def get_tenant_filter(current_user: dict) -> dict:
         raise HTTPException(status_code=403, detail="No tenant associated")
     return {"tenant_id": tenant_id}
 
+# ==================== RESPONSE CACHE ====================
+class ResponseCache:
+    """In-process LRU cache for computed responses, keyed by tuples (usually led by the tenant id).
+
+    Entries expire after ttl_seconds (if set) and can be dropped early by key prefix,
+    e.g. invalidate(tenant_id) or invalidate(tenant_id, year, month).
+    """
+
+    def __init__(self, ttl_seconds: Optional[float] = None, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    def get(self, key: tuple):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at is not None and expires_at < time.monotonic():
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return value
+
+    def set(self, key: tuple, value):
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        self._entries[key] = (expires_at, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, *prefix):
+        for key in [k for k in self._entries if k[:len(prefix)] == prefix]:
+            del self._entries[key]
+
+    def clear(self):
+        self._entries.clear()
+
+class MonthPartialCache:
+    """Report data cached per (tenant, month, report) so overlapping date ranges reuse work.
+
+    rows() serves a range from cached months of rows; aggregates() serves one precomputed summary
+    per month. Either computes only the missing months, one query per contiguous run. The current
+    month is always computed fresh. Writes drop just the month they touch with
+    invalidate(tenant_id, "YYYY-MM"); entries also expire after ttl_seconds, since other workers
+    and direct database edits do not invalidate this process's cache. Super admin views span
+    tenants and are not cached.
+    """
+
+    def __init__(self, ttl_seconds: int = 15 * 60, max_entries: int = 4096):
+        self._months = ResponseCache(ttl_seconds=ttl_seconds, max_entries=max_entries)
+
+    @staticmethod
+    def next_month(period: str) -> str:
+        year, month = int(period[:4]), int(period[5:7])
+        return f"{year + 1}-01" if month == 12 else f"{year}-{month + 1:02d}"
+
+    @classmethod
+    def month_end(cls, period: str) -> str:
+        return (datetime.strptime(f"{cls.next_month(period)}-01", "%Y-%m-%d") - timedelta(days=1)).strftime("%Y-%m-%d")
+
+    @classmethod
+    def months_between(cls, start_date: str, end_date: str) -> list:
+        periods = [start_date[:7]]
+        while periods[-1] < end_date[:7]:
+            periods.append(cls.next_month(periods[-1]))
+        return periods
+
+    @classmethod
+    def contiguous_runs(cls, periods: list) -> list:
+        runs = []
+        for period in periods:
+            if runs and cls.next_month(runs[-1][-1]) == period:
+                runs[-1].append(period)
+            else:
+                runs.append([period])
+        return runs
+
+    def cacheable(self, tenant_id: Optional[str], period: str) -> bool:
+        return bool(tenant_id) and period != datetime.now(timezone.utc).strftime("%Y-%m")
+
+    async def rows(self, report: str, tenant_filter: dict, start_date: str, end_date: str, compute, date_field: str) -> list:
+        """Rows with start_date <= row[date_field] <= end_date. compute(tenant_filter, first_day, last_day)
+        must return every row of whole months; last_day is "YYYY-MM-31", an inclusive string bound."""
+        tenant_id = tenant_filter.get('tenant_id')
+        rows, missing = [], []
+        for period in self.months_between(start_date, end_date):
+            cached = self._months.get((tenant_id, period, report)) if self.cacheable(tenant_id, period) else None
+            if cached is None:
+                missing.append(period)
+            else:
+                rows.extend(cached)
+        
+        for run in self.contiguous_runs(missing):
+            fresh = await compute(tenant_filter, f"{run[0]}-01", f"{run[-1]}-31")
+            rows.extend(fresh)
+            by_month = {period: [] for period in run if self.cacheable(tenant_id, period)}
+            for row in fresh:
+                by_month.get(row[date_field][:7], []).append(row)
+            for period, month_rows in by_month.items():
+                self._months.set((tenant_id, period, report), month_rows)
+        return [row for row in rows if start_date <= row[date_field] <= end_date]
+
+    async def aggregates(self, report: str, tenant_filter: dict, start_date: str, end_date: str, compute) -> list:
+        """One aggregate per month from start_date to end_date, in month order. compute(tenant_filter,
+        first_day, last_day) must return {"YYYY-MM": aggregate} for every month it spans. A month the
+        range only partly covers is computed for just those days and not cached."""
+        tenant_id = tenant_filter.get('tenant_id')
+        found, missing, partial = {}, [], []
+        for period in self.months_between(start_date, end_date):
+            if start_date > f"{period}-01" or end_date < self.month_end(period):
+                partial.append(period)
+                continue
+            cached = self._months.get((tenant_id, period, report)) if self.cacheable(tenant_id, period) else None
+            if cached is None:
+                missing.append(period)
+            else:
+                found[period] = cached
+        
+        for run in self.contiguous_runs(missing):
+            fresh = await compute(tenant_filter, f"{run[0]}-01", f"{run[-1]}-31")
+            for period in run:
+                found[period] = fresh[period]
+                if self.cacheable(tenant_id, period):
+                    self._months.set((tenant_id, period, report), fresh[period])
+        for period in partial:
+            fresh = await compute(tenant_filter, max(start_date, f"{period}-01"), min(end_date, f"{period}-31"))
+            found[period] = fresh[period]
+        return [found[period] for period in sorted(found)]
+
+    def invalidate(self, *prefix):
+        self._months.invalidate(*prefix)
+
+    def clear(self):
+        self._months.clear()
+
+# ==================== PUBLIC ENDPOINT PROTECTION ====================
+class TokenBucketLimiter:
+    """In-process token bucket per client key: `rate` tokens per second, bursts up to `burst`"""
+
+    def __init__(self, rate: float, burst: int, max_clients: int = 10000):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self._buckets = OrderedDict()  # key -> (tokens, last refill)
+
+    def allow(self, key: str) -> bool:
+        now = time.monotonic()
+        tokens, last = self._buckets.pop(key, (self.burst, now))
+        tokens = min(self.burst, tokens + (now - last) * self.rate)
+        allowed = tokens >= 1
+        self._buckets[key] = (tokens - 1 if allowed else tokens, now)
+        while len(self._buckets) > self.max_clients:
+            self._buckets.popitem(last=False)
+        return allowed
+
+PUBLIC_RATE_LIMITER = TokenBucketLimiter(
+    rate=float(os.environ.get('PUBLIC_RATE_LIMIT_PER_SECOND', '2')),
+    burst=int(os.environ.get('PUBLIC_RATE_LIMIT_BURST', '20'))
+)
+
+def client_ip(request: Request) -> str:
+    """Client address, taking the hop our ingress appended to X-Forwarded-For when present"""
+    forwarded = request.headers.get('x-forwarded-for')
+    if forwarded:
+        return forwarded.split(',')[-1].strip()
+    return request.client.host if request.client else "unknown"
+
+async def public_rate_limit(request: Request):
+    """Dependency for unauthenticated endpoints: reject clients that exceed their token bucket"""
+    if not PUBLIC_RATE_LIMITER.allow(client_ip(request)):
+        raise HTTPException(
+            status_code=429,
+            detail="Too many requests",
+            headers={"Retry-After": str(max(1, int(1 / PUBLIC_RATE_LIMITER.rate)))}
+        )
+
+def cacheable_json(payload) -> tuple:
+    """Serialize a response once and derive its ETag, for storing in a ResponseCache"""
+    body = json.dumps(jsonable_encoder(payload), separators=(",", ":")).encode()
+    return f'"{hashlib.sha1(body).hexdigest()}"', body
+
+def cached_json_response(request: Request, cached: tuple, max_age: int) -> Response:
+    """Send a cached (etag, body) pair, answering 304 when the client already has it"""
+    etag, body = cached
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+    if request.headers.get('if-none-match') == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 # ==================== AUDIT LOG HELPER ====================
 async def create_audit_log(
     tenant_id: Optional[str],
@@ -1312,17 +1535,31 @@ async def get_me(current_user: dict = Depends(get_current_user)):
     }
 
 # ==================== HALL ROUTES ====================
+# Public responses span tenants, so hall writes clear them entirely
+PUBLIC_VENUES_CACHE = ResponseCache(ttl_seconds=300, max_entries=1)
+PUBLIC_AVAILABILITY_CACHE = ResponseCache(ttl_seconds=30, max_entries=4096)
+
+def invalidate_hall_caches(tenant_id: Optional[str]):
+    """Drop cached responses that embed hall details for the tenant"""
+    CALENDAR_CACHE.invalidate(tenant_id)
+    PUBLIC_VENUES_CACHE.clear()
+    PUBLIC_AVAILABILITY_CACHE.clear()
+
 @api_router.get("/halls", response_model=List[Hall])
 async def get_halls(current_user: dict = Depends(get_current_user)):
     tenant_filter = await get_tenant_filter(current_user)
     halls = await db.halls.find({"is_active": True, **tenant_filter}, {"_id": 0}).to_list(100)
     return [Hall(**h) for h in halls]
 
-@api_router.get("/public/venues", response_model=List[Hall])
-async def get_public_venues():
+@api_router.get("/public/venues", response_model=List[Hall], dependencies=[Depends(public_rate_limit)])
+async def get_public_venues(request: Request):
     """Public endpoint for landing page to fetch venue data"""
-    halls = await db.halls.find({"is_active": True}, {"_id": 0}).to_list(100)
-    return [Hall(**h) for h in halls]
+    cached = PUBLIC_VENUES_CACHE.get(("venues",))
+    if cached is None:
+        halls = await db.halls.find({"is_active": True}, {"_id": 0}).to_list(100)
+        cached = cacheable_json([Hall(**h) for h in halls])
+        PUBLIC_VENUES_CACHE.set(("venues",), cached)
+    return cached_json_response(request, cached, max_age=PUBLIC_VENUES_CACHE.ttl_seconds)
 
 @api_router.get("/halls/{hall_id}", response_model=Hall)
 async def get_hall(hall_id: str, current_user: dict = Depends(get_current_user)):
@@ -1342,6 +1579,7 @@ async def create_hall(hall_data: HallCreate, current_user: dict = Depends(get_cu
     hall_doc = hall.model_dump()
     hall_doc['created_at'] = hall_doc['created_at'].isoformat()
     await db.halls.insert_one(hall_doc)
+    invalidate_hall_caches(hall.tenant_id)
     return hall
 
 @api_router.put("/halls/{hall_id}", response_model=Hall)
@@ -1358,6 +1596,7 @@ async def update_hall(hall_id: str, hall_data: HallCreate, current_user: dict =
         raise HTTPException(status_code=404, detail="Hall not found")
     
     updated = await db.halls.find_one({"id": hall_id, **tenant_filter}, {"_id": 0})
+    invalidate_hall_caches(updated.get('tenant_id'))
     return Hall(**updated)
 
 @api_router.delete("/halls/{hall_id}")
@@ -1369,6 +1608,7 @@ async def delete_hall(hall_id: str, current_user: dict = Depends(get_current_use
     result = await db.halls.update_one({"id": hall_id, **tenant_filter}, {"$set": {"is_active": False}})
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Hall not found")
+    invalidate_hall_caches(current_user.get('tenant_id'))
     return {"message": "Hall deleted"}
 
 # ==================== MENU CATEGORY ROUTES ====================
@@ -1621,6 +1861,7 @@ async def create_booking(booking_data: BookingCreate, current_user: dict = Depen
     booking_doc['created_at'] = booking_doc['created_at'].isoformat()
     booking_doc['updated_at'] = booking_doc['updated_at'].isoformat()
     await db.bookings.insert_one(booking_doc)
+    await sync_booking_write(booking_doc)
     return booking
 
 @api_router.put("/bookings/{booking_id}", response_model=Booking)
@@ -1650,6 +1891,9 @@ async def update_booking(booking_id: str, update_data: BookingUpdate, current_us
         if conflict:
             raise HTTPException(status_code=400, detail=f"Hall already booked for {slot} slot on this date")
         
+        if event_date != existing['event_date'] or slot != existing.get('slot', 'day'):
+            await check_booking_vendor_conflicts({**existing, "event_date": event_date, "slot": slot})
+        
         # Update slot times
         if 'slot' in update_dict:
             start_time, end_time = get_slot_times(SlotType(slot))
@@ -1711,18 +1955,382 @@ async def update_booking(booking_id: str, update_data: BookingUpdate, current_us
     
     await db.bookings.update_one({"id": booking_id}, {"$set": update_dict})
     updated = await db.bookings.find_one({"id": booking_id}, {"_id": 0})
+    
+    changes = {
+        field: {"old": existing.get(field), "new": updated.get(field)}
+        for field in PLAN_TRACKED_BOOKING_FIELDS
+        if existing.get(field) != updated.get(field)
+    }
+    if changes:
+        await emit_booking_change({
+            "booking_id": booking_id,
+            "tenant_id": updated.get('tenant_id'),
+            "changes": changes,
+            "current": {field: updated.get(field) for field in PLAN_TRACKED_BOOKING_FIELDS},
+            "changed_by": current_user.get('email')
+        })
+    await sync_booking_write(updated, existing)
+    
     return Booking(**updated)
 
 @api_router.delete("/bookings/{booking_id}")
 async def cancel_booking(booking_id: str, current_user: dict = Depends(get_current_user)):
-    result = await db.bookings.update_one(
+    update = {"status": "cancelled", "updated_at": datetime.now(timezone.utc).isoformat()}
+    previous = await db.bookings.find_one_and_update(
         {"id": booking_id},
-        {"$set": {"status": "cancelled", "updated_at": datetime.now(timezone.utc).isoformat()}}
+        {"$set": update},
+        projection={"_id": 0}
     )
-    if result.matched_count == 0:
+    if not previous:
         raise HTTPException(status_code=404, detail="Booking not found")
+    await sync_booking_write({**previous, **update}, previous)
     return {"message": "Booking cancelled"}
 
+# ==================== BOOKING CHANGE EVENTS ====================
+# Booking fields a party plan is built around; changing any of them needs planner review
+PLAN_TRACKED_BOOKING_FIELDS = ["event_date", "slot", "guest_count", "hall_id"]
+
+def describe_booking_change(field: str, change: dict) -> str:
+    """Human readable warning for a tracked booking field change"""
+    if field == 'event_date':
+        return f"Event date changed from {change['old']} to {change['new']}"
+    if field == 'slot':
+        return f"Slot changed from {change['old']} to {change['new']}"
+    if field == 'guest_count':
+        return f"Guest count changed from {change['old']} to {change['new']}"
+    return "Hall/Venue changed"
+
+def booking_snapshot_drift(snapshot: dict, current: dict) -> dict:
+    """Tracked fields where the booking no longer matches the plan's snapshot"""
+    return {
+        field: {"old": snapshot.get(field), "new": current.get(field)}
+        for field in PLAN_TRACKED_BOOKING_FIELDS
+        if field in snapshot and snapshot.get(field) != current.get(field)
+    }
+
+def plan_change_fields(drift: dict) -> dict:
+    """booking_changed/change_warnings describing the plan's current drift; cleared when there is none"""
+    return {
+        "booking_changed": bool(drift),
+        "change_warnings": [describe_booking_change(field, change) for field, change in drift.items()]
+    }
+
+async def mark_party_plan_changed(event: dict) -> bool:
+    """Replace the plan's warnings with the booking's current drift from the plan snapshot,
+    so repeated edits don't pile up duplicates and moving a field back clears its warning"""
+    plan = await db.party_plans.find_one({"booking_id": event['booking_id']}, {"_id": 0, "booking_snapshot": 1})
+    if not plan:
+        return False
+    # Fields missing from older snapshots fall back to the value before this change
+    snapshot = {**{field: change['old'] for field, change in event['changes'].items()}, **(plan.get('booking_snapshot') or {})}
+    drift = booking_snapshot_drift(snapshot, event['current'])
+    await db.party_plans.update_one(
+        {"booking_id": event['booking_id']},
+        {"$set": {**plan_change_fields(drift), "updated_at": datetime.now(timezone.utc).isoformat()}}
+    )
+    return True
+
+PLAN_BACKFILL_BATCH = 1000
+
+async def backfill_party_plan_changes():
+    """Re-derive change warnings for plans whose booking drifted before warnings tracked the snapshot"""
+    operations = []
+    plans = db.party_plans.find(
+        {"booking_snapshot": {"$exists": True}},
+        {"_id": 0, "booking_id": 1, "booking_snapshot": 1, "booking_changed": 1, "change_warnings": 1}
+    ).batch_size(PLAN_BACKFILL_BATCH)
+    batch = []
+    async for plan in plans:
+        batch.append(plan)
+        if len(batch) >= PLAN_BACKFILL_BATCH:
+            operations.extend(await party_plan_change_operations(batch))
+            batch = []
+    operations.extend(await party_plan_change_operations(batch))
+    if operations:
+        await db.party_plans.bulk_write(operations, ordered=False)
+
+async def party_plan_change_operations(plans: List[dict]) -> list:
+    """UpdateOne for each plan whose stored warnings differ from its booking's drift"""
+    if not plans:
+        return []
+    bookings = {
+        b['id']: b for b in await db.bookings.find(
+            {"id": {"$in": [p['booking_id'] for p in plans]}},
+            {"_id": 0, "id": 1, **{field: 1 for field in PLAN_TRACKED_BOOKING_FIELDS}}
+        ).to_list(None)
+    }
+    operations = []
+    for plan in plans:
+        booking = bookings.get(plan['booking_id'])
+        if not booking:
+            continue
+        fields = plan_change_fields(booking_snapshot_drift(plan.get('booking_snapshot') or {}, booking))
+        if fields != {"booking_changed": plan.get('booking_changed', False), "change_warnings": plan.get('change_warnings', [])}:
+            operations.append(UpdateOne({"booking_id": plan['booking_id']}, {"$set": fields}))
+    return operations
+
+async def notify_planners_of_booking_change(event: dict):
+    """Log an in-app notification for the planners of a changed booking"""
+    fields = ", ".join(event['changes'].keys())
+    log = NotificationLog(
+        booking_id=event['booking_id'],
+        notification_type=NotificationType.BOOKING_CHANGE,
+        channel="in_app",
+        recipient="party_planners",
+        message=f"Booking details changed ({fields}) by {event.get('changed_by') or 'system'}. Please review the party plan."
+    )
+    log_doc = log.model_dump()
+    log_doc['tenant_id'] = event.get('tenant_id')
+    log_doc['created_at'] = log_doc['created_at'].isoformat()
+    await db.notification_logs.insert_one(log_doc)
+
+# Called with the change event after a booking's party plan has been flagged
+BOOKING_CHANGE_LISTENERS = [notify_planners_of_booking_change]
+
+async def emit_booking_change(event: dict):
+    """Dispatch a booking change event: flag the party plan, then notify listeners"""
+    if not await mark_party_plan_changed(event):
+        return
+    for listener in BOOKING_CHANGE_LISTENERS:
+        try:
+            await listener(event)
+        except Exception:
+            logger.exception(f"Booking change listener {listener.__name__} failed")
+
+# Called with (booking, previous) after any write that creates, moves, cancels or restores
+# a booking, whether or not it has a party plan; previous is None for new bookings.
+# Sections below register their maintainers here.
+BOOKING_SYNC_LISTENERS = []
+
+async def sync_booking_write(booking: dict, previous: Optional[dict] = None):
+    """Let indexes and caches derived from bookings catch up with a booking write"""
+    for listener in BOOKING_SYNC_LISTENERS:
+        try:
+            await listener(booking, previous)
+        except Exception:
+            logger.exception(f"Booking sync listener {listener.__name__} failed")
+
+# ==================== DAILY ROLLUPS ====================
+# One document per (tenant, date, hall) with $inc-maintained totals:
+#   bookings, revenue, gst, guests    - active bookings by event date
+#   collected, collected_by_mode.<m>  - money received by date received (advance on booking date,
+#                                       later payments on payment date)
+#   expenses                          - party expenses by event date; general expenses (hall None) by date
+ROLLUP_MIN_DELTA = 1e-9
+
+def add_rollup_delta(deltas: dict, key: tuple, field: str, amount: float):
+    fields = deltas.setdefault(key, {})
+    fields[field] = fields.get(field, 0) + amount
+
+def booking_advance_entries(booking: dict) -> list:
+    """(mode, amount) taken when the booking was made, excluding later recorded payments"""
+    splits = booking.get('payment_splits') or []
+    if splits:
+        return [(s.get('method') or PaymentMode.CASH.value, s.get('amount') or 0) for s in splits]
+    recorded = booking.get('payment_cash', 0) + booking.get('payment_credit', 0) + booking.get('payment_upi', 0)
+    mode = booking.get('payment_method') or PaymentMode.CASH.value
+    return [(getattr(mode, 'value', mode), booking.get('advance_paid', 0) - recorded)]
+
+def add_booking_rollup(deltas: dict, booking: Optional[dict], sign: int):
+    """Add (sign=1) or remove (sign=-1) an active booking's contribution"""
+    if not booking or booking.get('status') == 'cancelled' or booking.get('is_deleted') or not booking.get('event_date'):
+        return
+    tenant_id, hall_id = booking.get('tenant_id'), booking.get('hall_id')
+    event_key = (tenant_id, booking['event_date'], hall_id)
+    add_rollup_delta(deltas, event_key, "bookings", sign)
+    add_rollup_delta(deltas, event_key, "revenue", sign * (booking.get('total_amount') or 0))
+    add_rollup_delta(deltas, event_key, "gst", sign * (booking.get('gst_amount') or 0))
+    add_rollup_delta(deltas, event_key, "guests", sign * (booking.get('guest_count') or 0))
+    
+    created_key = (tenant_id, str(booking.get('created_at') or booking['event_date'])[:10], hall_id)
+    for mode, amount in booking_advance_entries(booking):
+        add_rollup_delta(deltas, created_key, "collected", sign * amount)
+        add_rollup_delta(deltas, created_key, f"collected_by_mode.{mode}", sign * amount)
+
+async def apply_rollup_deltas(deltas: dict):
+    """Apply accumulated deltas with one $inc upsert per touched (tenant, date, hall)"""
+    operations = []
+    # updated_at tells a concurrent rebuild this key moved after it started reading
+    now = datetime.now(timezone.utc).isoformat()
+    for (tenant_id, date, hall_id), fields in deltas.items():
+        inc = {field: amount for field, amount in fields.items() if abs(amount) > ROLLUP_MIN_DELTA}
+        if inc:
+            operations.append(UpdateOne(
+                {"tenant_id": tenant_id, "date": date, "hall_id": hall_id},
+                {"$inc": inc, "$set": {"updated_at": now}},
+                upsert=True
+            ))
+    if operations:
+        await db.daily_rollups.bulk_write(operations, ordered=False)
+
+async def update_booking_rollups(booking: dict, previous: Optional[dict] = None):
+    """Swap a booking's old contribution for its new one; move its party expenses and
+    recorded payments if it moved"""
+    deltas = {}
+    add_booking_rollup(deltas, previous, -1)
+    add_booking_rollup(deltas, booking, 1)
+    if previous and (previous.get('event_date'), previous.get('hall_id')) != (booking.get('event_date'), booking.get('hall_id')):
+        spent = await db.party_expenses.aggregate([
+            {"$match": {"booking_id": booking['id']}},
+            {"$group": {"_id": None, "amount": {"$sum": "$amount"}}}
+        ]).to_list(1)
+        if spent:
+            add_rollup_delta(deltas, (previous.get('tenant_id'), previous.get('event_date'), previous.get('hall_id')), "expenses", -spent[0]['amount'])
+            add_rollup_delta(deltas, (booking.get('tenant_id'), booking.get('event_date'), booking.get('hall_id')), "expenses", spent[0]['amount'])
+    # Payments are keyed by payment date, so only a hall (or tenant) change moves them
+    if previous and (previous.get('tenant_id'), previous.get('hall_id')) != (booking.get('tenant_id'), booking.get('hall_id')):
+        async for row in db.payments.aggregate([
+            {"$match": {"booking_id": booking['id'], "payment_date": {"$nin": [None, ""]}}},
+            {"$group": {"_id": {"date": "$payment_date", "mode": "$payment_mode"}, "amount": {"$sum": "$amount"}}}
+        ]):
+            mode = row['_id'].get('mode') or "unspecified"
+            for side, sign in ((previous, -1), (booking, 1)):
+                key = (side.get('tenant_id'), row['_id']['date'], side.get('hall_id'))
+                add_rollup_delta(deltas, key, "collected", sign * row['amount'])
+                add_rollup_delta(deltas, key, f"collected_by_mode.{mode}", sign * row['amount'])
+    await apply_rollup_deltas(deltas)
+
+BOOKING_SYNC_LISTENERS.append(update_booking_rollups)
+
+async def record_payment_rollup(payment_doc: dict, booking: dict):
+    mode = getattr(payment_doc.get('payment_mode'), 'value', payment_doc.get('payment_mode')) or "unspecified"
+    key = (booking.get('tenant_id'), payment_doc['payment_date'], booking.get('hall_id'))
+    await apply_rollup_deltas({key: {"collected": payment_doc['amount'], f"collected_by_mode.{mode}": payment_doc['amount']}})
+
+async def record_party_expense_rollup(booking: dict, amount: float):
+    key = (booking.get('tenant_id'), booking.get('event_date'), booking.get('hall_id'))
+    await apply_rollup_deltas({key: {"expenses": amount}})
+
+# db.meta document recording that a full rebuild has run; a worker caches it once seen
+ROLLUPS_META_ID = "daily_rollups"
+ROLLUPS_STATE = {"complete": False}
+
+def nest_rollup_fields(fields: dict) -> dict:
+    """Turn dotted delta paths (collected_by_mode.cash) into the nested fields they $inc"""
+    doc = {}
+    for path, amount in fields.items():
+        *parents, leaf = path.split('.')
+        target = doc
+        for parent in parents:
+            target = target.setdefault(parent, {})
+        target[leaf] = amount
+    return doc
+
+async def rebuild_daily_rollups(tenant_filter: dict) -> int:
+    """Recompute the rollups for the tenant from the raw collections; without a tenant,
+    rebuild every tenant in turn so only one tenant's bookings are held at a time, then mark
+    the rollups complete"""
+    started = datetime.now(timezone.utc).isoformat()
+    if not tenant_filter:
+        tenant_ids = set(await db.bookings.distinct("tenant_id")) | set(await db.expenses.distinct("tenant_id"))
+        documents = 0
+        for tenant_id in tenant_ids:
+            documents += await rebuild_daily_rollups({"tenant_id": tenant_id})
+        await db.daily_rollups.delete_many({"tenant_id": {"$nin": list(tenant_ids)}, "updated_at": {"$not": {"$gte": started}}})
+        await db.meta.update_one(
+            {"_id": ROLLUPS_META_ID},
+            {"$set": {"complete": True, "completed_at": datetime.now(timezone.utc).isoformat()}},
+            upsert=True
+        )
+        ROLLUPS_STATE['complete'] = True
+        return documents
+    
+    deltas = {}
+    bookings = {}
+    async for booking in db.bookings.find(tenant_filter, {
+        "_id": 0, "id": 1, "tenant_id": 1, "hall_id": 1, "event_date": 1, "created_at": 1, "status": 1,
+        "is_deleted": 1, "total_amount": 1, "gst_amount": 1, "guest_count": 1, "payment_splits": 1,
+        "payment_method": 1, "advance_paid": 1, "payment_cash": 1, "payment_credit": 1, "payment_upi": 1
+    }).batch_size(5000):
+        bookings[booking['id']] = {k: booking.get(k) for k in ("tenant_id", "hall_id", "event_date")}
+        add_booking_rollup(deltas, booking, 1)
+    
+    async for payment in db.payments.find(tenant_filter, {"_id": 0, "booking_id": 1, "amount": 1, "payment_mode": 1, "payment_date": 1}).batch_size(5000):
+        booking = bookings.get(payment['booking_id'])
+        if booking and payment.get('payment_date'):
+            key = (booking['tenant_id'], payment['payment_date'], booking['hall_id'])
+            add_rollup_delta(deltas, key, "collected", payment['amount'])
+            add_rollup_delta(deltas, key, f"collected_by_mode.{payment.get('payment_mode') or 'unspecified'}", payment['amount'])
+    
+    spent = await db.party_expenses.aggregate([
+        {"$match": {"booking_id": {"$in": list(bookings)}}},
+        {"$group": {"_id": "$booking_id", "amount": {"$sum": "$amount"}}}
+    ]).to_list(None)
+    for row in spent:
+        booking = bookings[row['_id']]
+        add_rollup_delta(deltas, (booking['tenant_id'], booking['event_date'], booking['hall_id']), "expenses", row['amount'])
+    
+    async for expense in db.expenses.find(tenant_filter, {"_id": 0, "tenant_id": 1, "date": 1, "amount": 1}).batch_size(5000):
+        add_rollup_delta(deltas, (expense.get('tenant_id'), expense['date'], None), "expenses", expense['amount'])
+    
+    # Replace each rebuilt key in place, then drop keys nothing contributes to any more, so
+    # readers never see the tenant's rollups missing mid-rebuild. A key a live $inc touched
+    # after the scan started is left alone either way: replacing it could drop that increment
+    rebuild_id = str(uuid.uuid4())
+    untouched = {"$not": {"$gte": started}}
+    operations = [
+        ReplaceOne(
+            {"tenant_id": tenant_id, "date": date, "hall_id": hall_id, "updated_at": untouched},
+            {"tenant_id": tenant_id, "date": date, "hall_id": hall_id, "rebuild_id": rebuild_id, **nest_rollup_fields(fields)},
+            upsert=True
+        )
+        for (tenant_id, date, hall_id), fields in deltas.items()
+    ]
+    if operations:
+        try:
+            await db.daily_rollups.bulk_write(operations, ordered=False)
+        except BulkWriteError as exc:
+            # The filter misses a touched key, so its upsert collides with the unique index
+            if any(error.get('code') != 11000 for error in exc.details.get('writeErrors', [])):
+                raise
+            logger.info(f"Rollup rebuild kept {len(exc.details['writeErrors'])} keys written during the rebuild")
+    await db.daily_rollups.delete_many({**tenant_filter, "rebuild_id": {"$ne": rebuild_id}, "updated_at": untouched})
+    return len(deltas)
+
+async def rollups_complete() -> bool:
+    """Whether a full rebuild has finished, so rollups can stand in for the raw collections"""
+    if not ROLLUPS_STATE['complete']:
+        ROLLUPS_STATE['complete'] = await db.meta.find_one({"_id": ROLLUPS_META_ID, "complete": True}, {"_id": 1}) is not None
+    return ROLLUPS_STATE['complete']
+
+async def backfill_daily_rollups():
+    """Build the rollups for deployments that predate them; reruns until a full rebuild completes"""
+    if not await rollups_complete():
+        await rebuild_daily_rollups({})
+
+async def backfill_expense_tenants():
+    """Attribute expenses recorded before they carried a tenant: through their booking, or to the
+    only tenant when there is just one"""
+    legacy = {"tenant_id": None}
+    if not await db.expenses.find_one(legacy, {"_id": 1}):
+        return
+    booking_ids = [b for b in await db.expenses.distinct("booking_id", legacy) if b]
+    operations = [
+        UpdateMany({**legacy, "booking_id": booking['id']}, {"$set": {"tenant_id": booking['tenant_id']}})
+        async for booking in db.bookings.find(
+            {"id": {"$in": booking_ids}, "tenant_id": {"$ne": None}}, {"_id": 0, "id": 1, "tenant_id": 1}
+        )
+    ]
+    attributed = 0
+    if operations:
+        attributed += (await db.expenses.bulk_write(operations, ordered=False)).modified_count
+    tenant_ids = await db.tenants.distinct("id")
+    if len(tenant_ids) == 1:
+        attributed += (await db.expenses.update_many(legacy, {"$set": {"tenant_id": tenant_ids[0]}})).modified_count
+    if attributed:
+        # Their rollup rows sit under no tenant; have the next backfill rebuild them
+        await db.meta.update_one({"_id": ROLLUPS_META_ID}, {"$set": {"complete": False}}, upsert=True)
+        ROLLUPS_STATE['complete'] = False
+        REPORT_MONTH_CACHE.clear()
+
+@api_router.post("/reports/rollups/rebuild")
+async def rebuild_daily_rollups_now(current_user: dict = Depends(get_current_user)):
+    """Rebuild the tenant's daily rollups from bookings, payments and expenses"""
+    require_admin(current_user)
+    tenant_filter = await get_tenant_filter(current_user)
+    documents = await rebuild_daily_rollups(tenant_filter)
+    return {"message": "Daily rollups rebuilt", "documents": documents}
+
 # ==================== PAYMENT ROUTES ====================
 @api_router.get("/payments", response_model=List[Payment])
 async def get_payments(booking_id: Optional[str] = None, current_user: dict = Depends(get_current_user)):
@@ -1787,6 +2395,14 @@ async def create_payment(payment_data: PaymentCreate, current_user: dict = Depen
         }}
     )
     
+    # Deposit status feeds the readiness score
+    await evaluate_readiness_scores({}, booking_ids=[payment_data.booking_id])
+    await record_payment_rollup(payment_doc, booking)
+    DASHBOARD_CACHE.invalidate(booking.get('tenant_id'))
+    ANALYTICS_CACHE.invalidate(booking.get('tenant_id'))
+    REPORT_MONTH_CACHE.invalidate(booking.get('tenant_id'), booking['event_date'][:7])
+    await evaluate_booking_alerts([{**booking, "advance_paid": new_advance, "balance_due": new_balance}])
+    
     return payment
 
 # ==================== PARTY EXPENSES (ADMIN ONLY) ====================
@@ -1820,6 +2436,7 @@ async def create_party_expense(expense_data: PartyExpenseCreate, current_user: d
     expense_doc = expense.model_dump()
     expense_doc['created_at'] = expense_doc['created_at'].isoformat()
     await db.party_expenses.insert_one(expense_doc)
+    await record_party_expense_rollup(booking, expense_doc['amount'])
     
     # Update booking total expenses and net profit
     all_expenses = await db.party_expenses.find({"booking_id": expense_data.booking_id}, {"_id": 0}).to_list(100)
@@ -1854,6 +2471,7 @@ async def delete_party_expense(expense_id: str, current_user: dict = Depends(get
     # Recalculate booking expenses
     booking = await db.bookings.find_one({"id": booking_id}, {"_id": 0})
     if booking:
+        await record_party_expense_rollup(booking, -expense['amount'])
         all_expenses = await db.party_expenses.find({"booking_id": booking_id}, {"_id": 0}).to_list(100)
         total_expenses = sum(e['amount'] for e in all_expenses)
         net_profit = booking['total_amount'] - total_expenses
@@ -1878,36 +2496,291 @@ async def get_party_plans(current_user: dict = Depends(get_current_user)):
     plans = await db.party_plans.find(tenant_filter, {"_id": 0}).sort("created_at", -1).to_list(100)
     return plans
 
+READINESS_BOARD_DAYS = 30
+READINESS_BOARD_MAX_DAYS = 365
+
+async def evaluate_readiness_scores(tenant_filter: dict, booking_ids: Optional[List[str]] = None, days_ahead: int = READINESS_BOARD_DAYS) -> int:
+    """Batch-recalculate readiness for upcoming party plans and persist with one bulk write"""
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    horizon = (datetime.now(timezone.utc) + timedelta(days=days_ahead)).strftime("%Y-%m-%d")
+
+    booking_query = {"status": {"$ne": "cancelled"}, "is_deleted": {"$ne": True}, **tenant_filter}
+    if booking_ids is not None:
+        booking_query["id"] = {"$in": booking_ids}
+    else:
+        booking_query["event_date"] = {"$gte": today, "$lte": horizon}
+
+    bookings = await db.bookings.find(booking_query, {
+        "_id": 0, "id": 1, "booking_number": 1, "customer_id": 1, "hall_id": 1,
+        "event_type": 1, "event_date": 1, "slot": 1, "guest_count": 1, "total_amount": 1
+    }).to_list(None)
+    if not bookings:
+        return 0
+    bookings_by_id = {b['id']: b for b in bookings}
+    ids = list(bookings_by_id.keys())
+
+    plans = await db.party_plans.find({"booking_id": {"$in": ids}, **tenant_filter}, {"_id": 0}).to_list(None)
+    if not plans:
+        return 0
+
+    # One $group for all payment sums instead of a payments query per plan
+    paid_rows = await db.payments.aggregate([
+        {"$match": {"booking_id": {"$in": [p['booking_id'] for p in plans]}}},
+        {"$group": {"_id": "$booking_id", "total": {"$sum": "$amount"}}}
+    ]).to_list(None)
+    paid_by_booking = {r['_id']: r['total'] for r in paid_rows}
+
+    evaluated_at = datetime.now(timezone.utc).isoformat()
+    operations = []
+    for plan in plans:
+        booking = bookings_by_id[plan['booking_id']]
+        total_paid = paid_by_booking.get(plan['booking_id'], 0)
+        score, breakdown = calculate_readiness_score(plan, booking, [{"amount": total_paid}])
+        operations.append(UpdateOne(
+            {"id": plan['id']},
+            {"$set": {
+                "readiness_score": score,
+                "readiness_breakdown": breakdown,
+                "readiness_evaluated_at": evaluated_at,
+                # Denormalized booking context so the board is a single indexed read
+                "readiness_context": {
+                    "booking_number": booking.get('booking_number'),
+                    "customer_id": booking.get('customer_id'),
+                    "hall_id": booking.get('hall_id'),
+                    "event_type": booking.get('event_type'),
+                    "event_date": booking.get('event_date'),
+                    "slot": booking.get('slot'),
+                    "guest_count": booking.get('guest_count'),
+                    "total_amount": booking.get('total_amount', 0),
+                    "payments_received": total_paid
+                }
+            }}
+        ))
+
+    await db.party_plans.bulk_write(operations, ordered=False)
+    return len(operations)
+
+async def refresh_all_readiness_scores():
+    """Periodic job: re-score upcoming party plans for every active tenant"""
+    tenants = await db.tenants.find({"status": "active"}, {"_id": 0, "id": 1}).to_list(None)
+    for tenant in tenants:
+        await evaluate_readiness_scores({"tenant_id": tenant['id']})
+
+# Booking fields the readiness score and board context are built from
+READINESS_BOOKING_FIELDS = ("event_date", "slot", "hall_id", "guest_count", "total_amount", "status", "is_deleted")
+
+async def rescore_booking_readiness(booking: dict, previous: Optional[dict] = None):
+    """Keep a plan's board entry in step with its booking: re-score on date/slot/amount changes,
+    drop it from the board when the booking is cancelled or deleted"""
+    if previous and all(booking.get(f) == previous.get(f) for f in READINESS_BOOKING_FIELDS):
+        return
+    if booking.get('status') == 'cancelled' or booking.get('is_deleted'):
+        await db.party_plans.update_one({"booking_id": booking['id']}, {"$unset": {"readiness_context": ""}})
+    else:
+        await evaluate_readiness_scores({}, booking_ids=[booking['id']])
+
+BOOKING_SYNC_LISTENERS.append(rescore_booking_readiness)
+
+@api_router.get("/party-plans/readiness-board")
+async def get_readiness_board(days: int = Query(READINESS_BOARD_DAYS, ge=1, le=READINESS_BOARD_MAX_DAYS), current_user: dict = Depends(get_current_user)):
+    """Readiness board for upcoming events, served from materialized scores"""
+    tenant_filter = await get_tenant_filter(current_user)
+    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
+    horizon = (datetime.now(timezone.utc) + timedelta(days=days)).strftime("%Y-%m-%d")
+
+    plans = await db.party_plans.find(
+        {"readiness_context.event_date": {"$gte": today, "$lte": horizon}, **tenant_filter},
+        {"_id": 0, "id": 1, "booking_id": 1, "readiness_score": 1, "readiness_breakdown": 1,
+         "readiness_evaluated_at": 1, "readiness_context": 1, "booking_changed": 1}
+    ).sort([("readiness_context.event_date", 1), ("readiness_score", 1)]).to_list(None)
+
+    return {
+        "period": {"start": today, "end": horizon},
+        "events": plans,
+        "total_events": len(plans),
+        "not_ready": sum(1 for p in plans if p.get('readiness_score', 0) < 60),
+        "average_score": round(sum(p.get('readiness_score', 0) for p in plans) / len(plans), 1) if plans else 0
+    }
+
+@api_router.post("/party-plans/readiness-board/refresh")
+async def refresh_readiness_board(days: int = Query(READINESS_BOARD_DAYS, ge=1, le=READINESS_BOARD_MAX_DAYS), current_user: dict = Depends(get_current_user)):
+    """Re-score all upcoming party plans for the tenant now"""
+    require_admin(current_user)
+    tenant_filter = await get_tenant_filter(current_user)
+    evaluated = await evaluate_readiness_scores(tenant_filter, days_ahead=days)
+    return {"message": "Readiness scores refreshed", "evaluated": evaluated}
+
+PROFIT_SNAPSHOT_SORT_FIELDS = [
+    "event_date", "booking_revenue", "payments_received", "pending_amount",
+    "total_expenses", "staff_costs", "estimated_profit", "profit_margin"
+]
+PROFIT_SNAPSHOT_CSV_FIELDS = [
+    "booking_number", "event_date", "event_type", "booking_revenue", "payments_received",
+    "pending_amount", "total_expenses", "staff_costs", "estimated_profit", "profit_margin",
+    "low_margin", "high_pending", "discount_applied"
+]
+
+def build_profit_snapshot_pipeline(match: dict, tenant_filter: dict, margin_warning: float, sort_field: str, sort_dir: int) -> list:
+    """Aggregation computing the profit snapshot numbers for every matched booking"""
+    def sum_lookup(collection: str, as_field: str, extra_match: dict = None) -> dict:
+        return {"$lookup": {
+            "from": collection,
+            "let": {"booking_id": "$id"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$booking_id", "$$booking_id"]}, **(extra_match or {})}},
+                {"$group": {"_id": None, "total": {"$sum": "$amount"}}}
+            ],
+            "as": as_field
+        }}
+
+    revenue = {"$ifNull": ["$total_amount", 0]}
+    return [
+        {"$match": match},
+        sum_lookup("payments", "payment_totals"),
+        sum_lookup("party_expenses", "expense_totals"),
+        {"$lookup": {
+            "from": "party_plans",
+            "let": {"booking_id": "$id"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$booking_id", "$$booking_id"]}, **tenant_filter}},
+                {"$project": {"_id": 0, "total_staff_charges": 1}},
+                {"$limit": 1}
+            ],
+            "as": "plan"
+        }},
+        {"$project": {
+            "_id": 0,
+            "booking_id": "$id",
+            "booking_number": 1,
+            "event_date": 1,
+            "event_type": 1,
+            "discount_type": 1,
+            "discount_value": {"$ifNull": ["$discount_value", 0]},
+            "booking_revenue": revenue,
+            "payments_received": {"$ifNull": [{"$arrayElemAt": ["$payment_totals.total", 0]}, 0]},
+            "total_expenses": {"$ifNull": [{"$arrayElemAt": ["$expense_totals.total", 0]}, 0]},
+            "staff_costs": {"$ifNull": [{"$arrayElemAt": ["$plan.total_staff_charges", 0]}, 0]}
+        }},
+        {"$addFields": {
+            "pending_amount": {"$subtract": ["$booking_revenue", "$payments_received"]},
+            "estimated_profit": {"$subtract": ["$booking_revenue", "$total_expenses"]}
+        }},
+        {"$addFields": {
+            "profit_margin": {"$cond": [
+                {"$gt": ["$booking_revenue", 0]},
+                {"$multiply": [{"$divide": ["$estimated_profit", "$booking_revenue"]}, 100]},
+                0
+            ]}
+        }},
+        # Flag against the exact margin; rounding first would let 19.96% pass a 20% threshold
+        {"$addFields": {
+            "low_margin": {"$lt": ["$profit_margin", margin_warning]},
+            "profit_margin": {"$round": ["$profit_margin", 1]},
+            "high_pending": {"$gt": ["$pending_amount", {"$multiply": ["$booking_revenue", 0.5]}]},
+            "discount_applied": {"$gt": ["$discount_value", 0]}
+        }},
+        {"$sort": {sort_field: sort_dir, "booking_id": 1}}
+    ]
+
+@api_router.get("/party-plans/profit-snapshots")
+async def get_profit_snapshots(
+    start: str,
+    end: str,
+    sort: str = "event_date",
+    order: str = "asc",
+    format: str = "json",
+    current_user: dict = Depends(get_current_user)
+):
+    """Profit snapshot table for every booking with an event between start and end"""
+    await check_permission(current_user, 'view_profit')
+    if sort not in PROFIT_SNAPSHOT_SORT_FIELDS:
+        raise HTTPException(status_code=400, detail=f"Invalid sort field. Use one of: {', '.join(PROFIT_SNAPSHOT_SORT_FIELDS)}")
+    
+    tenant_filter = await get_tenant_filter(current_user)
+    margin_warning = await get_workflow_rule(current_user.get('tenant_id'), 'profit_margin_warning_percent')
+    if margin_warning is None:
+        margin_warning = 20
+    
+    match = {
+        "event_date": {"$gte": start, "$lte": end},
+        "status": {"$ne": "cancelled"},
+        "is_deleted": {"$ne": True},
+        **tenant_filter
+    }
+    pipeline = build_profit_snapshot_pipeline(match, tenant_filter, margin_warning, sort, -1 if order == "desc" else 1)
+    
+    if format == "csv":
+        await check_permission(current_user, 'export_reports')
+        import io
+        import csv
+        
+        async def csv_rows():
+            output = io.StringIO()
+            writer = csv.DictWriter(output, fieldnames=PROFIT_SNAPSHOT_CSV_FIELDS, extrasaction="ignore")
+            writer.writeheader()
+            async for row in db.bookings.aggregate(pipeline):
+                writer.writerow(row)
+                yield output.getvalue()
+                output.seek(0)
+                output.truncate(0)
+            if output.getvalue():
+                yield output.getvalue()
+        
+        return StreamingResponse(
+            csv_rows(),
+            media_type="text/csv",
+            headers={"Content-Disposition": f"attachment; filename=profit_snapshots_{start}_{end}.csv"}
+        )
+    
+    rows = await db.bookings.aggregate(pipeline).to_list(None)
+    total_revenue = sum(r['booking_revenue'] for r in rows)
+    total_expenses = sum(r['total_expenses'] for r in rows)
+    
+    return {
+        "period": {"start": start, "end": end},
+        "sort": {"field": sort, "order": order},
+        "rows": rows,
+        "totals": {
+            "events": len(rows),
+            "booking_revenue": total_revenue,
+            "payments_received": sum(r['payments_received'] for r in rows),
+            "pending_amount": sum(r['pending_amount'] for r in rows),
+            "total_expenses": total_expenses,
+            "staff_costs": sum(r['staff_costs'] for r in rows),
+            "estimated_profit": total_revenue - total_expenses,
+            "profit_margin": round((total_revenue - total_expenses) / total_revenue * 100, 1) if total_revenue > 0 else 0,
+            "low_margin_events": sum(1 for r in rows if r['low_margin']),
+            "high_pending_events": sum(1 for r in rows if r['high_pending'])
+        }
+    }
+
 @api_router.get("/party-plans/by-booking/{booking_id}")
 async def get_party_plan_by_booking(booking_id: str, current_user: dict = Depends(get_current_user)):
     """Get party plan for a specific booking - primary API for frontend"""
     tenant_filter = await get_tenant_filter(current_user)
     
-    # First verify the booking exists and belongs to tenant
-    booking = await db.bookings.find_one({"id": booking_id, **tenant_filter}, {"_id": 0})
-    if not booking:
+    # Booking and plan in one round trip; change warnings are precomputed by booking change events
+    result = await db.bookings.aggregate([
+        {"$match": {"id": booking_id, **tenant_filter}},
+        {"$limit": 1},
+        {"$lookup": {
+            "from": "party_plans",
+            "let": {"booking_id": "$id"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$booking_id", "$$booking_id"]}, **tenant_filter}},
+                {"$project": {"_id": 0}},
+                {"$limit": 1}
+            ],
+            "as": "plan"
+        }},
+        {"$project": {"_id": 0}}
+    ]).to_list(1)
+    if not result:
         raise HTTPException(status_code=404, detail="Booking not found")
     
-    # Get the party plan
-    plan = await db.party_plans.find_one({"booking_id": booking_id, **tenant_filter}, {"_id": 0})
-    
-    # Check if booking details changed since plan was created
-    if plan and plan.get('booking_snapshot'):
-        change_warnings = []
-        snapshot = plan.get('booking_snapshot', {})
-        
-        if snapshot.get('event_date') != booking.get('event_date'):
-            change_warnings.append(f"Event date changed from {snapshot.get('event_date')} to {booking.get('event_date')}")
-        if snapshot.get('slot') != booking.get('slot'):
-            change_warnings.append(f"Slot changed from {snapshot.get('slot')} to {booking.get('slot')}")
-        if snapshot.get('guest_count') != booking.get('guest_count'):
-            change_warnings.append(f"Guest count changed from {snapshot.get('guest_count')} to {booking.get('guest_count')}")
-        if snapshot.get('hall_id') != booking.get('hall_id'):
-            change_warnings.append("Hall/Venue changed")
-        
-        if change_warnings:
-            plan['booking_changed'] = True
-            plan['change_warnings'] = change_warnings
+    booking = result[0]
+    plans = booking.pop('plan')
+    plan = plans[0] if plans else None
     
     return {
         "booking": booking,
@@ -2201,6 +3074,7 @@ async def create_party_plan(plan_data: PartyPlanCreate, current_user: dict = Dep
     
     await db.party_plans.insert_one(plan_doc)
     plan_doc.pop('_id', None)
+    await evaluate_readiness_scores(tenant_filter, booking_ids=[plan_data.booking_id])
     
     # Auto-create staff expense if staff charges > 0
     if total_staff_charges > 0:
@@ -2213,6 +3087,7 @@ async def create_party_plan(plan_data: PartyPlanCreate, current_user: dict = Dep
         expense_doc['tenant_id'] = tenant_id
         expense_doc['created_at'] = expense_doc['created_at'].isoformat()
         await db.party_expenses.insert_one(expense_doc)
+        await record_party_expense_rollup(booking, total_staff_charges)
     
     return plan_doc
 
@@ -2242,26 +3117,6 @@ async def update_party_plan(booking_id: str, plan_data: PartyPlanCreate, current
         wage = float(staff.get('wage', 0))
         total_staff_charges += count * wage
     
-    # Update booking snapshot if acknowledging changes
-    booking_snapshot = existing.get('booking_snapshot', {})
-    change_warnings = []
-    booking_changed = False
-    
-    # Check if booking details changed
-    if booking_snapshot:
-        if booking_snapshot.get('event_date') != booking.get('event_date'):
-            change_warnings.append("Event date changed")
-            booking_changed = True
-        if booking_snapshot.get('slot') != booking.get('slot'):
-            change_warnings.append("Slot changed")
-            booking_changed = True
-        if booking_snapshot.get('guest_count') != booking.get('guest_count'):
-            change_warnings.append("Guest count changed")
-            booking_changed = True
-        if booking_snapshot.get('hall_id') != booking.get('hall_id'):
-            change_warnings.append("Hall/Venue changed")
-            booking_changed = True
-    
     # Add activity log entry
     activity_log = existing.get('activity_log', [])
     activity_log.append({
@@ -2287,8 +3142,6 @@ async def update_party_plan(booking_id: str, plan_data: PartyPlanCreate, current
         "documents": plan_data.documents if hasattr(plan_data, 'documents') else existing.get('documents', []),
         "activity_log": activity_log,
         "notes": plan_data.notes,
-        "booking_changed": booking_changed,
-        "change_warnings": change_warnings,
         "updated_at": datetime.now(timezone.utc).isoformat()
     }
     
@@ -2304,7 +3157,10 @@ async def update_party_plan(booking_id: str, plan_data: PartyPlanCreate, current
     await db.party_plans.update_one({"booking_id": booking_id}, {"$set": update_data})
     
     # Update or create staff expense
-    await db.party_expenses.delete_many({"booking_id": booking_id, "expense_name": {"$regex": "Staff wages"}, "notes": {"$regex": "party planning"}})
+    staff_expense_query = {"booking_id": booking_id, "expense_name": {"$regex": "Staff wages"}, "notes": {"$regex": "party planning"}}
+    previous_staff_expenses = await db.party_expenses.find(staff_expense_query, {"_id": 0, "amount": 1}).to_list(None)
+    await db.party_expenses.delete_many(staff_expense_query)
+    await record_party_expense_rollup(booking, total_staff_charges - sum(e['amount'] for e in previous_staff_expenses))
     
     if total_staff_charges > 0:
         expense_doc = PartyExpense(
@@ -2317,6 +3173,8 @@ async def update_party_plan(booking_id: str, plan_data: PartyPlanCreate, current
         expense_doc['created_at'] = expense_doc['created_at'].isoformat()
         await db.party_expenses.insert_one(expense_doc)
     
+    await evaluate_readiness_scores(tenant_filter, booking_ids=[booking_id])
+    
     # Return updated plan
     updated_plan = await db.party_plans.find_one({"booking_id": booking_id}, {"_id": 0})
     return updated_plan
@@ -2516,22 +3374,68 @@ async def get_profit_snapshot(booking_id: str, current_user: dict = Depends(get_
     }
 
 # ==================== CONFIRMED BOOKINGS FOR PARTY PLANNING ====================
+CONFIRMED_BOOKINGS_PAGE_SIZE = 100
+
 @api_router.get("/confirmed-bookings")
-async def get_confirmed_bookings(current_user: dict = Depends(get_current_user)):
+async def get_confirmed_bookings(
+    response: Response,
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    cursor: Optional[str] = None,
+    limit: int = CONFIRMED_BOOKINGS_PAGE_SIZE,
+    current_user: dict = Depends(get_current_user)
+):
+    """Confirmed bookings with party plan summary, joined in a single aggregation.
+    
+    Pages are ordered by (event_date, id). When more rows exist, the cursor for
+    the next page is returned in the X-Next-Cursor header.
+    """
     if current_user.get('role') != 'admin':
         raise HTTPException(status_code=403, detail="Admin access required")
     
     tenant_filter = await get_tenant_filter(current_user)
-    bookings = await db.bookings.find(
-        {"status": {"$in": ["confirmed", "completed"]}, **tenant_filter},
-        {"_id": 0}
-    ).sort("event_date", 1).to_list(100)
+    limit = max(1, min(limit, 500))
+    
+    match = {"status": {"$in": ["confirmed", "completed"]}, **tenant_filter}
+    if start_date or end_date:
+        match["event_date"] = {}
+        if start_date:
+            match["event_date"]["$gte"] = start_date
+        if end_date:
+            match["event_date"]["$lte"] = end_date
+    if cursor:
+        cursor_date, _, cursor_id = cursor.partition("|")
+        match["$or"] = [
+            {"event_date": {"$gt": cursor_date}},
+            {"event_date": cursor_date, "id": {"$gt": cursor_id}}
+        ]
     
-    # Enrich with party plan status
-    for booking in bookings:
-        plan = await db.party_plans.find_one({"booking_id": booking['id'], **tenant_filter}, {"_id": 0})
-        booking['has_party_plan'] = plan is not None
-        booking['party_plan'] = plan
+    pipeline = [
+        {"$match": match},
+        {"$sort": {"event_date": 1, "id": 1}},
+        {"$limit": limit + 1},
+        {"$lookup": {
+            "from": "party_plans",
+            "let": {"booking_id": "$id"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$booking_id", "$$booking_id"]}, **tenant_filter}},
+                {"$project": {"_id": 0, "id": 1, "readiness_score": 1, "booking_changed": 1}},
+                {"$limit": 1}
+            ],
+            "as": "plan_summary"
+        }},
+        {"$addFields": {
+            "has_party_plan": {"$gt": [{"$size": "$plan_summary"}, 0]},
+            "party_plan": {"$arrayElemAt": ["$plan_summary", 0]}
+        }},
+        {"$project": {"_id": 0, "plan_summary": 0}}
+    ]
+    bookings = await db.bookings.aggregate(pipeline).to_list(limit + 1)
+    
+    if len(bookings) > limit:
+        bookings = bookings[:limit]
+        last = bookings[-1]
+        response.headers["X-Next-Cursor"] = f"{last['event_date']}|{last['id']}"
     
     return bookings
 
@@ -2566,74 +3470,118 @@ async def create_vendor_payment(payment_data: VendorPaymentCreate, current_user:
     await db.vendor_payments.insert_one(payment_doc)
     
     # Update vendor balance sheet
-    total_paid = vendor.get('total_paid', 0) + payment_data.amount
-    outstanding = vendor.get('total_payable', 0) - total_paid
-    
     await db.vendors.update_one(
         {"id": payment_data.vendor_id},
-        {"$set": {
-            "total_paid": total_paid,
-            "outstanding_balance": outstanding
+        {"$inc": {
+            "total_paid": payment_data.amount,
+            "outstanding_balance": -payment_data.amount
         }}
     )
     
     return payment
 
+VENDOR_BALANCE_PAYMENTS_PAGE_SIZE = 20
+
+def build_vendor_balance_pipeline(tenant_filter: dict, payments_skip: int = 0, payments_limit: int = VENDOR_BALANCE_PAYMENTS_PAGE_SIZE) -> list:
+    """Aggregation producing one balance sheet row per active vendor of the tenant"""
+    def non_null(field):
+        return {"$filter": {"input": field, "as": "b", "cond": {"$ne": ["$$b", None]}}}
+
+    return [
+        {"$match": {"is_active": True, **tenant_filter}},
+        {"$sort": {"name": 1}},
+        {"$lookup": {
+            "from": "vendor_payments",
+            "let": {"vendor_id": "$id"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$vendor_id", "$$vendor_id"]}}},
+                {"$sort": {"created_at": -1}},
+                {"$facet": {
+                    "totals": [{"$group": {
+                        "_id": None,
+                        "total_paid": {"$sum": "$amount"},
+                        "count": {"$sum": 1},
+                        "booking_ids": {"$addToSet": "$booking_id"}
+                    }}],
+                    "page": [{"$skip": payments_skip}, {"$limit": payments_limit}, {"$project": {"_id": 0}}]
+                }}
+            ],
+            "as": "payment_summary"
+        }},
+        {"$lookup": {
+            "from": "vendor_assignments",
+            "let": {"vendor_id": "$id"},
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$vendor_id", "$$vendor_id"]}}},
+                {"$group": {"_id": None, "booking_ids": {"$addToSet": "$booking_id"}}}
+            ],
+            "as": "assignment_summary"
+        }},
+        {"$addFields": {
+            "payment_summary": {"$arrayElemAt": ["$payment_summary", 0]},
+            "assignment_booking_ids": {"$ifNull": [{"$arrayElemAt": ["$assignment_summary.booking_ids", 0]}, []]}
+        }},
+        {"$addFields": {
+            "payment_totals": {"$arrayElemAt": ["$payment_summary.totals", 0]}
+        }},
+        {"$project": {
+            "_id": 0,
+            "vendor_id": "$id",
+            "vendor_name": "$name",
+            "vendor_type": "$vendor_type",
+            "phone": {"$ifNull": ["$phone", ""]},
+            "total_payable": {"$ifNull": ["$total_payable", 0]},
+            "total_paid": {"$ifNull": ["$payment_totals.total_paid", 0]},
+            "parties_count": {"$size": {"$setUnion": [
+                non_null({"$ifNull": ["$payment_totals.booking_ids", []]}),
+                non_null("$assignment_booking_ids")
+            ]}},
+            "payments_count": {"$ifNull": ["$payment_totals.count", 0]},
+            "payments": "$payment_summary.page"
+        }},
+        {"$addFields": {
+            "outstanding_balance": {"$max": [0, {"$subtract": ["$total_payable", "$total_paid"]}]}
+        }}
+    ]
+
 @api_router.get("/vendor-balance-sheet")
-async def get_vendor_balance_sheet(current_user: dict = Depends(get_current_user)):
+async def get_vendor_balance_sheet(
+    payments_page: int = 1,
+    payments_page_size: int = VENDOR_BALANCE_PAYMENTS_PAGE_SIZE,
+    current_user: dict = Depends(get_current_user)
+):
+    """Vendor balance sheet computed in one aggregation; read-only"""
     # Only admin can see vendor balance sheet
     if current_user.get('role') != 'admin':
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    vendors = await db.vendors.find({"is_active": True}, {"_id": 0}).to_list(100)
+    tenant_filter = await get_tenant_filter(current_user)
+    payments_page_size = max(1, min(payments_page_size, 100))
+    payments_skip = (max(1, payments_page) - 1) * payments_page_size
     
-    balance_sheet = []
-    for vendor in vendors:
-        # Get all payments for this vendor
-        payments = await db.vendor_payments.find({"vendor_id": vendor['id']}, {"_id": 0}).to_list(100)
-        
-        # Calculate total paid from actual payments
-        total_paid = sum(p.get('amount', 0) for p in payments)
-        
-        # Count unique bookings linked to this vendor through payments
-        linked_bookings = set()
-        for p in payments:
-            if p.get('booking_id'):
-                linked_bookings.add(p['booking_id'])
-        
-        # Also count from vendor assignments
-        assignments = await db.vendor_assignments.find({"vendor_id": vendor['id']}, {"_id": 0}).to_list(100)
-        for a in assignments:
-            if a.get('booking_id'):
-                linked_bookings.add(a['booking_id'])
-        
-        parties_count = len(linked_bookings)
-        total_payable = vendor.get('total_payable', 0)
-        outstanding = max(0, total_payable - total_paid)
-        
-        # Update vendor record with calculated values
-        await db.vendors.update_one(
-            {"id": vendor['id']},
-            {"$set": {
-                "total_paid": total_paid,
-                "outstanding_balance": outstanding,
-                "total_events": parties_count
-            }}
-        )
-        
-        balance_sheet.append({
-            "vendor_id": vendor['id'],
-            "vendor_name": vendor['name'],
-            "vendor_type": vendor['vendor_type'],
-            "phone": vendor.get('phone', ''),
-            "total_payable": total_payable,
-            "total_paid": total_paid,
-            "outstanding_balance": outstanding,
-            "parties_count": parties_count,
-            "payments": payments
-        })
+    pipeline = build_vendor_balance_pipeline(tenant_filter, payments_skip, payments_page_size)
+    return await db.vendors.aggregate(pipeline).to_list(None)
+
+@api_router.post("/vendor-balance-sheet/reconcile")
+async def reconcile_vendor_balance_sheet(current_user: dict = Depends(get_current_user)):
+    """Refresh stored vendor event counts and repair paid/outstanding totals from every payment source"""
+    if current_user.get('role') != 'admin':
+        raise HTTPException(status_code=403, detail="Admin access required")
+    
+    tenant_filter = await get_tenant_filter(current_user)
+    rows = await db.vendors.aggregate(build_vendor_balance_pipeline(tenant_filter, payments_limit=1)).to_list(None)
     
-    return balance_sheet
+    operations = [UpdateOne({"id": row['vendor_id']}, {"$set": {"total_events": row['parties_count']}}) for row in rows]
+    if operations:
+        await db.vendors.bulk_write(operations, ordered=False)
+    # Balances are owned by the verifier, which counts ledger entries as well as vendor_payments
+    audit = await verify_vendor_balances(tenant_filter)
+    
+    return {
+        "message": "Vendor balances reconciled",
+        "vendors_updated": len(operations),
+        "balances_repaired": audit['vendors_drifted']
+    }
 
 @api_router.put("/vendors/{vendor_id}/add-payable")
 async def add_vendor_payable(vendor_id: str, amount: float, description: str = "", current_user: dict = Depends(get_current_user)):
@@ -2641,23 +3589,33 @@ async def add_vendor_payable(vendor_id: str, amount: float, description: str = "
     if current_user.get('role') != 'admin':
         raise HTTPException(status_code=403, detail="Admin access required")
     
-    vendor = await db.vendors.find_one({"id": vendor_id}, {"_id": 0})
+    tenant_filter = await get_tenant_filter(current_user)
+    vendor = await db.vendors.find_one({"id": vendor_id, **tenant_filter}, {"_id": 0, "id": 1, "tenant_id": 1})
     if not vendor:
         raise HTTPException(status_code=404, detail="Vendor not found")
     
-    new_payable = vendor.get('total_payable', 0) + amount
-    outstanding = new_payable - vendor.get('total_paid', 0)
+    # Record the payable as a ledger debit so the balance verifier can account for it
+    txn = VendorTransaction(
+        tenant_id=vendor.get('tenant_id'),
+        vendor_id=vendor_id,
+        transaction_type=TransactionType.DEBIT,
+        amount=amount,
+        transaction_date=datetime.now(timezone.utc).strftime('%Y-%m-%d'),
+        note=description or "Payable added",
+        created_by=current_user.get('user_id')
+    )
+    txn_doc = txn.model_dump()
+    txn_doc['created_at'] = txn_doc['created_at'].isoformat()
+    await record_vendor_transaction(txn_doc)
     
-    await db.vendors.update_one(
+    vendor = await db.vendors.find_one_and_update(
         {"id": vendor_id},
-        {"$set": {
-            "total_payable": new_payable,
-            "outstanding_balance": outstanding,
-            "total_events": vendor.get('total_events', 0) + 1
-        }}
+        {"$inc": {"total_events": 1}},
+        projection={"_id": 0},
+        return_document=ReturnDocument.AFTER
     )
     
-    return {"message": "Payable amount added", "new_total_payable": new_payable, "outstanding": outstanding}
+    return {"message": "Payable amount added", "new_total_payable": vendor['total_payable'], "outstanding": vendor['outstanding_balance']}
 
 # ==================== ENQUIRY ROUTES (PUBLIC) ====================
 @api_router.post("/enquiries", response_model=Enquiry)
@@ -2666,6 +3624,8 @@ async def create_enquiry(enquiry_data: EnquiryCreate):
     enquiry_doc = enquiry.model_dump()
     enquiry_doc['created_at'] = enquiry_doc['created_at'].isoformat()
     await db.enquiries.insert_one(enquiry_doc)
+    # Public enquiries are not tied to a tenant here, so any dashboard may count them
+    DASHBOARD_CACHE.clear()
     return enquiry
 
 @api_router.get("/enquiries", response_model=List[Enquiry])
@@ -2680,12 +3640,31 @@ async def mark_enquiry_contacted(enquiry_id: str, current_user: dict = Depends(g
     result = await db.enquiries.update_one({"id": enquiry_id, **tenant_filter}, {"$set": {"is_contacted": True}})
     if result.matched_count == 0:
         raise HTTPException(status_code=404, detail="Enquiry not found")
+    DASHBOARD_CACHE.invalidate(current_user.get('tenant_id'))
     return {"message": "Enquiry marked as contacted"}
 
 # ==================== CALENDAR ROUTES ====================
+# Rendered months per tenant; dropped by booking writes on that month and by hall writes
+CALENDAR_CACHE = ResponseCache(ttl_seconds=10 * 60, max_entries=2048)
+
+async def invalidate_calendar_cache(booking: dict, previous: Optional[dict] = None):
+    """Drop the cached calendar month(s) a booking write touches"""
+    for doc in (booking, previous):
+        if doc and doc.get('event_date'):
+            year, month = doc['event_date'][:7].split('-')
+            CALENDAR_CACHE.invalidate(doc.get('tenant_id'), int(year), int(month))
+
+BOOKING_SYNC_LISTENERS.append(invalidate_calendar_cache)
+
 @api_router.get("/calendar")
 async def get_calendar_events(month: int, year: int, current_user: dict = Depends(get_current_user)):
     tenant_filter = await get_tenant_filter(current_user)
+    # Super admin views span tenants and are not cached
+    cache_key = (tenant_filter['tenant_id'], year, month) if tenant_filter else None
+    cached = CALENDAR_CACHE.get(cache_key) if cache_key else None
+    if cached is not None:
+        return cached
+    
     start_date = f"{year}-{month:02d}-01"
     if month == 12:
         end_date = f"{year + 1}-01-01"
@@ -2696,28 +3675,176 @@ async def get_calendar_events(month: int, year: int, current_user: dict = Depend
         "event_date": {"$gte": start_date, "$lt": end_date},
         "status": {"$ne": "cancelled"},
         **tenant_filter
-    }, {"_id": 0}).to_list(500)
+    }, {"_id": 0, "id": 1, "customer_id": 1, "hall_id": 1, "event_type": 1, "event_date": 1,
+        "start_time": 1, "end_time": 1, "status": 1, "guest_count": 1}).to_list(500)
+    
+    customers = await db.customers.find(
+        {"id": {"$in": list({b['customer_id'] for b in bookings})}, **tenant_filter},
+        {"_id": 0, "id": 1, "name": 1}
+    ).to_list(None)
+    halls = await db.halls.find(
+        {"id": {"$in": list({b['hall_id'] for b in bookings})}, **tenant_filter},
+        {"_id": 0, "id": 1, "name": 1}
+    ).to_list(None)
+    customer_names = {c['id']: c['name'] for c in customers}
+    hall_names = {h['id']: h['name'] for h in halls}
     
     events = []
     for booking in bookings:
-        customer = await db.customers.find_one({"id": booking['customer_id'], **tenant_filter}, {"_id": 0})
-        hall = await db.halls.find_one({"id": booking['hall_id'], **tenant_filter}, {"_id": 0})
         events.append({
             "id": booking['id'],
-            "title": f"{customer['name'] if customer else 'Unknown'} - {booking['event_type'].title()}",
+            "title": f"{customer_names.get(booking['customer_id'], 'Unknown')} - {booking['event_type'].title()}",
             "date": booking['event_date'],
             "start_time": booking['start_time'],
             "end_time": booking['end_time'],
-            "hall": hall['name'] if hall else 'Unknown',
+            "hall": hall_names.get(booking['hall_id'], 'Unknown'),
             "status": booking['status'],
             "guest_count": booking['guest_count']
         })
     
+    if cache_key:
+        CALENDAR_CACHE.set(cache_key, events)
     return events
 
+# ==================== HALL OCCUPANCY ROLLUP ====================
+# One document per (tenant, date): {"slots": {hall_id: {slot: active booking count}}}
+OCCUPANCY_SLOTS = [SlotType.DAY.value, SlotType.NIGHT.value]
+
+def occupancy_key(booking: Optional[dict]):
+    """(tenant, date, hall, slot) an active booking occupies, or None"""
+    if not booking or booking.get('status') == 'cancelled' or booking.get('is_deleted'):
+        return None
+    # Same bookings the rebuild counts
+    if not (booking.get('tenant_id') and booking.get('event_date') and booking.get('hall_id')):
+        return None
+    slot = booking.get('slot') or SlotType.DAY.value
+    return (booking.get('tenant_id'), booking['event_date'], booking['hall_id'], getattr(slot, 'value', slot))
+
+async def update_hall_occupancy(booking: dict, previous: Optional[dict] = None):
+    """Move a booking's slot count in the occupancy rollup when it is created, moved or cancelled"""
+    old, new = occupancy_key(previous), occupancy_key(booking)
+    if old == new:
+        return
+    operations = []
+    now = datetime.now(timezone.utc).isoformat()
+    for key, delta in ((old, -1), (new, 1)):
+        if key:
+            tenant_id, date, hall_id, slot = key
+            operations.append(UpdateOne(
+                {"tenant_id": tenant_id, "date": date},
+                {"$inc": {f"slots.{hall_id}.{slot}": delta}, "$set": {"updated_at": now}},
+                upsert=True
+            ))
+    await db.hall_occupancy.bulk_write(operations, ordered=False)
+
+BOOKING_SYNC_LISTENERS.append(update_hall_occupancy)
+
+async def rebuild_hall_occupancy(tenant_filter: dict):
+    """Rebuild the occupancy rollup from bookings server-side, replacing days in place"""
+    started = datetime.now(timezone.utc).isoformat()
+    rebuild_id = str(uuid.uuid4())
+    await db.bookings.aggregate([
+        # $merge on (tenant_id, date) rejects null keys, and hall ids become object keys
+        {"$match": {
+            "status": {"$ne": "cancelled"},
+            "is_deleted": {"$ne": True},
+            "tenant_id": {"$exists": True, "$ne": None},
+            "event_date": {"$type": "string"},
+            "hall_id": {"$type": "string"},
+            **tenant_filter
+        }},
+        {"$group": {
+            "_id": {"tenant_id": "$tenant_id", "date": "$event_date", "hall_id": "$hall_id",
+                    "slot": {"$ifNull": ["$slot", SlotType.DAY.value]}},
+            "count": {"$sum": 1}
+        }},
+        {"$group": {
+            "_id": {"tenant_id": "$_id.tenant_id", "date": "$_id.date", "hall_id": "$_id.hall_id"},
+            "slots": {"$push": {"k": "$_id.slot", "v": "$count"}}
+        }},
+        {"$group": {
+            "_id": {"tenant_id": "$_id.tenant_id", "date": "$_id.date"},
+            "halls": {"$push": {"k": "$_id.hall_id", "v": {"$arrayToObject": "$slots"}}}
+        }},
+        {"$project": {"_id": 0, "tenant_id": "$_id.tenant_id", "date": "$_id.date", "slots": {"$arrayToObject": "$halls"},
+                      "rebuild_id": {"$literal": rebuild_id}}},
+        {"$merge": {"into": "hall_occupancy", "on": ["tenant_id", "date"], "whenMatched": "replace", "whenNotMatched": "insert"}}
+    ]).to_list(None)
+    # Days with no active bookings left; a day a live write touched since the rebuild started is kept
+    await db.hall_occupancy.delete_many({
+        **tenant_filter,
+        "rebuild_id": {"$ne": rebuild_id},
+        "updated_at": {"$not": {"$gte": started}}
+    })
+
+async def backfill_hall_occupancy():
+    """Build the rollup once for deployments that predate it"""
+    if await db.hall_occupancy.estimated_document_count() == 0 and await db.bookings.estimated_document_count() > 0:
+        await rebuild_hall_occupancy({})
+
+@api_router.post("/calendar/heatmap/rebuild")
+async def rebuild_occupancy_heatmap(current_user: dict = Depends(get_current_user)):
+    """Rebuild the tenant's occupancy rollup from its bookings"""
+    require_admin(current_user)
+    tenant_filter = await get_tenant_filter(current_user)
+    await rebuild_hall_occupancy(tenant_filter)
+    if tenant_filter:
+        REPORT_MONTH_CACHE.invalidate(tenant_filter['tenant_id'])
+    else:
+        REPORT_MONTH_CACHE.clear()
+    return {"message": "Occupancy rollup rebuilt", "days": await db.hall_occupancy.count_documents(tenant_filter)}
+
+@api_router.get("/calendar/heatmap")
+async def get_occupancy_heatmap(year: int = Query(..., ge=2000, le=2100), current_user: dict = Depends(get_current_user)):
+    """Year heatmap: per day, a code per hall (0 free, 1 day booked, 2 night booked, 3 both)"""
+    tenant_filter = await get_tenant_filter(current_user)
+    halls = await db.halls.find({"is_active": True, **tenant_filter}, {"_id": 0, "id": 1, "name": 1}).sort("name", 1).to_list(None)
+    hall_index = {h['id']: i for i, h in enumerate(halls)}
+    
+    start = datetime(year, 1, 1)
+    days = (datetime(year + 1, 1, 1) - start).days
+    rows = await db.hall_occupancy.find(
+        {"date": {"$gte": f"{year}-01-01", "$lte": f"{year}-12-31"}, **tenant_filter},
+        {"_id": 0, "date": 1, "slots": 1}
+    ).to_list(None)
+    
+    booked = [[0] * len(halls) for _ in range(days)]
+    for row in rows:
+        day = (datetime.strptime(row['date'], "%Y-%m-%d") - start).days
+        for hall_id, slots in row.get('slots', {}).items():
+            if hall_id not in hall_index:
+                continue
+            for bit, slot in enumerate(OCCUPANCY_SLOTS):
+                if slots.get(slot, 0) > 0:
+                    booked[day][hall_index[hall_id]] |= 1 << bit
+    
+    capacity = len(halls) * len(OCCUPANCY_SLOTS)
+    return {
+        "year": year,
+        "start": start.strftime("%Y-%m-%d"),
+        "slots": OCCUPANCY_SLOTS,
+        "halls": halls,
+        "booked": booked,
+        "free_slots": [capacity - sum(bin(code).count("1") for code in day) for day in booked]
+    }
+
+# ==================== PUBLIC AVAILABILITY ====================
+async def invalidate_public_availability(booking: dict, previous: Optional[dict] = None):
+    """Drop cached availability for the date(s) a booking write touches"""
+    for doc in (booking, previous):
+        if doc and doc.get('event_date'):
+            PUBLIC_AVAILABILITY_CACHE.invalidate(doc['event_date'])
+
+BOOKING_SYNC_LISTENERS.append(invalidate_public_availability)
+
 # Check hall availability (public)
-@api_router.get("/availability")
-async def check_availability(date: str, hall_id: Optional[str] = None):
+@api_router.get("/availability", dependencies=[Depends(public_rate_limit)])
+async def check_availability(request: Request, date: str, hall_id: Optional[str] = None):
+    cache_key = (date, hall_id)
+    cached = PUBLIC_AVAILABILITY_CACHE.get(cache_key)
+    if cached is not None:
+        return cached_json_response(request, cached, max_age=PUBLIC_AVAILABILITY_CACHE.ttl_seconds)
+    
     query = {
         "event_date": date,
         "status": {"$nin": ["cancelled"]}
@@ -2731,102 +3858,253 @@ async def check_availability(date: str, hall_id: Optional[str] = None):
     booked_hall_ids = [b['hall_id'] for b in booked]
     available_halls = [h for h in halls if h['id'] not in booked_hall_ids]
     
-    return {
+    cached = cacheable_json({
         "date": date,
         "available_halls": [Hall(**h) for h in available_halls],
         "booked_slots": booked
-    }
+    })
+    PUBLIC_AVAILABILITY_CACHE.set(cache_key, cached)
+    return cached_json_response(request, cached, max_age=PUBLIC_AVAILABILITY_CACHE.ttl_seconds)
+
+AVAILABILITY_SEARCH_MAX_DAYS = 731
+
+@api_router.get("/availability/search")
+async def search_availability(
+    from_date: str = Query(..., alias="from"),
+    to_date: Optional[str] = Query(None, alias="to"),
+    min_capacity: int = 0,
+    slot: Optional[SlotType] = None,
+    limit: int = 10,
+    current_user: dict = Depends(get_current_user)
+):
+    """Next free (hall, date, slot) combinations that seat min_capacity, earliest first"""
+    tenant_filter = await get_tenant_filter(current_user)
+    try:
+        start = datetime.strptime(from_date, "%Y-%m-%d")
+        end = datetime.strptime(to_date, "%Y-%m-%d") if to_date else start + timedelta(days=365)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="from and to must be YYYY-MM-DD")
+    days = (end - start).days + 1
+    if days < 1 or days > AVAILABILITY_SEARCH_MAX_DAYS:
+        raise HTTPException(status_code=400, detail=f"Search window must be 1 to {AVAILABILITY_SEARCH_MAX_DAYS} days")
+    limit = max(1, min(limit, 100))
+    slots = [slot.value] if slot else OCCUPANCY_SLOTS
+    
+    # Smallest hall that fits first, so large halls stay free for large parties
+    halls = await db.halls.find(
+        {"is_active": True, "capacity": {"$gte": min_capacity}, **tenant_filter},
+        {"_id": 0, "id": 1, "name": 1, "capacity": 1}
+    ).sort([("capacity", 1), ("name", 1)]).to_list(None)
+    if not halls:
+        return {"from": from_date, "to": end.strftime("%Y-%m-%d"), "results": []}
+    
+    # Bit d of booked[(hall_id, slot)] is set when that hall and slot is taken on day d
+    booked = {(h['id'], s): 0 for h in halls for s in slots}
+    rows = await db.hall_occupancy.find(
+        {"date": {"$gte": start.strftime("%Y-%m-%d"), "$lte": end.strftime("%Y-%m-%d")}, **tenant_filter},
+        {"_id": 0, "date": 1, "slots": 1}
+    ).to_list(None)
+    for row in rows:
+        bit = 1 << (datetime.strptime(row['date'], "%Y-%m-%d") - start).days
+        for hall_id, hall_slots in row.get('slots', {}).items():
+            for s in slots:
+                if (hall_id, s) in booked and hall_slots.get(s, 0) > 0:
+                    booked[(hall_id, s)] |= bit
+    
+    window = (1 << days) - 1
+    free = {key: window & ~mask for key, mask in booked.items()}
+    any_free = 0
+    for mask in free.values():
+        any_free |= mask
+    
+    results = []
+    while any_free and len(results) < limit:
+        lowest = any_free & -any_free
+        day = lowest.bit_length() - 1
+        date = (start + timedelta(days=day)).strftime("%Y-%m-%d")
+        for s in slots:
+            for hall in halls:
+                if free[(hall['id'], s)] & lowest and len(results) < limit:
+                    results.append({
+                        "date": date, "slot": s, "hall_id": hall['id'],
+                        "hall_name": hall['name'], "capacity": hall['capacity']
+                    })
+        any_free ^= lowest
+    
+    return {"from": from_date, "to": end.strftime("%Y-%m-%d"), "results": results}
 
 # ==================== DASHBOARD / ANALYTICS ====================
+# Dashboard tiles per tenant; dropped by booking, payment and enquiry writes
+DASHBOARD_CACHE = ResponseCache(ttl_seconds=60, max_entries=1024)
+
+async def invalidate_dashboard_cache(booking: dict, previous: Optional[dict] = None):
+    DASHBOARD_CACHE.invalidate(booking.get('tenant_id'))
+
+BOOKING_SYNC_LISTENERS.append(invalidate_dashboard_cache)
+
+def build_dashboard_stats_pipeline(tenant_filter: dict, month_start: str, today: str) -> list:
+    """Every dashboard tile from one pass over the tenant's bookings plus its open enquiries"""
+    booking = {"_enquiry": {"$exists": False}}
+    active = {**booking, "status": {"$ne": "cancelled"}}
+    return [
+        {"$match": tenant_filter},
+        {"$unionWith": {"coll": "enquiries", "pipeline": [
+            {"$match": {"is_contacted": False, **tenant_filter}},
+            {"$project": {"_id": 0, "_enquiry": {"$literal": True}}}
+        ]}},
+        {"$facet": {
+            "total_bookings": [{"$match": {**booking, "created_at": {"$gte": month_start}}}, {"$count": "n"}],
+            "upcoming_events": [
+                {"$match": {**booking, "event_date": {"$gte": today}, "status": {"$in": ["enquiry", "confirmed"]}}},
+                {"$count": "n"}
+            ],
+            "monthly_revenue": [
+                {"$match": {**active, "created_at": {"$gte": month_start}}},
+                {"$group": {"_id": None, "n": {"$sum": "$advance_paid"}}}
+            ],
+            "pending_payments": [{"$match": {**active, "payment_status": {"$in": ["pending", "partial"]}}}, {"$count": "n"}],
+            "new_enquiries": [{"$match": {"_enquiry": True}}, {"$count": "n"}],
+            "recent_bookings": [
+                {"$match": active},
+                {"$sort": {"created_at": -1}},
+                {"$limit": 5},
+                {"$lookup": {"from": "customers", "localField": "customer_id", "foreignField": "id",
+                             "pipeline": [{"$project": {"_id": 0, "name": 1}}], "as": "customer"}},
+                {"$lookup": {"from": "halls", "localField": "hall_id", "foreignField": "id",
+                             "pipeline": [{"$project": {"_id": 0, "name": 1}}], "as": "hall"}},
+                {"$addFields": {
+                    "customer_name": {"$ifNull": [{"$arrayElemAt": ["$customer.name", 0]}, "Unknown"]},
+                    "hall_name": {"$ifNull": [{"$arrayElemAt": ["$hall.name", 0]}, "Unknown"]}
+                }},
+                {"$project": {"_id": 0, "customer": 0, "hall": 0}}
+            ]
+        }}
+    ]
+
 @api_router.get("/dashboard/stats")
 async def get_dashboard_stats(current_user: dict = Depends(get_current_user)):
     tenant_filter = await get_tenant_filter(current_user)
+    cache_key = (tenant_filter['tenant_id'],) if tenant_filter else None
+    cached = DASHBOARD_CACHE.get(cache_key) if cache_key else None
+    if cached is not None:
+        return cached
+    
     now = datetime.now(timezone.utc)
     current_month_start = now.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-    
-    # Total bookings this month
-    total_bookings = await db.bookings.count_documents({
-        "created_at": {"$gte": current_month_start.isoformat()},
-        **tenant_filter
-    })
-    
-    # Upcoming events
     today = now.strftime("%Y-%m-%d")
-    upcoming_events = await db.bookings.count_documents({
-        "event_date": {"$gte": today},
-        "status": {"$in": ["enquiry", "confirmed"]},
-        **tenant_filter
-    })
-    
-    # Monthly revenue
-    bookings = await db.bookings.find({
-        "created_at": {"$gte": current_month_start.isoformat()},
-        "status": {"$ne": "cancelled"},
-        **tenant_filter
-    }, {"_id": 0, "total_amount": 1, "advance_paid": 1}).to_list(1000)
-    
-    monthly_revenue = sum(b.get('advance_paid', 0) for b in bookings)
-    
-    # Pending payments
-    pending_payments = await db.bookings.count_documents({
-        "payment_status": {"$in": ["pending", "partial"]},
-        "status": {"$ne": "cancelled"},
-        **tenant_filter
-    })
-    
-    # Recent bookings
-    recent_bookings = await db.bookings.find(
-        {"status": {"$ne": "cancelled"}, **tenant_filter},
-        {"_id": 0}
-    ).sort("created_at", -1).limit(5).to_list(5)
-    
-    # Enrich with customer/hall info
-    for booking in recent_bookings:
-        customer = await db.customers.find_one({"id": booking['customer_id']}, {"_id": 0})
-        hall = await db.halls.find_one({"id": booking['hall_id']}, {"_id": 0})
-        booking['customer_name'] = customer['name'] if customer else 'Unknown'
-        booking['hall_name'] = hall['name'] if hall else 'Unknown'
     
-    # New enquiries count
-    new_enquiries = await db.enquiries.count_documents({"is_contacted": False, **tenant_filter})
-    
-    return {
-        "total_bookings": total_bookings,
-        "upcoming_events": upcoming_events,
-        "monthly_revenue": monthly_revenue,
-        "pending_payments": pending_payments,
-        "new_enquiries": new_enquiries,
-        "recent_bookings": recent_bookings
+    result = await db.bookings.aggregate(
+        build_dashboard_stats_pipeline(tenant_filter, current_month_start.isoformat(), today)
+    ).to_list(1)
+    tiles = result[0]
+    
+    def scalar(name):
+        return tiles[name][0]['n'] if tiles[name] else 0
+    
+    stats = {
+        "total_bookings": scalar("total_bookings"),
+        "upcoming_events": scalar("upcoming_events"),
+        "monthly_revenue": scalar("monthly_revenue"),
+        "pending_payments": scalar("pending_payments"),
+        "new_enquiries": scalar("new_enquiries"),
+        "recent_bookings": tiles["recent_bookings"]
     }
+    if cache_key:
+        DASHBOARD_CACHE.set(cache_key, stats)
+    return stats
+
+def recent_month_periods(months: int, now: datetime) -> list:
+    """Calendar months ("YYYY-MM") ending with the current one, oldest first"""
+    periods = []
+    year, month = now.year, now.month
+    for _ in range(months):
+        periods.append(f"{year}-{month:02d}")
+        year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+    return list(reversed(periods))
+
+def build_revenue_by_month_pipeline(tenant_filter: dict, start_date: str) -> list:
+    """Money received per calendar month and payment mode: booking advances by booking date,
+    later payments by payment date"""
+    recorded_payments = {"$add": [
+        {"$ifNull": ["$payment_cash", 0]}, {"$ifNull": ["$payment_credit", 0]}, {"$ifNull": ["$payment_upi", 0]}
+    ]}
+    return [
+        {"$match": {"status": {"$ne": "cancelled"}, "is_deleted": {"$ne": True}, "created_at": {"$gte": start_date}, **tenant_filter}},
+        {"$project": {
+            "_id": 0,
+            "month": {"$substrBytes": ["$created_at", 0, 7]},
+            "entries": {"$cond": [
+                {"$gt": [{"$size": {"$ifNull": ["$payment_splits", []]}}, 0]},
+                {"$map": {"input": "$payment_splits", "as": "split", "in": {
+                    "mode": {"$ifNull": ["$$split.method", PaymentMode.CASH.value]},
+                    "amount": {"$ifNull": ["$$split.amount", 0]}
+                }}},
+                # Without splits, the advance is what remains of advance_paid after recorded payments
+                [{"mode": {"$ifNull": ["$payment_method", PaymentMode.CASH.value]},
+                  "amount": {"$subtract": [{"$ifNull": ["$advance_paid", 0]}, recorded_payments]}}]
+            ]}
+        }},
+        {"$unwind": "$entries"},
+        {"$project": {"month": 1, "mode": "$entries.mode", "amount": "$entries.amount"}},
+        {"$unionWith": {"coll": "payments", "pipeline": [
+            {"$match": {"payment_date": {"$gte": start_date}, **tenant_filter}},
+            # Payments against cancelled or deleted bookings are not revenue
+            {"$lookup": {
+                "from": "bookings",
+                "localField": "booking_id",
+                "foreignField": "id",
+                "pipeline": [{"$project": {"_id": 0, "status": 1, "is_deleted": 1}}],
+                "as": "booking"
+            }},
+            {"$match": {"booking.status": {"$ne": "cancelled"}, "booking.is_deleted": {"$ne": True}}},
+            {"$project": {"_id": 0, "month": {"$substrBytes": ["$payment_date", 0, 7]}, "mode": "$payment_mode", "amount": 1}}
+        ]}},
+        {"$group": {"_id": {"month": "$month", "mode": "$mode"}, "amount": {"$sum": "$amount"}}},
+        {"$group": {
+            "_id": "$_id.month",
+            "revenue": {"$sum": "$amount"},
+            "by_mode": {"$push": {"k": {"$ifNull": ["$_id.mode", "unspecified"]}, "v": "$amount"}}
+        }},
+        {"$project": {"revenue": 1, "by_mode": {"$arrayToObject": "$by_mode"}}}
+    ]
+
+def build_rollup_revenue_by_month_pipeline(tenant_filter: dict, start_date: str) -> list:
+    """Same shape as build_revenue_by_month_pipeline, summed from the daily rollups"""
+    return [
+        {"$match": {"date": {"$gte": start_date}, "collected_by_mode": {"$exists": True}, **tenant_filter}},
+        {"$project": {"_id": 0, "month": {"$substrBytes": ["$date", 0, 7]}, "modes": {"$objectToArray": "$collected_by_mode"}}},
+        {"$unwind": "$modes"},
+        {"$group": {"_id": {"month": "$month", "mode": "$modes.k"}, "amount": {"$sum": "$modes.v"}}},
+        {"$group": {"_id": "$_id.month", "revenue": {"$sum": "$amount"}, "by_mode": {"$push": {"k": "$_id.mode", "v": "$amount"}}}},
+        {"$project": {"revenue": 1, "by_mode": {"$arrayToObject": "$by_mode"}}}
+    ]
 
 @api_router.get("/dashboard/revenue-chart")
-async def get_revenue_chart(current_user: dict = Depends(get_current_user)):
+async def get_revenue_chart(months: int = 6, current_user: dict = Depends(get_current_user)):
+    """Revenue received per calendar month for the last `months` months, with a payment mode breakdown"""
     tenant_filter = await get_tenant_filter(current_user)
-    now = datetime.now(timezone.utc)
-    months_data = []
+    months = max(1, min(months, 36))
+    periods = recent_month_periods(months, datetime.now(timezone.utc))
     
-    for i in range(6):
-        month_date = now - timedelta(days=30 * i)
-        month_start = month_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
-        if month_date.month == 12:
-            month_end = month_date.replace(year=month_date.year + 1, month=1, day=1)
-        else:
-            month_end = month_date.replace(month=month_date.month + 1, day=1)
-        
-        bookings = await db.bookings.find({
-            "created_at": {"$gte": month_start.isoformat(), "$lt": month_end.isoformat()},
-            "status": {"$ne": "cancelled"},
-            **tenant_filter
-        }, {"_id": 0, "advance_paid": 1}).to_list(1000)
-        
-        revenue = sum(b.get('advance_paid', 0) for b in bookings)
-        months_data.append({
-            "month": month_start.strftime("%b"),
-            "revenue": revenue
-        })
+    start_date = f"{periods[0]}-01"
     
-    return list(reversed(months_data))
-
+    # Served from the daily rollups once a full rebuild has completed, so cost does not grow with history
+    if await rollups_complete():
+        rows = await db.daily_rollups.aggregate(build_rollup_revenue_by_month_pipeline(tenant_filter, start_date)).to_list(None)
+    else:
+        rows = await db.bookings.aggregate(build_revenue_by_month_pipeline(tenant_filter, start_date)).to_list(None)
+    by_month = {r['_id']: r for r in rows}
+    
+    return [
+        {
+            "month": datetime.strptime(period, "%Y-%m").strftime("%b"),
+            "period": period,
+            "revenue": by_month.get(period, {}).get('revenue', 0),
+            "by_mode": by_month.get(period, {}).get('by_mode', {})
+        }
+        for period in periods
+    ]
+
 @api_router.get("/dashboard/event-distribution")
 async def get_event_distribution(current_user: dict = Depends(get_current_user)):
     tenant_filter = await get_tenant_filter(current_user)
@@ -3400,9 +4678,109 @@ async def update_vendor_payment(assignment_id: str, amount: float, current_user:
 
 # ==================== ELITE VENDOR LEDGER SYSTEM ====================
 
+LEDGER_PAGE_SIZE = 50
+LEDGER_CHECKPOINT_INTERVAL = 500
+LEDGER_SORT = [("transaction_date", 1), ("created_at", 1), ("id", 1)]
+
+# Debits increase what we owe the vendor; credits and payments reduce it
+LEDGER_SIGNED_AMOUNT = {"$cond": [
+    {"$eq": ["$transaction_type", "debit"]}, "$amount", {"$multiply": ["$amount", -1]}
+]}
+
+def ledger_key(txn: dict) -> dict:
+    """Position of a transaction in ledger order"""
+    return {"transaction_date": txn.get('transaction_date', ''), "created_at": txn.get('created_at', ''), "id": txn['id']}
+
+def ledger_after_key(key: dict, prefix: str = "", inclusive: bool = False) -> dict:
+    """Filter matching ledger positions after (or at, when inclusive) the given key"""
+    last_op = "$gte" if inclusive else "$gt"
+    return {"$or": [
+        {f"{prefix}transaction_date": {"$gt": key['transaction_date']}},
+        {f"{prefix}transaction_date": key['transaction_date'], f"{prefix}created_at": {"$gt": key['created_at']}},
+        {f"{prefix}transaction_date": key['transaction_date'], f"{prefix}created_at": key['created_at'], f"{prefix}id": {last_op: key['id']}}
+    ]}
+
+async def get_ledger_checkpoint(vendor_id: str, tenant_filter: dict, max_position: Optional[int] = None) -> dict:
+    """Nearest stored opening balance at or before a ledger position (or the ledger start)"""
+    query = {"vendor_id": vendor_id, **tenant_filter}
+    if max_position is not None:
+        query["position"] = {"$lte": max_position}
+    checkpoint = await db.vendor_ledger_checkpoints.find_one(query, {"_id": 0}, sort=[("position", -1)])
+    return checkpoint or {
+        "position": 0, "last_key": None, "balance": 0,
+        "total_debits": 0, "total_credits": 0, "total_payments": 0
+    }
+
+async def build_ledger_checkpoints(vendor_id: str, tenant_filter: dict, start: dict, up_to_position: int):
+    """Stream the ledger from a checkpoint and store a checkpoint every LEDGER_CHECKPOINT_INTERVAL rows"""
+    query = {"vendor_id": vendor_id, **tenant_filter}
+    if start['last_key']:
+        query.update(ledger_after_key(start['last_key']))
+    
+    running = {k: start[k] for k in ("balance", "total_debits", "total_credits", "total_payments")}
+    position = start['position']
+    totals_field = {"debit": "total_debits", "credit": "total_credits", "payment": "total_payments"}
+    cursor = db.vendor_transactions.find(
+        query, {"_id": 0, "id": 1, "transaction_type": 1, "amount": 1, "transaction_date": 1, "created_at": 1}
+    ).sort(LEDGER_SORT).limit(up_to_position - position)
+    
+    async for txn in cursor:
+        position += 1
+        amount = txn.get('amount', 0)
+        running[totals_field.get(txn.get('transaction_type'), "total_payments")] += amount
+        running["balance"] += amount if txn.get('transaction_type') == 'debit' else -amount
+        if position % LEDGER_CHECKPOINT_INTERVAL == 0:
+            await db.vendor_ledger_checkpoints.update_one(
+                {"vendor_id": vendor_id, "position": position, **tenant_filter},
+                {"$set": {**running, "last_key": ledger_key(txn), "tenant_id": tenant_filter.get('tenant_id')}},
+                upsert=True
+            )
+
+async def invalidate_ledger_checkpoints(txn: dict):
+    """Drop checkpoints that a new (possibly backdated) transaction falls before"""
+    await db.vendor_ledger_checkpoints.delete_many({
+        "vendor_id": txn['vendor_id'],
+        **ledger_after_key(ledger_key(txn), prefix="last_key.", inclusive=True)
+    })
+
+async def get_ledger_summary(vendor_id: str, tenant_filter: dict) -> dict:
+    """Ledger totals from the latest checkpoint plus the rows after it"""
+    checkpoint = await get_ledger_checkpoint(vendor_id, tenant_filter)
+    query = {"vendor_id": vendor_id, **tenant_filter}
+    if checkpoint['last_key']:
+        query.update(ledger_after_key(checkpoint['last_key']))
+    
+    tail = await db.vendor_transactions.aggregate([
+        {"$match": query},
+        {"$group": {
+            "_id": None,
+            "count": {"$sum": 1},
+            "total_debits": {"$sum": {"$cond": [{"$eq": ["$transaction_type", "debit"]}, "$amount", 0]}},
+            "total_credits": {"$sum": {"$cond": [{"$eq": ["$transaction_type", "credit"]}, "$amount", 0]}},
+            "total_payments": {"$sum": {"$cond": [{"$eq": ["$transaction_type", "payment"]}, "$amount", 0]}}
+        }}
+    ]).to_list(1)
+    tail = tail[0] if tail else {"count": 0, "total_debits": 0, "total_credits": 0, "total_payments": 0}
+    
+    total_debits = checkpoint['total_debits'] + tail['total_debits']
+    total_credits = checkpoint['total_credits'] + tail['total_credits']
+    total_payments = checkpoint['total_payments'] + tail['total_payments']
+    return {
+        "count": checkpoint['position'] + tail['count'],
+        "total_debits": total_debits,
+        "total_credits": total_credits,
+        "total_payments": total_payments,
+        "balance": total_debits - total_credits - total_payments
+    }
+
 @api_router.get("/vendors/{vendor_id}/ledger")
-async def get_vendor_ledger(vendor_id: str, current_user: dict = Depends(get_current_user)):
-    """Get complete transaction ledger for a vendor"""
+async def get_vendor_ledger(
+    vendor_id: str,
+    page: int = 1,
+    page_size: int = LEDGER_PAGE_SIZE,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get a page of the vendor's transaction ledger (newest first) with running balances"""
     # Enforce feature flag
     await check_feature_access(current_user, 'vendor_ledger')
     await check_permission(current_user, 'view_vendor_ledger')
@@ -3414,36 +4792,70 @@ async def get_vendor_ledger(vendor_id: str, current_user: dict = Depends(get_cur
     if not vendor:
         raise HTTPException(status_code=404, detail="Vendor not found")
     
-    # Get all transactions for this vendor
-    transactions = await db.vendor_transactions.find(
-        {"vendor_id": vendor_id, **tenant_filter}, 
-        {"_id": 0}
-    ).sort("transaction_date", -1).to_list(1000)
-    
-    # Calculate running balance
-    total_debits = sum(t['amount'] for t in transactions if t.get('transaction_type') == 'debit')
-    total_credits = sum(t['amount'] for t in transactions if t.get('transaction_type') == 'credit')
-    total_payments = sum(t['amount'] for t in transactions if t.get('transaction_type') == 'payment')
-    
-    # Balance: positive means you owe them (payable), negative means they owe you (receivable)
-    balance = total_debits - total_credits - total_payments
-    
-    # Enrich transactions with booking info
-    for txn in transactions:
-        if txn.get('booking_id'):
-            booking = await db.bookings.find_one({"id": txn['booking_id']}, {"_id": 0, "booking_number": 1, "event_date": 1})
-            txn['booking_number'] = booking.get('booking_number') if booking else None
-            txn['event_date'] = booking.get('event_date') if booking else None
-    
+    page = max(1, page)
+    page_size = max(1, min(page_size, 500))
+    summary = await get_ledger_summary(vendor_id, tenant_filter)
+    total = summary['count']
+    
+    # Page N (newest first) covers ledger positions [lo, hi) in chronological order
+    hi = max(0, total - (page - 1) * page_size)
+    lo = max(0, hi - page_size)
+    
+    transactions = []
+    if hi > lo:
+        checkpoint = await get_ledger_checkpoint(vendor_id, tenant_filter, max_position=lo)
+        if lo - checkpoint['position'] > LEDGER_CHECKPOINT_INTERVAL:
+            await build_ledger_checkpoints(vendor_id, tenant_filter, checkpoint, lo)
+            checkpoint = await get_ledger_checkpoint(vendor_id, tenant_filter, max_position=lo)
+        
+        match = {"vendor_id": vendor_id, **tenant_filter}
+        if checkpoint['last_key']:
+            match.update(ledger_after_key(checkpoint['last_key']))
+        
+        rows = await db.vendor_transactions.aggregate([
+            {"$match": match},
+            {"$sort": dict(LEDGER_SORT)},
+            {"$limit": hi - checkpoint['position']},
+            {"$setWindowFields": {
+                "sortBy": dict(LEDGER_SORT),
+                "output": {"running_delta": {
+                    "$sum": LEDGER_SIGNED_AMOUNT,
+                    "window": {"documents": ["unbounded", "current"]}
+                }}
+            }},
+            {"$skip": lo - checkpoint['position']},
+            {"$lookup": {
+                "from": "bookings",
+                "localField": "booking_id",
+                "foreignField": "id",
+                "pipeline": [{"$project": {"_id": 0, "booking_number": 1, "event_date": 1}}],
+                "as": "booking"
+            }},
+            {"$addFields": {
+                "running_balance": {"$add": [checkpoint['balance'], "$running_delta"]},
+                "booking_number": {"$arrayElemAt": ["$booking.booking_number", 0]},
+                "event_date": {"$arrayElemAt": ["$booking.event_date", 0]}
+            }},
+            {"$project": {"_id": 0, "booking": 0, "running_delta": 0}}
+        ]).to_list(None)
+        transactions = list(reversed(rows))
+    
+    balance = summary['balance']
     return {
         "vendor": vendor,
         "transactions": transactions,
         "summary": {
-            "total_debits": total_debits,
-            "total_credits": total_credits,
-            "total_payments": total_payments,
+            "total_debits": summary['total_debits'],
+            "total_credits": summary['total_credits'],
+            "total_payments": summary['total_payments'],
             "balance": balance,
             "balance_type": "payable" if balance > 0 else "receivable" if balance < 0 else "settled"
+        },
+        "pagination": {
+            "page": page,
+            "page_size": page_size,
+            "total": total,
+            "total_pages": (total + page_size - 1) // page_size
         }
     }
 
@@ -3478,35 +4890,498 @@ async def create_vendor_transaction(vendor_id: str, data: VendorTransactionCreat
     
     txn_doc = txn.model_dump()
     txn_doc['created_at'] = txn_doc['created_at'].isoformat()
-    await db.vendor_transactions.insert_one(txn_doc)
-    
-    # Update vendor balance summary
-    await recalculate_vendor_balance(vendor_id, tenant_filter)
+    await record_vendor_transaction(txn_doc)
     
     return serialize_doc(txn_doc)
 
-async def recalculate_vendor_balance(vendor_id: str, tenant_filter: dict):
-    """Recalculate and update vendor's balance summary"""
-    transactions = await db.vendor_transactions.find(
-        {"vendor_id": vendor_id, **tenant_filter}, 
-        {"_id": 0}
-    ).to_list(1000)
+# How each transaction type moves the stored vendor balance fields
+VENDOR_BALANCE_DELTAS = {
+    "debit": {"total_payable": 1, "outstanding_balance": 1},
+    "credit": {"outstanding_balance": -1},
+    "payment": {"total_paid": 1, "outstanding_balance": -1},
+}
+VENDOR_BALANCE_TOLERANCE = 0.005
+
+async def record_vendor_transaction(txn_doc: dict):
+    """Insert a ledger entry and apply it to the vendor's stored balances with $inc"""
+    await db.vendor_transactions.insert_one(txn_doc)
+    await invalidate_ledger_checkpoints(txn_doc)
+    await invalidate_vendor_aging(txn_doc['vendor_id'])
     
-    total_debits = sum(t['amount'] for t in transactions if t.get('transaction_type') == 'debit')
-    total_credits = sum(t['amount'] for t in transactions if t.get('transaction_type') == 'credit')
-    total_payments = sum(t['amount'] for t in transactions if t.get('transaction_type') == 'payment')
+    deltas = VENDOR_BALANCE_DELTAS.get(txn_doc.get('transaction_type'), {})
+    if deltas:
+        await db.vendors.update_one(
+            {"id": txn_doc['vendor_id']},
+            {"$inc": {field: sign * txn_doc['amount'] for field, sign in deltas.items()}}
+        )
+        await mark_vendor_stats_stale(
+            txn_doc['vendor_id'], txn_doc.get('tenant_id'),
+            deltas['outstanding_balance'] * txn_doc['amount']
+        )
+
+VENDOR_BALANCE_FIELDS = ("total_payable", "total_paid", "outstanding_balance")
+
+async def expected_vendor_balances(tenant_filter: dict, vendor_ids: List[str]) -> dict:
+    """Balance fields per vendor id from every source that moves them: the ledger and the
+    legacy vendor_payments collection, which create_vendor_payment still writes"""
+    expected = defaultdict(lambda: dict.fromkeys(VENDOR_BALANCE_FIELDS, 0))
+    async for row in db.vendor_transactions.aggregate([
+        {"$match": tenant_filter},
+        {"$group": {
+            "_id": "$vendor_id",
+            "total_payable": {"$sum": {"$cond": [{"$eq": ["$transaction_type", "debit"]}, "$amount", 0]}},
+            "total_paid": {"$sum": {"$cond": [{"$eq": ["$transaction_type", "payment"]}, "$amount", 0]}},
+            "outstanding_balance": {"$sum": LEDGER_SIGNED_AMOUNT}
+        }}
+    ]):
+        expected[row.pop('_id')].update(row)
+    # vendor_payments carry no tenant_id; scope them through the tenant's vendor ids
+    async for row in db.vendor_payments.aggregate([
+        {"$match": {"vendor_id": {"$in": vendor_ids}}},
+        {"$group": {"_id": "$vendor_id", "total": {"$sum": "$amount"}}}
+    ]):
+        totals = expected[row['_id']]
+        totals['total_paid'] += row['total']
+        totals['outstanding_balance'] -= row['total']
+    return expected
+
+async def verify_vendor_balances(tenant_filter: dict, repair: bool = True) -> dict:
+    """Compare every vendor's stored balances with its recorded totals, repair drift and store a report"""
+    vendors = await db.vendors.find(
+        tenant_filter,
+        {"_id": 0, "id": 1, "name": 1, **{field: 1 for field in VENDOR_BALANCE_FIELDS}}
+    ).to_list(None)
+    expected = await expected_vendor_balances(tenant_filter, [v['id'] for v in vendors])
+    
+    drifted = []
+    operations = []
+    for vendor in vendors:
+        # Vendors with nothing recorded should hold zero balances
+        ledger = expected[vendor['id']]
+        fixes = {}
+        for field in VENDOR_BALANCE_FIELDS:
+            stored = vendor.get(field) or 0
+            if abs(stored - ledger[field]) > VENDOR_BALANCE_TOLERANCE:
+                drifted.append({
+                    "vendor_id": vendor['id'], "vendor_name": vendor.get('name'), "field": field,
+                    "stored": stored, "expected": ledger[field], "difference": round(stored - ledger[field], 2)
+                })
+                fixes[field] = ledger[field]
+        if fixes:
+            operations.append(UpdateOne({"id": vendor['id']}, {"$set": fixes}))
+    
+    if repair and operations:
+        await db.vendors.bulk_write(operations, ordered=False)
+    
+    report = {
+        "id": str(uuid.uuid4()),
+        "tenant_id": tenant_filter.get('tenant_id'),
+        "run_at": datetime.now(timezone.utc).isoformat(),
+        "vendors_checked": len(vendors),
+        "vendors_drifted": len(operations),
+        "drifted": drifted,
+        "repaired": repair and bool(operations)
+    }
+    await db.vendor_balance_audits.insert_one(report)
+    report.pop('_id', None)
+    if drifted:
+        logger.warning(f"Vendor balance drift on {len(operations)} vendors (tenant {report['tenant_id']})")
+    return report
+
+async def backfill_vendor_opening_payables():
+    """Carry payables added before add-payable wrote to the ledger into it as opening debits,
+    so verifying every vendor does not repair them away"""
+    vendors = await db.vendors.find(
+        {"payables_in_ledger": {"$ne": True}},
+        {"_id": 0, "id": 1, "tenant_id": 1, "total_payable": 1, "created_at": 1}
+    ).to_list(None)
+    if not vendors:
+        return
+    debits = {
+        row['_id']: row['total'] async for row in db.vendor_transactions.aggregate([
+            {"$match": {"vendor_id": {"$in": [v['id'] for v in vendors]}, "transaction_type": "debit"}},
+            {"$group": {"_id": "$vendor_id", "total": {"$sum": "$amount"}}}
+        ])
+    }
+    for vendor in vendors:
+        carried = (vendor.get('total_payable') or 0) - debits.get(vendor['id'], 0)
+        if carried > VENDOR_BALANCE_TOLERANCE:
+            txn = VendorTransaction(
+                tenant_id=vendor.get('tenant_id'),
+                vendor_id=vendor['id'],
+                transaction_type=TransactionType.DEBIT,
+                amount=round(carried, 2),
+                transaction_date=str(vendor.get('created_at') or '')[:10] or datetime.now(timezone.utc).strftime('%Y-%m-%d'),
+                note="Opening payable carried over from vendor balance"
+            )
+            txn_doc = txn.model_dump()
+            txn_doc['created_at'] = txn_doc['created_at'].isoformat()
+            # Already counted in the stored balances, so insert without record_vendor_transaction's $inc
+            await db.vendor_transactions.insert_one(txn_doc)
+            await invalidate_ledger_checkpoints(txn_doc)
+            await invalidate_vendor_aging(vendor['id'])
+    await db.vendors.update_many({"id": {"$in": [v['id'] for v in vendors]}}, {"$set": {"payables_in_ledger": True}})
+
+async def verify_all_vendor_balances():
+    """Periodic job: verify and repair vendor balances for every active tenant"""
+    tenants = await db.tenants.find({"status": "active"}, {"_id": 0, "id": 1}).to_list(None)
+    for tenant in tenants:
+        await verify_vendor_balances({"tenant_id": tenant['id']})
+
+@api_router.post("/vendors/balances/verify")
+async def verify_vendor_balances_now(repair: bool = True, current_user: dict = Depends(get_current_user)):
+    """Check stored vendor balances against the ledger now, optionally repairing drift"""
+    require_admin(current_user)
+    tenant_filter = await get_tenant_filter(current_user)
+    return await verify_vendor_balances(tenant_filter, repair=repair)
+
+@api_router.get("/vendors/balances/audits")
+async def get_vendor_balance_audits(limit: int = 10, current_user: dict = Depends(get_current_user)):
+    """Recent vendor balance verification reports, newest first"""
+    require_admin(current_user)
+    tenant_filter = await get_tenant_filter(current_user)
+    return await db.vendor_balance_audits.find(tenant_filter, {"_id": 0}).sort("run_at", -1).to_list(min(limit, 100))
+
+# ==================== VENDOR AGING ====================
+# (bucket, min age in days, max age in days or None)
+VENDOR_AGING_BUCKETS = [("0_30", 0, 30), ("31_60", 31, 60), ("61_90", 61, 90), ("90_plus", 91, None)]
+
+def match_vendor_ledger_fifo(transactions) -> dict:
+    """Settle payments and credits against debits oldest-first; what is left open is aged"""
+    open_lots = deque()
+    unapplied = 0.0
+    for txn in transactions:
+        amount = txn['amount']
+        if txn['transaction_type'] == 'debit':
+            applied = min(unapplied, amount)
+            unapplied -= applied
+            if amount - applied > VENDOR_BALANCE_TOLERANCE:
+                open_lots.append([txn.get('transaction_date') or txn['created_at'][:10], amount - applied])
+        else:
+            unapplied += amount
+            while open_lots and unapplied > VENDOR_BALANCE_TOLERANCE:
+                applied = min(unapplied, open_lots[0][1])
+                open_lots[0][1] -= applied
+                unapplied -= applied
+                if open_lots[0][1] <= VENDOR_BALANCE_TOLERANCE:
+                    open_lots.popleft()
+    return {
+        "open_lots": [{"date": d, "amount": round(a, 2)} for d, a in open_lots],
+        "unapplied_credit": round(unapplied, 2)
+    }
+
+async def stream_vendor_aging(vendor_ids: list, tenant_filter: dict, as_of: Optional[str] = None):
+    """Yield (vendor_id, open lots) from one streaming pass over the vendors' ledgers;
+    with as_of, only transactions dated on or before it are matched"""
+    query = {"vendor_id": {"$in": vendor_ids}, **tenant_filter}
+    if as_of:
+        query["transaction_date"] = {"$lte": as_of}
+    cursor = db.vendor_transactions.find(
+        query,
+        {"_id": 0, "vendor_id": 1, "transaction_type": 1, "amount": 1, "transaction_date": 1, "created_at": 1}
+    ).sort([("vendor_id", 1)] + LEDGER_SORT).batch_size(5000)
+    
+    seen = set()
+    current_vendor, transactions = None, []
+    async for txn in cursor:
+        if txn['vendor_id'] != current_vendor:
+            if current_vendor is not None:
+                seen.add(current_vendor)
+                yield current_vendor, match_vendor_ledger_fifo(transactions)
+            current_vendor, transactions = txn['vendor_id'], []
+        transactions.append(txn)
+    if current_vendor is not None:
+        seen.add(current_vendor)
+        yield current_vendor, match_vendor_ledger_fifo(transactions)
+    
+    for vendor_id in vendor_ids:
+        if vendor_id not in seen:
+            yield vendor_id, match_vendor_ledger_fifo([])
+
+async def materialize_vendor_aging(vendor_ids: list, tenant_filter: dict):
+    """Rebuild and cache open debit lots for the given vendors"""
+    computed_at = datetime.now(timezone.utc).isoformat()
+    # Vendors without ledger entries are cached as settled so they are not rescanned
+    operations = [
+        UpdateOne(
+            {"vendor_id": vendor_id},
+            {"$set": {"vendor_id": vendor_id, "tenant_id": tenant_filter.get('tenant_id'),
+                      "computed_at": computed_at, **aging}},
+            upsert=True
+        )
+        async for vendor_id, aging in stream_vendor_aging(vendor_ids, tenant_filter)
+    ]
+    if operations:
+        await db.vendor_aging.bulk_write(operations, ordered=False)
+
+async def invalidate_vendor_aging(vendor_id: str):
+    """Drop a vendor's cached aging so the next report recomputes only that vendor"""
+    await db.vendor_aging.delete_one({"vendor_id": vendor_id})
+
+@api_router.get("/vendors/aging")
+async def get_vendor_aging_report(as_of: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+    """Outstanding vendor payables bucketed by age (0-30 / 31-60 / 61-90 / 90+ days)"""
+    await check_feature_access(current_user, 'vendor_ledger')
+    await check_permission(current_user, 'view_vendor_ledger')
     
-    balance = total_debits - total_credits - total_payments
+    tenant_filter = await get_tenant_filter(current_user)
+    today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    try:
+        as_of_date = datetime.strptime(as_of or today, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="as_of must be YYYY-MM-DD")
+    as_of = as_of_date.strftime('%Y-%m-%d')
+    warning_days = await get_workflow_rule(current_user.get('tenant_id'), 'vendor_unpaid_warning_days')
+    if warning_days is None:
+        warning_days = 7
+    
+    vendors = await db.vendors.find(tenant_filter, {"_id": 0, "id": 1, "name": 1, "vendor_type": 1}).to_list(None)
+    vendor_ids = [v['id'] for v in vendors]
+    if as_of < today:
+        # The cache holds current open lots; a past date re-matches the ledger as it stood then
+        aging_by_vendor = {
+            vendor_id: aging async for vendor_id, aging in stream_vendor_aging(vendor_ids, tenant_filter, as_of)
+        }
+    else:
+        cached = await db.vendor_aging.find({"vendor_id": {"$in": vendor_ids}, **tenant_filter}, {"_id": 0}).to_list(None)
+        missing = list(set(vendor_ids) - {c['vendor_id'] for c in cached})
+        if missing:
+            await materialize_vendor_aging(missing, tenant_filter)
+            cached += await db.vendor_aging.find({"vendor_id": {"$in": missing}, **tenant_filter}, {"_id": 0}).to_list(None)
+        aging_by_vendor = {c['vendor_id']: c for c in cached}
+    
+    rows = []
+    totals = {bucket: 0 for bucket, _, _ in VENDOR_AGING_BUCKETS}
+    totals.update({"total_open": 0, "overdue_amount": 0, "unapplied_credit": 0})
+    for vendor in vendors:
+        aging = aging_by_vendor.get(vendor['id'])
+        if not aging or not (aging['open_lots'] or aging['unapplied_credit']):
+            continue
+        buckets = {bucket: 0 for bucket, _, _ in VENDOR_AGING_BUCKETS}
+        overdue = 0
+        for lot in aging['open_lots']:
+            try:
+                lot_date = datetime.strptime(str(lot['date'])[:10], "%Y-%m-%d")
+            except ValueError:
+                logger.warning(f"Skipping aging lot with invalid date {lot['date']!r} for vendor {vendor['id']}")
+                continue
+            age = max(0, (as_of_date - lot_date).days)
+            for bucket, low, high in VENDOR_AGING_BUCKETS:
+                if age >= low and (high is None or age <= high):
+                    buckets[bucket] += lot['amount']
+                    break
+            if age > warning_days:
+                overdue += lot['amount']
+        total_open = sum(buckets.values())
+        rows.append({
+            "vendor_id": vendor['id'],
+            "vendor_name": vendor.get('name'),
+            "vendor_type": vendor.get('vendor_type'),
+            "buckets": {k: round(v, 2) for k, v in buckets.items()},
+            "total_open": round(total_open, 2),
+            "oldest_open_date": aging['open_lots'][0]['date'] if aging['open_lots'] else None,
+            "overdue_amount": round(overdue, 2),
+            "warning": overdue > 0,
+            "unapplied_credit": aging['unapplied_credit']
+        })
+        for bucket in buckets:
+            totals[bucket] += buckets[bucket]
+        totals["total_open"] += total_open
+        totals["overdue_amount"] += overdue
+        totals["unapplied_credit"] += aging['unapplied_credit']
     
-    await db.vendors.update_one(
-        {"id": vendor_id},
-        {"$set": {
-            "total_payable": total_debits,
-            "total_paid": total_payments,
-            "outstanding_balance": balance
-        }}
+    rows.sort(key=lambda r: r['total_open'], reverse=True)
+    return {
+        "as_of": as_of,
+        "warning_days": warning_days,
+        "buckets": [bucket for bucket, _, _ in VENDOR_AGING_BUCKETS],
+        "vendors": rows,
+        "totals": {k: round(v, 2) for k, v in totals.items()},
+        "vendors_over_threshold": sum(1 for r in rows if r['warning'])
+    }
+
+# ==================== VENDOR SCHEDULE ====================
+def vendor_schedule_fields(booking: dict) -> dict:
+    """Booking fields copied onto its vendor assignments for the schedule index"""
+    return {
+        "event_date": booking.get('event_date'),
+        "slot": booking.get('slot', 'day'),
+        "hall_id": booking.get('hall_id'),
+        "booking_number": booking.get('booking_number'),
+        "booking_status": "cancelled" if booking.get('is_deleted') else booking.get('status')
+    }
+
+def vendor_schedule_key(assignment: dict) -> Optional[str]:
+    """Date and slot an assignment commits its vendor to, or None when it does not hold the slot"""
+    if (assignment.get('status') == "cancelled" or assignment.get('booking_status') == "cancelled"
+            or assignment.get('conflict_allowed') or not assignment.get('event_date')):
+        return None
+    return f"{assignment['event_date']}|{assignment.get('slot') or 'day'}"
+
+# Same rule as vendor_schedule_key, evaluated by the server against the updated document
+SCHEDULE_KEY_STAGE = {"$set": {"schedule_key": {"$cond": [
+    {"$and": [
+        {"$ne": ["$status", "cancelled"]},
+        {"$ne": ["$booking_status", "cancelled"]},
+        {"$ne": ["$conflict_allowed", True]},
+        {"$eq": [{"$type": "$event_date"}, "string"]}
+    ]},
+    {"$concat": ["$event_date", "|", {"$ifNull": ["$slot", "day"]}]},
+    None
+]}}}
+
+async def set_assignment_fields(query: dict, fields: dict):
+    """Update assignments and recompute their schedule key; raises DuplicateKeyError on a double booking"""
+    await db.booking_vendors.update_many(
+        query,
+        [{"$set": {k: {"$literal": v} for k, v in fields.items()}}, SCHEDULE_KEY_STAGE]
     )
 
+async def sync_vendor_schedule(booking: dict, previous: Optional[dict] = None):
+    """Keep assignments in step with their booking's date, slot and status"""
+    fields = vendor_schedule_fields(booking)
+    try:
+        await set_assignment_fields({"booking_id": booking['id']}, fields)
+    except DuplicateKeyError:
+        # update_booking re-checks vendors before a move, so only a racing assignment or a reactivated
+        # booking lands here; the booking write already happened, so keep the assignment and flag it
+        for assignment_id in await db.booking_vendors.distinct("id", {"booking_id": booking['id']}):
+            try:
+                await set_assignment_fields({"id": assignment_id}, fields)
+            except DuplicateKeyError:
+                logger.warning(f"Vendor double booked by booking {booking['id']}; flagging assignment {assignment_id}")
+                await set_assignment_fields({"id": assignment_id}, {**fields, "conflict_allowed": True})
+
+BOOKING_SYNC_LISTENERS.append(sync_vendor_schedule)
+
+async def backfill_vendor_schedule():
+    """Denormalize booking fields onto older assignments, key them, then enforce one booking per vendor slot"""
+    booking_ids = await db.booking_vendors.distinct("booking_id", {"event_date": {"$exists": False}})
+    if booking_ids:
+        bookings = await db.bookings.find(
+            {"id": {"$in": booking_ids}},
+            {"_id": 0, "id": 1, "event_date": 1, "slot": 1, "hall_id": 1, "booking_number": 1, "status": 1, "is_deleted": 1}
+        ).to_list(None)
+        operations = [UpdateMany({"booking_id": b['id']}, {"$set": vendor_schedule_fields(b)}) for b in bookings]
+        if operations:
+            await db.booking_vendors.bulk_write(operations, ordered=False)
+    
+    # Existing double bookings keep the earliest assignment on the key and flag the rest
+    held = {
+        (a.get('tenant_id'), a['vendor_id'], a['schedule_key'])
+        async for a in db.booking_vendors.find(
+            {"schedule_key": {"$type": "string"}}, {"_id": 0, "tenant_id": 1, "vendor_id": 1, "schedule_key": 1}
+        )
+    }
+    operations = []
+    async for assignment in db.booking_vendors.find({"schedule_key": {"$exists": False}}, {"_id": 0}).sort("created_at", 1):
+        key = vendor_schedule_key(assignment)
+        slot = (assignment.get('tenant_id'), assignment['vendor_id'], key)
+        fields = {"schedule_key": key}
+        if key is not None and slot in held:
+            fields = {"schedule_key": None, "conflict_allowed": True}
+        elif key is not None:
+            held.add(slot)
+        operations.append(UpdateOne({"id": assignment['id']}, {"$set": fields}))
+        if len(operations) >= 1000:
+            await db.booking_vendors.bulk_write(operations, ordered=False)
+            operations = []
+    if operations:
+        await db.booking_vendors.bulk_write(operations, ordered=False)
+    await db.booking_vendors.create_index(
+        [("tenant_id", 1), ("vendor_id", 1), ("schedule_key", 1)],
+        unique=True,
+        partialFilterExpression={"schedule_key": {"$type": "string"}},
+        name="vendor_schedule_unique"
+    )
+
+def active_vendor_schedule_query(tenant_id: Optional[str], vendor_id: str) -> dict:
+    """Assignments that actually commit the vendor, keyed on the schedule index prefix"""
+    return {
+        "tenant_id": tenant_id,
+        "vendor_id": vendor_id,
+        "status": {"$ne": "cancelled"},
+        "booking_status": {"$ne": "cancelled"}
+    }
+
+async def find_vendor_conflict(vendor_id: str, booking: dict) -> Optional[dict]:
+    """Another booking's assignment holding the vendor on the booking's date and slot"""
+    query = active_vendor_schedule_query(booking.get('tenant_id'), vendor_id)
+    query.update({
+        "event_date": booking.get('event_date'),
+        "slot": booking.get('slot', 'day'),
+        "booking_id": {"$ne": booking['id']}
+    })
+    return await db.booking_vendors.find_one(query, {"_id": 0, "booking_number": 1, "booking_id": 1})
+
+def vendor_conflict_error(vendor: dict, booking: dict, existing: Optional[dict] = None) -> HTTPException:
+    """409 for a vendor already committed on the booking's date and slot"""
+    detail = (f"Vendor conflict: {vendor.get('name', 'Vendor')} is already booked for "
+              f"{booking.get('event_date')} ({booking.get('slot', 'day')} slot)")
+    if existing:
+        detail += f" on booking {existing.get('booking_number') or existing['booking_id']}"
+    return HTTPException(status_code=409, detail=detail)
+
+async def check_vendor_conflict(vendor: dict, booking: dict):
+    """Check the vendor is not already committed to another booking in the same date and slot"""
+    existing = await find_vendor_conflict(vendor['id'], booking)
+    if existing:
+        raise vendor_conflict_error(vendor, booking, existing)
+
+async def check_booking_vendor_conflicts(booking: dict):
+    """Re-check every vendor on a booking against its (new) date and slot"""
+    vendor_ids = await db.booking_vendors.distinct("vendor_id", {
+        "booking_id": booking['id'], "status": {"$ne": "cancelled"}, "conflict_allowed": {"$ne": True}
+    })
+    if not vendor_ids:
+        return
+    vendors = await db.vendors.find({"id": {"$in": vendor_ids}}, {"_id": 0, "id": 1, "name": 1}).to_list(None)
+    for vendor in vendors:
+        await check_vendor_conflict(vendor, booking)
+
+@api_router.get("/vendors/{vendor_id}/schedule")
+async def get_vendor_schedule(
+    vendor_id: str,
+    start: Optional[str] = None,
+    end: Optional[str] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Vendor's committed events by date and slot, with double bookings flagged"""
+    tenant_filter = await get_tenant_filter(current_user)
+    vendor = await db.vendors.find_one({"id": vendor_id, **tenant_filter}, {"_id": 0, "id": 1, "name": 1, "vendor_type": 1, "tenant_id": 1})
+    if not vendor:
+        raise HTTPException(status_code=404, detail="Vendor not found")
+    
+    try:
+        start_date = datetime.strptime(start, "%Y-%m-%d") if start else datetime.now(timezone.utc)
+        if end:
+            datetime.strptime(end, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start and end must be YYYY-MM-DD")
+    start = start_date.strftime('%Y-%m-%d')
+    end = end or (start_date + timedelta(days=90)).strftime('%Y-%m-%d')
+    query = active_vendor_schedule_query(vendor.get('tenant_id'), vendor_id)
+    query["event_date"] = {"$gte": start, "$lte": end}
+    
+    entries = await db.booking_vendors.find(query, {
+        "_id": 0, "id": 1, "booking_id": 1, "booking_number": 1, "event_date": 1, "slot": 1,
+        "hall_id": 1, "category_snapshot": 1, "status": 1
+    }).sort([("event_date", 1), ("slot", 1)]).to_list(None)
+    
+    per_slot = {}
+    for entry in entries:
+        per_slot[(entry['event_date'], entry['slot'])] = per_slot.get((entry['event_date'], entry['slot']), 0) + 1
+    for entry in entries:
+        entry['conflict'] = per_slot[(entry['event_date'], entry['slot'])] > 1
+    
+    vendor.pop('tenant_id', None)
+    return {
+        "vendor": vendor,
+        "period": {"start": start, "end": end},
+        "entries": entries,
+        "conflicts": sum(1 for count in per_slot.values() if count > 1)
+    }
+
 # ==================== BOOKING VENDOR ASSIGNMENTS ====================
 
 @api_router.get("/bookings/{booking_id}/vendors")
@@ -3525,27 +5400,40 @@ async def get_booking_vendors(booking_id: str, current_user: dict = Depends(get_
         {"_id": 0}
     ).to_list(100)
     
-    # Enrich with vendor info
+    # Enrich with vendor info and payments for this booking, batched across all assignments
+    vendor_ids = list({a['vendor_id'] for a in assignments})
+    vendors = await db.vendors.find(
+        {"id": {"$in": vendor_ids}},
+        {"_id": 0, "id": 1, "name": 1, "vendor_type": 1, "phone": 1}
+    ).to_list(None)
+    vendors_by_id = {v['id']: v for v in vendors}
+    
+    paid = await db.vendor_transactions.aggregate([
+        {"$match": {"booking_id": booking_id, "vendor_id": {"$in": vendor_ids}, "transaction_type": "payment", **tenant_filter}},
+        {"$group": {"_id": "$vendor_id", "amount_paid": {"$sum": "$amount"}}}
+    ]).to_list(None)
+    paid_by_vendor = {p['_id']: p['amount_paid'] for p in paid}
+    
     for assignment in assignments:
-        vendor = await db.vendors.find_one({"id": assignment['vendor_id']}, {"_id": 0})
+        vendor = vendors_by_id.get(assignment['vendor_id'])
         if vendor:
             assignment['vendor_name'] = vendor.get('name')
             assignment['vendor_type'] = vendor.get('vendor_type')
             assignment['vendor_phone'] = vendor.get('phone')
         
-        # Get payments made for this assignment
-        payments = await db.vendor_transactions.find(
-            {"vendor_id": assignment['vendor_id'], "booking_id": booking_id, "transaction_type": "payment", **tenant_filter},
-            {"_id": 0}
-        ).to_list(100)
-        assignment['amount_paid'] = sum(p['amount'] for p in payments)
+        assignment['amount_paid'] = paid_by_vendor.get(assignment['vendor_id'], 0)
         assignment['balance_due'] = assignment['agreed_amount'] + assignment.get('tax', 0) - assignment['amount_paid']
     
     return assignments
 
 @api_router.post("/bookings/{booking_id}/vendors")
-async def assign_vendor_to_booking(booking_id: str, data: BookingVendorCreate, current_user: dict = Depends(get_current_user)):
-    """Assign a vendor to a booking"""
+async def assign_vendor_to_booking(
+    booking_id: str,
+    data: BookingVendorCreate,
+    allow_conflict: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    """Assign a vendor to a booking, rejecting same date and slot double bookings unless allowed"""
     tenant_filter = await get_tenant_filter(current_user)
     tenant_id = current_user.get('tenant_id')
     
@@ -3559,6 +5447,13 @@ async def assign_vendor_to_booking(booking_id: str, data: BookingVendorCreate, c
     if not vendor:
         raise HTTPException(status_code=404, detail="Vendor not found")
     
+    conflict_allowed = False
+    if data.status != "cancelled":
+        if allow_conflict:
+            conflict_allowed = await find_vendor_conflict(vendor['id'], booking) is not None
+        else:
+            await check_vendor_conflict(vendor, booking)
+    
     # Create assignment
     assignment = BookingVendor(
         tenant_id=tenant_id,
@@ -3570,12 +5465,20 @@ async def assign_vendor_to_booking(booking_id: str, data: BookingVendorCreate, c
         advance_expected=data.advance_expected,
         balance_due=data.agreed_amount + data.tax,
         status=data.status,
-        notes=data.notes
+        notes=data.notes,
+        conflict_allowed=conflict_allowed,
+        **vendor_schedule_fields(booking)
     )
     
     assignment_doc = assignment.model_dump()
     assignment_doc['created_at'] = assignment_doc['created_at'].isoformat()
-    await db.booking_vendors.insert_one(assignment_doc)
+    assignment_doc['schedule_key'] = vendor_schedule_key(assignment_doc)
+    try:
+        await db.booking_vendors.insert_one(assignment_doc)
+    except DuplicateKeyError:
+        # Lost a race with another assignment for the same slot after the check above
+        raise vendor_conflict_error(vendor, booking)
+    await mark_vendor_stats_stale(data.vendor_id, tenant_id)
     
     # Also create a debit transaction in the vendor ledger
     if data.agreed_amount > 0:
@@ -3591,10 +5494,7 @@ async def assign_vendor_to_booking(booking_id: str, data: BookingVendorCreate, c
         )
         txn_doc = debit_txn.model_dump()
         txn_doc['created_at'] = txn_doc['created_at'].isoformat()
-        await db.vendor_transactions.insert_one(txn_doc)
-        
-        # Recalculate vendor balance
-        await recalculate_vendor_balance(data.vendor_id, tenant_filter)
+        await record_vendor_transaction(txn_doc)
     
     # Update vendor event count
     await db.vendors.update_one(
@@ -3605,8 +5505,14 @@ async def assign_vendor_to_booking(booking_id: str, data: BookingVendorCreate, c
     return serialize_doc(assignment_doc)
 
 @api_router.put("/bookings/{booking_id}/vendors/{assignment_id}")
-async def update_booking_vendor(booking_id: str, assignment_id: str, data: BookingVendorCreate, current_user: dict = Depends(get_current_user)):
-    """Update a vendor assignment"""
+async def update_booking_vendor(
+    booking_id: str,
+    assignment_id: str,
+    data: BookingVendorCreate,
+    allow_conflict: bool = False,
+    current_user: dict = Depends(get_current_user)
+):
+    """Update a vendor assignment; reactivating a cancelled one re-checks for double bookings"""
     tenant_filter = await get_tenant_filter(current_user)
     
     assignment = await db.booking_vendors.find_one({"id": assignment_id, "booking_id": booking_id, **tenant_filter}, {"_id": 0})
@@ -3621,7 +5527,21 @@ async def update_booking_vendor(booking_id: str, assignment_id: str, data: Booki
         "notes": data.notes
     }
     
-    await db.booking_vendors.update_one({"id": assignment_id}, {"$set": update_data})
+    booking = vendor = None
+    if assignment.get('status') == "cancelled" and data.status != "cancelled":
+        booking = await db.bookings.find_one({"id": booking_id, **tenant_filter}, {"_id": 0})
+        vendor = await db.vendors.find_one({"id": assignment['vendor_id'], **tenant_filter}, {"_id": 0, "id": 1, "name": 1})
+        if booking and vendor:
+            if allow_conflict:
+                update_data['conflict_allowed'] = await find_vendor_conflict(vendor['id'], booking) is not None
+            else:
+                await check_vendor_conflict(vendor, booking)
+    
+    try:
+        await set_assignment_fields({"id": assignment_id}, update_data)
+    except DuplicateKeyError:
+        raise vendor_conflict_error(vendor or {}, booking or assignment)
+    await mark_vendor_stats_stale(assignment['vendor_id'], assignment.get('tenant_id'))
     
     updated = await db.booking_vendors.find_one({"id": assignment_id}, {"_id": 0})
     return serialize_doc(updated)
@@ -3636,6 +5556,7 @@ async def remove_vendor_from_booking(booking_id: str, assignment_id: str, curren
         raise HTTPException(status_code=404, detail="Assignment not found")
     
     await db.booking_vendors.delete_one({"id": assignment_id})
+    await mark_vendor_stats_stale(assignment['vendor_id'], assignment.get('tenant_id'))
     
     # Update vendor event count
     await db.vendors.update_one(
@@ -3679,34 +5600,193 @@ async def record_vendor_payment_for_booking(
     
     txn_doc = payment_txn.model_dump()
     txn_doc['created_at'] = txn_doc['created_at'].isoformat()
-    await db.vendor_transactions.insert_one(txn_doc)
+    await record_vendor_transaction(txn_doc)
     
     # Update assignment's amount_paid
     new_paid = assignment.get('amount_paid', 0) + amount
     new_balance = assignment['agreed_amount'] + assignment.get('tax', 0) - new_paid
     new_status = "paid" if new_balance <= 0 else ("partial" if new_paid > 0 else "assigned")
     
-    await db.booking_vendors.update_one(
-        {"id": assignment_id},
-        {"$set": {"amount_paid": new_paid, "balance_due": max(0, new_balance), "status": new_status}}
-    )
-    
-    # Recalculate vendor balance
-    await recalculate_vendor_balance(assignment['vendor_id'], tenant_filter)
+    payment_fields = {"amount_paid": new_paid, "balance_due": max(0, new_balance), "status": new_status}
+    try:
+        await set_assignment_fields({"id": assignment_id}, payment_fields)
+    except DuplicateKeyError:
+        # Paying a cancelled assignment reactivates it; the payment stands, so flag the double booking
+        await set_assignment_fields({"id": assignment_id}, {**payment_fields, "conflict_allowed": True})
     
     return {"message": "Payment recorded", "transaction_id": txn_doc['id']}
 
+# ==================== VENDOR STATS ====================
+VENDOR_STATS_FIELDS = [
+    "events_served", "avg_agreed_amount", "avg_payment_turnaround_days",
+    "cancellation_rate", "outstanding_exposure"
+]
+
+async def compute_vendor_stats(tenant_filter: dict, vendor_ids: Optional[list] = None) -> int:
+    """Recompute scorecards for the tenant's vendors (or just vendor_ids) into vendor_stats"""
+    today = datetime.now(timezone.utc).strftime('%Y-%m-%d')
+    vendor_query = {**tenant_filter}
+    match = {**tenant_filter}
+    if vendor_ids is not None:
+        vendor_query["id"] = {"$in": vendor_ids}
+        match["vendor_id"] = {"$in": vendor_ids}
+    
+    vendors = await db.vendors.find(vendor_query, {"_id": 0, "id": 1, "tenant_id": 1}).to_list(None)
+    if not vendors:
+        return 0
+    
+    cancelled = {"$or": [{"$eq": ["$status", "cancelled"]}, {"$eq": ["$booking_status", "cancelled"]}]}
+    assignments = await db.booking_vendors.aggregate([
+        {"$match": match},
+        {"$addFields": {"is_cancelled": cancelled}},
+        {"$group": {
+            "_id": "$vendor_id",
+            "assignments": {"$sum": 1},
+            "cancelled": {"$sum": {"$cond": ["$is_cancelled", 1, 0]}},
+            "events_served": {"$sum": {"$cond": [
+                {"$and": [{"$not": ["$is_cancelled"]}, {"$ifNull": ["$event_date", False]}, {"$lte": ["$event_date", today]}]}, 1, 0
+            ]}},
+            "avg_agreed_amount": {"$avg": {"$cond": ["$is_cancelled", None, "$agreed_amount"]}},
+            "last_event_date": {"$max": {"$cond": ["$is_cancelled", None, "$event_date"]}}
+        }}
+    ]).to_list(None)
+    assignments_by_vendor = {a['_id']: a for a in assignments}
+    
+    # Turnaround: days from a booking's first debit to its last payment, averaged per vendor
+    ledger = await db.vendor_transactions.aggregate([
+        {"$match": match},
+        {"$group": {
+            "_id": {"vendor_id": "$vendor_id", "booking_id": "$booking_id"},
+            "first_debit": {"$min": {"$cond": [{"$eq": ["$transaction_type", "debit"]}, "$transaction_date", None]}},
+            "last_payment": {"$max": {"$cond": [{"$eq": ["$transaction_type", "payment"]}, "$transaction_date", None]}},
+            "exposure": {"$sum": LEDGER_SIGNED_AMOUNT}
+        }},
+        # Blank or malformed transaction dates parse to null and drop out of the average
+        {"$addFields": {
+            "first_debit": {"$dateFromString": {"dateString": "$first_debit", "onError": None, "onNull": None}},
+            "last_payment": {"$dateFromString": {"dateString": "$last_payment", "onError": None, "onNull": None}}
+        }},
+        {"$group": {
+            "_id": "$_id.vendor_id",
+            "outstanding_exposure": {"$sum": "$exposure"},
+            "avg_payment_turnaround_days": {"$avg": {"$cond": [
+                {"$and": [
+                    {"$ne": [{"$ifNull": ["$_id.booking_id", None]}, None]},
+                    {"$ne": ["$first_debit", None]},
+                    {"$ne": ["$last_payment", None]}
+                ]},
+                {"$dateDiff": {"startDate": "$first_debit", "endDate": "$last_payment", "unit": "day"}},
+                None
+            ]}}
+        }}
+    ]).to_list(None)
+    ledger_by_vendor = {entry['_id']: entry for entry in ledger}
+    
+    computed_at = datetime.now(timezone.utc).isoformat()
+    operations = []
+    for vendor in vendors:
+        a = assignments_by_vendor.get(vendor['id'], {})
+        entry = ledger_by_vendor.get(vendor['id'], {})
+        turnaround = entry.get('avg_payment_turnaround_days')
+        operations.append(UpdateOne({"vendor_id": vendor['id']}, {"$set": {
+            "vendor_id": vendor['id'],
+            "tenant_id": vendor.get('tenant_id'),
+            "assignments": a.get('assignments', 0),
+            "events_served": a.get('events_served', 0),
+            "avg_agreed_amount": round(a.get('avg_agreed_amount') or 0, 2),
+            "avg_payment_turnaround_days": round(turnaround, 1) if turnaround is not None else None,
+            "cancellation_rate": round(a['cancelled'] / a['assignments'] * 100, 1) if a.get('assignments') else 0,
+            "outstanding_exposure": round(entry.get('outstanding_exposure', 0), 2),
+            "last_event_date": a.get('last_event_date'),
+            "stale": False,
+            "computed_at": computed_at
+        }}, upsert=True))
+    await db.vendor_stats.bulk_write(operations, ordered=False)
+    return len(operations)
+
+async def mark_vendor_stats_stale(vendor_id: str, tenant_id: Optional[str], exposure_delta: float = 0):
+    """Apply a ledger write to the vendor's exposure now and queue the rest of the scorecard"""
+    await db.vendor_stats.update_one(
+        {"vendor_id": vendor_id},
+        {"$set": {"stale": True}, "$inc": {"outstanding_exposure": exposure_delta}, "$setOnInsert": {"tenant_id": tenant_id}},
+        upsert=True
+    )
+
+async def mark_booking_vendor_stats_stale(booking: dict, previous: Optional[dict] = None):
+    """A moved or cancelled booking changes the scorecards of every vendor assigned to it"""
+    vendor_ids = await db.booking_vendors.distinct("vendor_id", {"booking_id": booking['id']})
+    if vendor_ids:
+        await db.vendor_stats.update_many({"vendor_id": {"$in": vendor_ids}}, {"$set": {"stale": True}})
+
+BOOKING_SYNC_LISTENERS.append(mark_booking_vendor_stats_stale)
+
+async def refresh_stale_vendor_stats():
+    """Periodic job: recompute scorecards touched by ledger or assignment writes"""
+    stale = await db.vendor_stats.find({"stale": True}, {"_id": 0, "vendor_id": 1, "tenant_id": 1}).to_list(None)
+    by_tenant = {}
+    for entry in stale:
+        by_tenant.setdefault(entry.get('tenant_id'), []).append(entry['vendor_id'])
+    for tenant_id, vendor_ids in by_tenant.items():
+        await compute_vendor_stats({"tenant_id": tenant_id}, vendor_ids)
+
+async def refresh_all_vendor_stats():
+    """Nightly job: recompute every vendor scorecard for every active tenant"""
+    tenants = await db.tenants.find({"status": "active"}, {"_id": 0, "id": 1}).to_list(None)
+    for tenant in tenants:
+        await compute_vendor_stats({"tenant_id": tenant['id']})
+
+@api_router.post("/vendors/stats/refresh")
+async def refresh_vendor_stats_now(current_user: dict = Depends(get_current_user)):
+    """Recompute all vendor scorecards for the tenant now"""
+    require_admin(current_user)
+    tenant_filter = await get_tenant_filter(current_user)
+    refreshed = await compute_vendor_stats(tenant_filter)
+    return {"message": "Vendor stats refreshed", "vendors": refreshed}
+
 @api_router.get("/vendors/directory")
-async def get_vendor_directory(current_user: dict = Depends(get_current_user)):
-    """Get vendor directory with balance summary for all vendors"""
+async def get_vendor_directory(
+    sort: Optional[str] = None,
+    order: str = "asc",
+    vendor_type: Optional[str] = None,
+    min_events_served: Optional[int] = None,
+    max_cancellation_rate: Optional[float] = None,
+    min_outstanding_exposure: Optional[float] = None,
+    current_user: dict = Depends(get_current_user)
+):
+    """Get vendor directory with balance summary and precomputed scorecard for all vendors"""
+    if sort and sort != "name" and sort not in VENDOR_STATS_FIELDS:
+        raise HTTPException(status_code=400, detail=f"Invalid sort field. Use one of: name, {', '.join(VENDOR_STATS_FIELDS)}")
+    
     tenant_filter = await get_tenant_filter(current_user)
     
-    vendors = await db.vendors.find({"is_active": True, **tenant_filter}, {"_id": 0}).to_list(500)
+    query = {"is_active": True, **tenant_filter}
+    if vendor_type:
+        query["vendor_type"] = vendor_type
+    vendors = await db.vendors.find(query, {"_id": 0}).to_list(500)
+    
+    stats = await db.vendor_stats.find(
+        {"vendor_id": {"$in": [v['id'] for v in vendors]}},
+        {"_id": 0, "tenant_id": 0}
+    ).to_list(None)
+    stats_by_vendor = {entry.pop('vendor_id'): entry for entry in stats}
     
     for vendor in vendors:
         balance = vendor.get('outstanding_balance', 0)
         vendor['balance_type'] = "payable" if balance > 0 else "receivable" if balance < 0 else "settled"
         vendor['balance_display'] = abs(balance)
+        vendor['stats'] = stats_by_vendor.get(vendor['id'], {})
+    
+    if min_events_served is not None:
+        vendors = [v for v in vendors if v['stats'].get('events_served', 0) >= min_events_served]
+    if max_cancellation_rate is not None:
+        vendors = [v for v in vendors if v['stats'].get('cancellation_rate', 0) <= max_cancellation_rate]
+    if min_outstanding_exposure is not None:
+        vendors = [v for v in vendors if v['stats'].get('outstanding_exposure', 0) >= min_outstanding_exposure]
+    
+    if sort:
+        key = (lambda v: (v.get('name') or '').lower()) if sort == "name" else (lambda v: v['stats'].get(sort))
+        ranked = sorted((v for v in vendors if key(v) is not None), key=key, reverse=order == "desc")
+        vendors = ranked + [v for v in vendors if key(v) is None]
     
     return vendors
 
@@ -3727,268 +5807,861 @@ async def create_expense(expense_data: ExpenseCreate, current_user: dict = Depen
         raise HTTPException(status_code=403, detail="Not authorized")
     expense = Expense(**expense_data.model_dump())
     expense_doc = expense.model_dump()
+    expense_doc['tenant_id'] = current_user.get('tenant_id')
     expense_doc['created_at'] = expense_doc['created_at'].isoformat()
     await db.expenses.insert_one(expense_doc)
+    await apply_rollup_deltas({(expense_doc['tenant_id'], expense_doc['date'], None): {"expenses": expense_doc['amount']}})
+    REPORT_MONTH_CACHE.invalidate(expense_doc['tenant_id'], expense_doc['date'][:7])
     return expense
 
 @api_router.delete("/expenses/{expense_id}")
 async def delete_expense(expense_id: str, current_user: dict = Depends(get_current_user)):
     if current_user['role'] != 'admin':
         raise HTTPException(status_code=403, detail="Not authorized")
-    result = await db.expenses.delete_one({"id": expense_id})
-    if result.deleted_count == 0:
+    expense = await db.expenses.find_one_and_delete({"id": expense_id}, projection={"_id": 0})
+    if not expense:
         raise HTTPException(status_code=404, detail="Expense not found")
+    await apply_rollup_deltas({(expense.get('tenant_id'), expense['date'], None): {"expenses": -expense['amount']}})
+    REPORT_MONTH_CACHE.invalidate(expense.get('tenant_id'), expense['date'][:7])
     return {"message": "Expense deleted"}
 
 # ==================== ALERTS SYSTEM ====================
-@api_router.get("/alerts")
-async def get_alerts(current_user: dict = Depends(get_current_user)):
-    # Generate real-time alerts based on current data
-    alerts = []
-    today = datetime.now(timezone.utc).strftime("%Y-%m-%d")
-    tomorrow = (datetime.now(timezone.utc) + timedelta(days=1)).strftime("%Y-%m-%d")
-    
-    # Payment overdue alerts (events passed but balance due)
-    overdue_bookings = await db.bookings.find({
-        "event_date": {"$lt": today},
-        "balance_due": {"$gt": 0},
-        "status": {"$nin": ["cancelled"]}
-    }, {"_id": 0}).to_list(100)
-    
-    for booking in overdue_bookings:
-        customer = await db.customers.find_one({"id": booking['customer_id']}, {"_id": 0})
-        alerts.append({
-            "id": f"alert-overdue-{booking['id']}",
-            "alert_type": "payment_overdue",
-            "priority": "high",
-            "title": "Payment Overdue",
-            "message": f"{customer['name'] if customer else 'Customer'} has ₹{booking['balance_due']:,.0f} outstanding for event on {booking['event_date']}",
-            "booking_id": booking['id'],
-            "is_resolved": False
-        })
-    
-    # Events tomorrow reminder
-    tomorrow_events = await db.bookings.find({
-        "event_date": tomorrow,
-        "status": {"$in": ["enquiry", "confirmed"]}
-    }, {"_id": 0}).to_list(50)
-    
-    for booking in tomorrow_events:
-        customer = await db.customers.find_one({"id": booking['customer_id']}, {"_id": 0})
-        hall = await db.halls.find_one({"id": booking['hall_id']}, {"_id": 0})
-        alerts.append({
-            "id": f"alert-tomorrow-{booking['id']}",
-            "alert_type": "event_tomorrow",
-            "priority": "high",
-            "title": "Event Tomorrow",
-            "message": f"{booking['event_type'].title()} for {customer['name'] if customer else 'Customer'} at {hall['name'] if hall else 'Hall'} tomorrow",
-            "booking_id": booking['id'],
-            "is_resolved": False
-        })
-    
-    # Events without menu assigned
-    no_menu = await db.bookings.find({
-        "event_date": {"$gte": today},
-        "menu_items": {"$size": 0},
-        "status": {"$nin": ["cancelled"]}
-    }, {"_id": 0}).to_list(50)
-    
-    for booking in no_menu:
-        customer = await db.customers.find_one({"id": booking['customer_id']}, {"_id": 0})
-        alerts.append({
-            "id": f"alert-nomenu-{booking['id']}",
-            "alert_type": "no_menu_assigned",
-            "priority": "medium",
-            "title": "No Menu Assigned",
-            "message": f"Event for {customer['name'] if customer else 'Customer'} on {booking['event_date']} has no menu selected",
-            "booking_id": booking['id'],
-            "is_resolved": False
-        })
-    
-    # Low advance (less than 30%)
-    low_advance = await db.bookings.find({
-        "event_date": {"$gte": today},
-        "status": {"$in": ["confirmed"]},
-        "$expr": {"$lt": [{"$divide": ["$advance_paid", "$total_amount"]}, 0.3]}
-    }, {"_id": 0}).to_list(50)
-    
-    for booking in low_advance:
-        if booking['total_amount'] > 0:
-            customer = await db.customers.find_one({"id": booking['customer_id']}, {"_id": 0})
-            percent = (booking['advance_paid'] / booking['total_amount']) * 100
-            alerts.append({
-                "id": f"alert-lowadv-{booking['id']}",
-                "alert_type": "low_advance",
-                "priority": "medium",
-                "title": "Low Advance Payment",
-                "message": f"{customer['name'] if customer else 'Customer'} has paid only {percent:.0f}% advance (₹{booking['advance_paid']:,.0f} of ₹{booking['total_amount']:,.0f})",
+# Alerts are materialized in db.alerts with one document per (condition, booking), id
+# "alert-<kind>-<booking_id>". Booking writes and payments re-evaluate just that booking;
+# an hourly job re-evaluates the bookings whose date-driven conditions flip at midnight.
+# Alerts whose condition clears are resolved by "system" and reopen if it recurs; alerts
+# resolved or dismissed by a user stay closed.
+ALERT_ID_PREFIXES = {
+    AlertType.PAYMENT_OVERDUE: "overdue",
+    AlertType.EVENT_TOMORROW: "tomorrow",
+    AlertType.NO_MENU_ASSIGNED: "nomenu",
+    AlertType.LOW_ADVANCE: "lowadv",
+}
+ALERT_PRIORITY_RANK = {"high": 0, "medium": 1, "low": 2}
+ALERT_LOW_ADVANCE_RATIO = 0.3
+ALERT_EVALUATION_BATCH = 500
+ALERT_ROLLOVER_LOOKBACK_DAYS = 7
+ALERT_BOOKING_PROJECTION = {
+    "_id": 0, "id": 1, "tenant_id": 1, "customer_id": 1, "hall_id": 1, "event_type": 1,
+    "event_date": 1, "status": 1, "is_deleted": 1, "menu_items": 1,
+    "advance_paid": 1, "balance_due": 1, "total_amount": 1,
+}
+ALERT_ROLLOVER_STATE = {"last_date": None}
+
+def booking_alert_conditions(booking: dict, customer_name: str, hall_name: str, today: str, tomorrow: str) -> list:
+    """(alert_type, priority, title, message) for every condition the booking currently meets"""
+    event_date = booking.get('event_date')
+    status = booking.get('status')
+    if not event_date or status == 'cancelled' or booking.get('is_deleted'):
+        return []
+    
+    conditions = []
+    balance_due = booking.get('balance_due') or 0
+    advance_paid = booking.get('advance_paid') or 0
+    total_amount = booking.get('total_amount') or 0
+    
+    if event_date < today and balance_due > 0:
+        conditions.append((AlertType.PAYMENT_OVERDUE, AlertPriority.HIGH, "Payment Overdue",
+                           f"{customer_name} has ₹{balance_due:,.0f} outstanding for event on {event_date}"))
+    if event_date == tomorrow and status in ('enquiry', 'confirmed'):
+        conditions.append((AlertType.EVENT_TOMORROW, AlertPriority.HIGH, "Event Tomorrow",
+                           f"{(booking.get('event_type') or 'Event').title()} for {customer_name} at {hall_name} tomorrow"))
+    if event_date >= today and not booking.get('menu_items'):
+        conditions.append((AlertType.NO_MENU_ASSIGNED, AlertPriority.MEDIUM, "No Menu Assigned",
+                           f"Event for {customer_name} on {event_date} has no menu selected"))
+    if event_date >= today and status == 'confirmed' and total_amount > 0 and advance_paid / total_amount < ALERT_LOW_ADVANCE_RATIO:
+        percent = advance_paid / total_amount * 100
+        conditions.append((AlertType.LOW_ADVANCE, AlertPriority.MEDIUM, "Low Advance Payment",
+                           f"{customer_name} has paid only {percent:.0f}% advance (₹{advance_paid:,.0f} of ₹{total_amount:,.0f})"))
+    return conditions
+
+async def evaluate_booking_alerts(bookings: list) -> int:
+    """Bring the alerts of the given bookings in line with their current state; returns open alerts written"""
+    bookings = [b for b in bookings if b and b.get('id')]
+    if not bookings:
+        return 0
+    now = datetime.now(timezone.utc)
+    today = now.strftime("%Y-%m-%d")
+    tomorrow = (now + timedelta(days=1)).strftime("%Y-%m-%d")
+    now_iso = now.isoformat()
+    booking_ids = [b['id'] for b in bookings]
+    
+    customer_ids = list({b['customer_id'] for b in bookings if b.get('customer_id')})
+    hall_ids = list({b['hall_id'] for b in bookings if b.get('hall_id')})
+    customers = await db.customers.find({"id": {"$in": customer_ids}}, {"_id": 0, "id": 1, "name": 1}).to_list(None)
+    halls = await db.halls.find({"id": {"$in": hall_ids}}, {"_id": 0, "id": 1, "name": 1}).to_list(None)
+    customer_names = {c['id']: c.get('name') for c in customers}
+    hall_names = {h['id']: h.get('name') for h in halls}
+    
+    system_resolved = await db.alerts.find(
+        {"booking_id": {"$in": booking_ids}, "status": AlertStatus.RESOLVED.value, "resolved_by": "system"},
+        {"_id": 0, "id": 1}
+    ).to_list(None)
+    reopen_ids = {a['id'] for a in system_resolved}
+    
+    operations = []
+    active_ids = []
+    for booking in bookings:
+        customer_name = customer_names.get(booking.get('customer_id')) or 'Customer'
+        hall_name = hall_names.get(booking.get('hall_id')) or 'Hall'
+        for alert_type, priority, title, message in booking_alert_conditions(booking, customer_name, hall_name, today, tomorrow):
+            alert_id = f"alert-{ALERT_ID_PREFIXES[alert_type]}-{booking['id']}"
+            active_ids.append(alert_id)
+            fields = {
+                "tenant_id": booking.get('tenant_id'),
+                "alert_type": alert_type.value,
+                "priority": priority.value,
+                "priority_rank": ALERT_PRIORITY_RANK[priority.value],
+                "title": title,
+                "message": message,
                 "booking_id": booking['id'],
-                "is_resolved": False
-            })
-    
-    # Sort by priority
-    priority_order = {"high": 0, "medium": 1, "low": 2}
-    alerts.sort(key=lambda x: priority_order.get(x['priority'], 3))
+                "event_date": booking['event_date'],
+                "updated_at": now_iso,
+            }
+            on_insert = {"id": alert_id, "created_at": now_iso}
+            reopen = {"status": AlertStatus.OPEN.value, "is_resolved": False, "resolved_at": None, "resolved_by": None}
+            if alert_id in reopen_ids:
+                fields.update(reopen)
+            else:
+                on_insert.update(reopen)
+            operations.append(UpdateOne({"id": alert_id}, {"$set": fields, "$setOnInsert": on_insert}, upsert=True))
+    
+    if operations:
+        await db.alerts.bulk_write(operations, ordered=False)
+    await db.alerts.update_many(
+        {"booking_id": {"$in": booking_ids}, "status": AlertStatus.OPEN.value, "id": {"$nin": active_ids}},
+        {"$set": {"status": AlertStatus.RESOLVED.value, "is_resolved": True, "resolved_at": now_iso,
+                  "resolved_by": "system", "updated_at": now_iso}}
+    )
+    return len(active_ids)
+
+async def evaluate_alerts_for_query(query: dict) -> int:
+    """Stream matching bookings through the evaluator in batches; returns bookings evaluated"""
+    evaluated = 0
+    batch = []
+    async for booking in db.bookings.find(query, ALERT_BOOKING_PROJECTION):
+        batch.append(booking)
+        if len(batch) >= ALERT_EVALUATION_BATCH:
+            await evaluate_booking_alerts(batch)
+            evaluated += len(batch)
+            batch = []
+    if batch:
+        await evaluate_booking_alerts(batch)
+        evaluated += len(batch)
+    return evaluated
+
+async def evaluate_booking_change_alerts(booking: dict, previous: Optional[dict] = None):
+    """Re-evaluate the written booking's alerts (menu, status, date and amount changes)"""
+    await evaluate_booking_alerts([booking])
+
+BOOKING_SYNC_LISTENERS.append(evaluate_booking_change_alerts)
+
+async def roll_over_alerts() -> int:
+    """Periodic job: once per day, re-evaluate bookings dated from the last run through tomorrow,
+    the only ones whose overdue/tomorrow/upcoming conditions change with the date"""
+    now = datetime.now(timezone.utc)
+    today = now.strftime("%Y-%m-%d")
+    if ALERT_ROLLOVER_STATE['last_date'] == today:
+        return 0
+    since = ALERT_ROLLOVER_STATE['last_date'] or (now - timedelta(days=ALERT_ROLLOVER_LOOKBACK_DAYS)).strftime("%Y-%m-%d")
+    tomorrow = (now + timedelta(days=1)).strftime("%Y-%m-%d")
+    evaluated = await evaluate_alerts_for_query({"event_date": {"$gte": since, "$lte": tomorrow}})
+    ALERT_ROLLOVER_STATE['last_date'] = today
+    return evaluated
+
+# Tenants whose bookings have all been evaluated once, marked in db.meta as "alerts:<tenant_id>"
+ALERTS_EVALUATED_TENANTS = set()
+
+async def ensure_tenant_alerts(tenant_id: Optional[str]):
+    """Evaluate a tenant's bookings the first time its alerts are needed, for deployments
+    that predate materialized alerts"""
+    if tenant_id in ALERTS_EVALUATED_TENANTS:
+        return
+    marker = f"alerts:{tenant_id}"
+    if not await db.meta.find_one({"_id": marker}, {"_id": 1}):
+        await evaluate_alerts_for_query({"tenant_id": tenant_id})
+        await db.meta.update_one(
+            {"_id": marker}, {"$set": {"evaluated_at": datetime.now(timezone.utc).isoformat()}}, upsert=True
+        )
+    ALERTS_EVALUATED_TENANTS.add(tenant_id)
+
+async def backfill_alerts():
+    """Evaluate each tenant not yet marked, one tenant at a time; a failed tenant is retried
+    on its next /alerts read or the next start"""
+    for tenant_id in await db.bookings.distinct("tenant_id"):
+        try:
+            await ensure_tenant_alerts(tenant_id)
+        except Exception:
+            logger.exception(f"Alert backfill failed for tenant {tenant_id}")
+
+@api_router.get("/alerts")
+async def get_alerts(
+    status: str = AlertStatus.OPEN.value,
+    alert_type: Optional[AlertType] = None,
+    limit: int = Query(200, ge=1, le=1000),
+    current_user: dict = Depends(get_current_user)
+):
+    """Materialized alerts for the tenant, highest priority and soonest event first"""
+    tenant_filter = await get_tenant_filter(current_user)
+    if tenant_filter:
+        await ensure_tenant_alerts(tenant_filter['tenant_id'])
+    query = dict(tenant_filter)
+    if status != "all":
+        if status not in {s.value for s in AlertStatus}:
+            raise HTTPException(status_code=400, detail=f"status must be 'all' or one of: {', '.join(s.value for s in AlertStatus)}")
+        query["status"] = status
+    if alert_type:
+        query["alert_type"] = alert_type.value
     
+    alerts = await db.alerts.find(query, {"_id": 0, "priority_rank": 0}).sort(
+        [("priority_rank", 1), ("event_date", 1), ("id", 1)]
+    ).to_list(limit)
     return alerts
 
+@api_router.post("/alerts/evaluate")
+async def evaluate_alerts_now(current_user: dict = Depends(get_current_user)):
+    """Re-evaluate every booking of the tenant, e.g. after a data import"""
+    require_admin(current_user)
+    tenant_filter = await get_tenant_filter(current_user)
+    evaluated = await evaluate_alerts_for_query(tenant_filter)
+    open_alerts = await db.alerts.count_documents({**tenant_filter, "status": AlertStatus.OPEN.value})
+    return {"message": "Alerts evaluated", "bookings_evaluated": evaluated, "open_alerts": open_alerts}
+
+async def close_alert(alert_id: str, status: AlertStatus, current_user: dict) -> dict:
+    tenant_filter = await get_tenant_filter(current_user)
+    now_iso = datetime.now(timezone.utc).isoformat()
+    alert = await db.alerts.find_one_and_update(
+        {"id": alert_id, **tenant_filter},
+        {"$set": {"status": status.value, "is_resolved": True, "resolved_at": now_iso,
+                  "resolved_by": current_user.get('user_id'), "updated_at": now_iso}},
+        projection={"_id": 0, "priority_rank": 0},
+        return_document=ReturnDocument.AFTER
+    )
+    if not alert:
+        raise HTTPException(status_code=404, detail="Alert not found")
+    return alert
+
+@api_router.put("/alerts/{alert_id}/resolve")
+async def resolve_alert(alert_id: str, current_user: dict = Depends(get_current_user)):
+    return await close_alert(alert_id, AlertStatus.RESOLVED, current_user)
+
+@api_router.put("/alerts/{alert_id}/dismiss")
+async def dismiss_alert(alert_id: str, current_user: dict = Depends(get_current_user)):
+    return await close_alert(alert_id, AlertStatus.DISMISSED, current_user)
+
 # ==================== HALL UTILIZATION ANALYTICS ====================
+# Active bookings are grouped by (hall, date, slot) in one aggregation and scattered into
+# hall x day x slot NumPy matrices; every metric below is computed on those arrays.
+HALL_UTILIZATION_MAX_DAYS = 10 * 366
+WEEKDAY_MASK = "1111100"  # Mon-Fri; Saturday and Sunday count as weekend
+
+# Per-month rows behind hall utilization, idle days and the financial report
+REPORT_MONTH_CACHE = MonthPartialCache()
+
+async def invalidate_report_months(booking: dict, previous: Optional[dict] = None):
+    """Drop cached report months a booking write touches"""
+    for doc in (booking, previous):
+        if doc and doc.get('event_date'):
+            REPORT_MONTH_CACHE.invalidate(doc.get('tenant_id'), doc['event_date'][:7])
+
+BOOKING_SYNC_LISTENERS.append(invalidate_report_months)
+
+def parse_analytics_range(start_date: str, end_date: str, max_days: int) -> int:
+    """Validate a YYYY-MM-DD range and return its length in days"""
+    try:
+        start = datetime.strptime(start_date, "%Y-%m-%d")
+        end = datetime.strptime(end_date, "%Y-%m-%d")
+    except ValueError:
+        raise HTTPException(status_code=400, detail="start_date and end_date must be YYYY-MM-DD")
+    total_days = (end - start).days + 1
+    if total_days < 1 or total_days > max_days:
+        raise HTTPException(status_code=400, detail=f"Date range must be 1 to {max_days} days")
+    return total_days
+
+async def hall_slot_rows(tenant_filter: dict, first_day: str, last_day: str) -> list:
+    """Active bookings grouped by (hall, date, slot) with booking count, revenue and collected"""
+    groups = await db.bookings.aggregate([
+        {"$match": {
+            "event_date": {"$gte": first_day, "$lte": last_day},
+            "status": {"$ne": "cancelled"},
+            "is_deleted": {"$ne": True},
+            **tenant_filter
+        }},
+        {"$group": {
+            "_id": {"hall_id": "$hall_id", "event_date": "$event_date", "slot": {"$ifNull": ["$slot", SlotType.DAY.value]}},
+            "bookings": {"$sum": 1},
+            "revenue": {"$sum": {"$ifNull": ["$total_amount", 0]}},
+            "collected": {"$sum": {"$ifNull": ["$advance_paid", 0]}}
+        }}
+    ]).to_list(None)
+    return [
+        {"hall_id": g['_id']['hall_id'], "date": g['_id']['event_date'], "slot": g['_id']['slot'],
+         "bookings": g['bookings'], "revenue": g['revenue'], "collected": g['collected']}
+        for g in groups
+    ]
+
+async def load_hall_occupancy_matrix(tenant_filter: dict, hall_ids: list, start_date: str, total_days: int) -> dict:
+    """Bookings, revenue and collected amounts as (halls, days, slots) arrays, plus the day axis"""
+    days = np.datetime64(start_date, 'D') + np.arange(total_days)
+    shape = (len(hall_ids), total_days, len(OCCUPANCY_SLOTS))
+    matrix = {
+        "days": days,
+        "bookings": np.zeros(shape, dtype=np.int32),
+        "revenue": np.zeros(shape, dtype=np.float64),
+        "collected": np.zeros(shape, dtype=np.float64),
+    }
+    if not hall_ids:
+        return matrix
+    
+    hall_index = {hall_id: i for i, hall_id in enumerate(hall_ids)}
+    slot_index = {slot: i for i, slot in enumerate(OCCUPANCY_SLOTS)}
+    day_slot = slot_index[SlotType.DAY.value]
+    rows = await REPORT_MONTH_CACHE.rows("hall_slots", tenant_filter, start_date, str(days[-1]), hall_slot_rows, "date")
+    rows = [r for r in rows if r['hall_id'] in hall_index]
+    if not rows:
+        return matrix
+    
+    halls_at = np.fromiter((hall_index[r['hall_id']] for r in rows), dtype=np.intp, count=len(rows))
+    # Legacy or unknown slots count as day bookings, as the occupancy rollup treats a missing slot
+    slots_at = np.fromiter((slot_index.get(r['slot'], day_slot) for r in rows), dtype=np.intp, count=len(rows))
+    days_at = (np.array([r['date'] for r in rows], dtype='datetime64[D]') - days[0]).astype(np.intp)
+    at = (halls_at, days_at, slots_at)
+    np.add.at(matrix["bookings"], at, np.fromiter((r['bookings'] for r in rows), dtype=np.int32, count=len(rows)))
+    np.add.at(matrix["revenue"], at, np.fromiter((r['revenue'] for r in rows), dtype=np.float64, count=len(rows)))
+    np.add.at(matrix["collected"], at, np.fromiter((r['collected'] for r in rows), dtype=np.float64, count=len(rows)))
+    return matrix
+
+def idle_runs(idle: np.ndarray) -> tuple:
+    """Every run of True in a (halls, days) boolean array as (row, first day index, length) arrays,
+    ordered by row then day"""
+    halls, total_days = idle.shape
+    padded = np.zeros((halls, total_days + 2), dtype=np.int8)
+    padded[:, 1:-1] = idle
+    edges = np.diff(padded, axis=1)
+    start_rows, start_cols = np.nonzero(edges == 1)
+    _, end_cols = np.nonzero(edges == -1)
+    return start_rows, start_cols, end_cols - start_cols
+
+def longest_idle_streaks(idle: np.ndarray) -> tuple:
+    """Per row of a (halls, days) boolean array: (length, first day index) of the longest idle run"""
+    halls = idle.shape[0]
+    start_rows, start_cols, lengths = idle_runs(idle)
+    
+    longest = np.zeros(halls, dtype=np.intp)
+    first_day = np.full(halls, -1, dtype=np.intp)
+    if lengths.size:
+        # Longest run per hall, earliest on ties
+        order = np.lexsort((start_cols, -lengths, start_rows))
+        rows, first = np.unique(start_rows[order], return_index=True)
+        longest[rows] = lengths[order][first]
+        first_day[rows] = start_cols[order][first]
+    return longest, first_day
+
+def percent_of(part, whole):
+    """Elementwise part / whole * 100, rounded to one decimal, 0 where whole is 0"""
+    part = np.asarray(part, dtype=np.float64)
+    whole = np.broadcast_to(np.asarray(whole, dtype=np.float64), part.shape)
+    return np.round(np.divide(part * 100, whole, out=np.zeros_like(part), where=whole > 0), 1)
+
 @api_router.get("/analytics/hall-utilization")
 async def get_hall_utilization(start_date: str, end_date: str, current_user: dict = Depends(get_current_user)):
-    halls = await db.halls.find({"is_active": True}, {"_id": 0}).to_list(100)
-    
-    # Calculate date range
-    start = datetime.strptime(start_date, "%Y-%m-%d")
-    end = datetime.strptime(end_date, "%Y-%m-%d")
-    total_days = (end - start).days + 1
+    total_days = parse_analytics_range(start_date, end_date, HALL_UTILIZATION_MAX_DAYS)
+    tenant_filter = await get_tenant_filter(current_user)
+    halls = await db.halls.find(
+        {"is_active": True, **tenant_filter},
+        {"_id": 0, "id": 1, "name": 1, "capacity": 1}
+    ).sort("name", 1).to_list(None)
+    matrix = await load_hall_occupancy_matrix(tenant_filter, [h['id'] for h in halls], start_date, total_days)
+    
+    slot_count = len(OCCUPANCY_SLOTS)
+    weekday = np.is_busday(matrix["days"], weekmask=WEEKDAY_MASK)
+    weekend = ~weekday
+    occupied = matrix["bookings"] > 0          # (halls, days, slots)
+    booked_day = occupied.any(axis=2)          # (halls, days)
+    
+    bookings = matrix["bookings"].sum(axis=(1, 2))
+    revenue = matrix["revenue"].sum(axis=(1, 2))
+    collected = matrix["collected"].sum(axis=(1, 2))
+    daily_revenue = matrix["revenue"].sum(axis=2)
+    booked_days = booked_day.sum(axis=1)
+    booked_slots = occupied.sum(axis=(1, 2))
+    weekday_days, weekend_days = int(weekday.sum()), int(weekend.sum())
+    booked_weekdays = booked_day[:, weekday].sum(axis=1)
+    booked_weekends = booked_day[:, weekend].sum(axis=1)
+    weekday_revenue = daily_revenue[:, weekday].sum(axis=1)
+    weekend_revenue = daily_revenue[:, weekend].sum(axis=1)
+    occupancy = percent_of(booked_days, total_days)
+    slot_occupancy = percent_of(booked_slots, total_days * slot_count)
+    weekday_occupancy = percent_of(booked_weekdays, weekday_days)
+    weekend_occupancy = percent_of(booked_weekends, weekend_days)
+    revpas = np.round(revenue / (total_days * slot_count), 2)
+    avg_value = np.round(np.divide(revenue, bookings, out=np.zeros_like(revenue), where=bookings > 0), 0)
+    idle_streak, idle_streak_start = longest_idle_streaks(~booked_day)
     
     hall_stats = []
-    for hall in halls:
-        # Get bookings for this hall in date range
-        bookings = await db.bookings.find({
-            "hall_id": hall['id'],
-            "event_date": {"$gte": start_date, "$lte": end_date},
-            "status": {"$nin": ["cancelled"]}
-        }, {"_id": 0}).to_list(1000)
-        
-        booked_days = len(set(b['event_date'] for b in bookings))
-        total_revenue = sum(b.get('total_amount', 0) for b in bookings)
-        total_collected = sum(b.get('advance_paid', 0) for b in bookings)
-        
-        occupancy_rate = (booked_days / total_days * 100) if total_days > 0 else 0
-        
+    for i, hall in enumerate(halls):
+        streak_start = matrix["days"][idle_streak_start[i]] if idle_streak[i] else None
         hall_stats.append({
             "hall_id": hall['id'],
             "hall_name": hall['name'],
-            "capacity": hall['capacity'],
-            "total_bookings": len(bookings),
-            "booked_days": booked_days,
-            "idle_days": total_days - booked_days,
-            "occupancy_rate": round(occupancy_rate, 1),
-            "total_revenue": total_revenue,
-            "total_collected": total_collected,
-            "avg_booking_value": round(total_revenue / len(bookings), 0) if bookings else 0
+            "capacity": hall.get('capacity'),
+            "total_bookings": int(bookings[i]),
+            "booked_days": int(booked_days[i]),
+            "idle_days": total_days - int(booked_days[i]),
+            "occupancy_rate": float(occupancy[i]),
+            "booked_slots": int(booked_slots[i]),
+            "slot_occupancy_rate": float(slot_occupancy[i]),
+            "weekday": {"booked_days": int(booked_weekdays[i]), "occupancy_rate": float(weekday_occupancy[i]), "revenue": float(weekday_revenue[i])},
+            "weekend": {"booked_days": int(booked_weekends[i]), "occupancy_rate": float(weekend_occupancy[i]), "revenue": float(weekend_revenue[i])},
+            "longest_idle_streak": {
+                "days": int(idle_streak[i]),
+                "start": str(streak_start) if streak_start is not None else None,
+                "end": str(streak_start + idle_streak[i] - 1) if streak_start is not None else None,
+            },
+            "revenue_per_available_slot": float(revpas[i]),
+            "total_revenue": float(revenue[i]),
+            "total_collected": float(collected[i]),
+            "avg_booking_value": float(avg_value[i])
         })
     
     # Sort by revenue descending
     hall_stats.sort(key=lambda x: x['total_revenue'], reverse=True)
+    available_slots = total_days * slot_count * len(halls)
     
     return {
-        "period": {"start": start_date, "end": end_date, "total_days": total_days},
+        "period": {"start": start_date, "end": end_date, "total_days": total_days,
+                   "weekdays": weekday_days, "weekend_days": weekend_days},
+        "slots": OCCUPANCY_SLOTS,
         "halls": hall_stats,
         "best_performing": hall_stats[0] if hall_stats else None,
-        "total_revenue": sum(h['total_revenue'] for h in hall_stats),
-        "overall_occupancy": round(sum(h['booked_days'] for h in hall_stats) / (total_days * len(halls)) * 100, 1) if halls else 0
+        "total_revenue": float(revenue.sum()),
+        "overall_occupancy": float(percent_of(booked_days.sum(), total_days * len(halls))) if halls else 0,
+        "overall_slot_occupancy": float(percent_of(booked_slots.sum(), available_slots)) if halls else 0,
+        "revenue_per_available_slot": round(float(revenue.sum()) / available_slots, 2) if halls else 0
     }
 
-@api_router.get("/analytics/peak-seasons")
-async def get_peak_seasons(year: int, current_user: dict = Depends(get_current_user)):
-    # Aggregate bookings by month
-    pipeline = [
+# Monthly totals of closed (past) years per tenant: dropped by a booking write dated in that
+# year, and expired after an hour so other workers and direct database edits catch up.
+# The current and future years are read from the daily rollups every time.
+PEAK_SEASON_CACHE = ResponseCache(ttl_seconds=60 * 60, max_entries=4096)
+PEAK_SEASON_MAX_YEARS = 10
+MONTH_NAMES = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
+
+async def invalidate_peak_season_cache(booking: dict, previous: Optional[dict] = None):
+    """Drop cached closed-year totals for the year(s) a booking write touches"""
+    for doc in (booking, previous):
+        if doc and doc.get('event_date'):
+            PEAK_SEASON_CACHE.invalidate(doc.get('tenant_id'), int(doc['event_date'][:4]))
+
+BOOKING_SYNC_LISTENERS.append(invalidate_peak_season_cache)
+
+def monthly_totals_by_year(rows: list, years: list) -> dict:
+    """{year: {"MM": {bookings, revenue, guests}}} from rows keyed by "YYYY-MM", zero-filled"""
+    totals = {year: {f"{m:02d}": {"bookings": 0, "revenue": 0, "guests": 0} for m in range(1, 13)} for year in years}
+    for row in rows:
+        year, month = int(row['_id'][:4]), row['_id'][5:7]
+        if year in totals:
+            totals[year][month] = {"bookings": row['bookings'], "revenue": row['revenue'], "guests": row['guests']}
+    return totals
+
+async def closed_year_totals(tenant_filter: dict, years: list) -> dict:
+    """Booking totals per month for past years: one date-range aggregation over the uncached years"""
+    cache_tenant = tenant_filter.get('tenant_id')  # super admin views span tenants and are not cached
+    totals = {}
+    if cache_tenant:
+        for year in years:
+            cached = PEAK_SEASON_CACHE.get((cache_tenant, year))
+            if cached is not None:
+                totals[year] = cached
+    missing = [year for year in years if year not in totals]
+    if not missing:
+        return totals
+    
+    for year, months in (await booking_year_totals(tenant_filter, missing)).items():
+        totals[year] = months
+        if cache_tenant:
+            PEAK_SEASON_CACHE.set((cache_tenant, year), months)
+    return totals
+
+async def booking_year_totals(tenant_filter: dict, years: list) -> dict:
+    """Booking totals per month for the years, aggregated from the bookings over their date range"""
+    rows = await db.bookings.aggregate([
         {"$match": {
-            "event_date": {"$regex": f"^{year}"},
-            "status": {"$nin": ["cancelled"]}
-        }},
-        {"$addFields": {
-            "month": {"$substr": ["$event_date", 5, 2]}
+            "event_date": {"$gte": f"{min(years)}-01-01", "$lte": f"{max(years)}-12-31"},
+            "status": {"$ne": "cancelled"},
+            "is_deleted": {"$ne": True},
+            **tenant_filter
         }},
         {"$group": {
-            "_id": "$month",
-            "booking_count": {"$sum": 1},
-            "total_revenue": {"$sum": "$total_amount"},
-            "total_guests": {"$sum": "$guest_count"}
-        }},
-        {"$sort": {"_id": 1}}
-    ]
-    
-    monthly_data = await db.bookings.aggregate(pipeline).to_list(12)
-    
-    months = ["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"]
-    result = []
-    for m in monthly_data:
-        month_idx = int(m['_id']) - 1
-        result.append({
-            "month": months[month_idx] if 0 <= month_idx < 12 else m['_id'],
-            "month_num": m['_id'],
-            "bookings": m['booking_count'],
-            "revenue": m['total_revenue'],
-            "guests": m['total_guests']
+            "_id": {"$substrBytes": ["$event_date", 0, 7]},
+            "bookings": {"$sum": 1},
+            "revenue": {"$sum": {"$ifNull": ["$total_amount", 0]}},
+            "guests": {"$sum": {"$ifNull": ["$guest_count", 0]}}
+        }}
+    ]).to_list(None)
+    return monthly_totals_by_year(rows, years)
+
+async def open_year_totals(tenant_filter: dict, years: list) -> dict:
+    """Booking totals per month for the current and future years, summed from the daily rollups
+    once they are complete and from the bookings until then"""
+    if not years:
+        return {}
+    if not await rollups_complete():
+        return await booking_year_totals(tenant_filter, years)
+    match = {"date": {"$gte": f"{min(years)}-01-01", "$lte": f"{max(years)}-12-31"}, **tenant_filter}
+    rows = await db.daily_rollups.aggregate([
+        {"$match": {**match, "bookings": {"$exists": True}}},
+        {"$group": {
+            "_id": {"$substrBytes": ["$date", 0, 7]},
+            "bookings": {"$sum": "$bookings"},
+            "revenue": {"$sum": "$revenue"},
+            "guests": {"$sum": "$guests"}
+        }}
+    ]).to_list(None)
+    return monthly_totals_by_year(rows, years)
+
+def yoy_change(current: float, previous: float) -> dict:
+    return {
+        "change": current - previous,
+        "percent": round((current - previous) / previous * 100, 1) if previous else None
+    }
+
+@api_router.get("/analytics/peak-seasons")
+async def get_peak_seasons(year: int, years: int = 1, current_user: dict = Depends(get_current_user)):
+    """Bookings, revenue and guests per month for `years` years ending at `year`, with
+    year-over-year changes against the same month of the previous year"""
+    if not 1 <= years <= PEAK_SEASON_MAX_YEARS:
+        raise HTTPException(status_code=400, detail=f"years must be 1 to {PEAK_SEASON_MAX_YEARS}")
+    tenant_filter = await get_tenant_filter(current_user)
+    current_year = datetime.now(timezone.utc).year
+    # One extra year so the earliest requested year also gets YoY changes
+    all_years = list(range(year - years, year + 1))
+    
+    totals = await closed_year_totals(tenant_filter, [y for y in all_years if y < current_year])
+    totals.update(await open_year_totals(tenant_filter, [y for y in all_years if y >= current_year]))
+    
+    year_entries = []
+    for y in all_years[1:]:
+        monthly_data = []
+        for i, month in enumerate(MONTH_NAMES):
+            month_num = f"{i + 1:02d}"
+            stats, previous = totals[y][month_num], totals[y - 1][month_num]
+            monthly_data.append({
+                "month": month,
+                "month_num": month_num,
+                **stats,
+                "yoy": {key: yoy_change(stats[key], previous[key]) for key in ("bookings", "revenue", "guests")}
+            })
+        peak = max(monthly_data, key=lambda x: x['bookings'])
+        total_bookings = sum(m['bookings'] for m in monthly_data)
+        total_revenue = sum(m['revenue'] for m in monthly_data)
+        previous_months = totals[y - 1].values()
+        year_entries.append({
+            "year": y,
+            "monthly_data": monthly_data,
+            "peak_month": peak['month'],
+            "total_bookings": total_bookings,
+            "total_revenue": total_revenue,
+            "yoy": {
+                "bookings": yoy_change(total_bookings, sum(m['bookings'] for m in previous_months)),
+                "revenue": yoy_change(total_revenue, sum(m['revenue'] for m in previous_months))
+            }
         })
     
-    # Fill missing months
-    existing_months = {r['month_num'] for r in result}
-    for i, month in enumerate(months):
-        month_num = f"{i+1:02d}"
-        if month_num not in existing_months:
-            result.append({"month": month, "month_num": month_num, "bookings": 0, "revenue": 0, "guests": 0})
+    # The requested year's fields stay at the top level
+    return {**year_entries[-1], "years": year_entries}
+
+async def booked_day_rows(tenant_filter: dict, first_day: str, last_day: str) -> list:
+    """(date, hall) pairs with any active booking, read from the hall occupancy rollup:
+    one small document per date instead of every booking"""
+    rows = []
+    async for doc in db.hall_occupancy.find(
+        {"date": {"$gte": first_day, "$lte": last_day}, **tenant_filter},
+        {"_id": 0, "date": 1, "slots": 1}
+    ):
+        for hall_id, slots in (doc.get('slots') or {}).items():
+            if any(count > 0 for count in slots.values()):
+                rows.append({"date": doc['date'], "hall_id": hall_id})
+    return rows
+
+async def load_booked_day_matrix(tenant_filter: dict, hall_ids: list, calendar: np.ndarray) -> np.ndarray:
+    """(halls, days) booleans, True where the hall has any active booking that day"""
+    booked = np.zeros((len(hall_ids), calendar.size), dtype=bool)
+    hall_index = {hall_id: i for i, hall_id in enumerate(hall_ids)}
+    rows = await REPORT_MONTH_CACHE.rows("booked_days", tenant_filter, str(calendar[0]), str(calendar[-1]), booked_day_rows, "date")
+    rows = [r for r in rows if r['hall_id'] in hall_index]
+    if rows:
+        days_at = np.searchsorted(calendar, np.array([r['date'] for r in rows], dtype='datetime64[D]'))
+        booked[np.fromiter((hall_index[r['hall_id']] for r in rows), dtype=np.intp, count=len(rows)), days_at] = True
+    return booked
+
+@api_router.get("/analytics/idle-days")
+async def get_idle_days(start_date: str, end_date: str, hall_id: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+    """Idle (fully unbooked) days and idle runs per hall, with weekend idle days flagged separately.
+    With hall_id, returns that hall's entry; otherwise every active hall, most weekend idle days first."""
+    total_days = parse_analytics_range(start_date, end_date, HALL_UTILIZATION_MAX_DAYS)
+    tenant_filter = await get_tenant_filter(current_user)
+    hall_query = {"id": hall_id} if hall_id else {"is_active": True}
+    halls = await db.halls.find({**hall_query, **tenant_filter}, {"_id": 0, "id": 1, "name": 1}).sort("name", 1).to_list(None)
+    if hall_id and not halls:
+        raise HTTPException(status_code=404, detail="Hall not found")
     
-    result.sort(key=lambda x: x['month_num'])
+    calendar = np.arange(np.datetime64(start_date, 'D'), np.datetime64(start_date, 'D') + total_days)
+    weekend = ~np.is_busday(calendar, weekmask=WEEKDAY_MASK)
+    idle = ~await load_booked_day_matrix(tenant_filter, [h['id'] for h in halls], calendar)
+    weekend_idle = idle & weekend
+    dates = np.datetime_as_string(calendar)
+    
+    # Runs for all halls at once; weekend days per run from a running weekend count
+    run_rows, run_starts, run_lengths = idle_runs(idle)
+    run_ends = run_starts + run_lengths
+    weekends_before = np.concatenate(([0], np.cumsum(weekend)))
+    all_runs = [
+        {"start": start, "end": end, "days": days, "weekend_days": weekend_days}
+        for start, end, days, weekend_days in zip(
+            dates[run_starts].tolist(), dates[run_ends - 1].tolist(), run_lengths.tolist(),
+            (weekends_before[run_ends] - weekends_before[run_starts]).tolist()
+        )
+    ]
+    run_bounds = np.searchsorted(run_rows, np.arange(len(halls) + 1)).tolist()
+    period = {"start": start_date, "end": end_date, "total_days": total_days, "weekend_days": int(weekend.sum())}
     
-    # Identify peak season
-    peak = max(result, key=lambda x: x['bookings']) if result else None
+    hall_entries = []
+    for i, hall in enumerate(halls):
+        runs = all_runs[run_bounds[i]:run_bounds[i + 1]]
+        hall_entries.append({
+            "hall_id": hall['id'],
+            "hall_name": hall['name'],
+            "period": period,
+            "total_idle_days": int(idle[i].sum()),
+            "total_weekend_idle_days": int(weekend_idle[i].sum()),
+            "idle_dates": dates[idle[i]].tolist(),
+            "weekend_idle_dates": dates[weekend_idle[i]].tolist(),
+            "idle_runs": runs,
+            "longest_idle_run": max(runs, key=lambda r: r['days']) if runs else None
+        })
     
+    if hall_id:
+        return hall_entries[0]
+    hall_entries.sort(key=lambda h: (-h['total_weekend_idle_days'], -h['total_idle_days']))
     return {
-        "year": year,
-        "monthly_data": result,
-        "peak_month": peak['month'] if peak else None,
-        "total_bookings": sum(r['bookings'] for r in result),
-        "total_revenue": sum(r['revenue'] for r in result)
+        "period": period,
+        "halls": hall_entries,
+        "total_idle_days": int(idle.sum()),
+        "total_weekend_idle_days": int(weekend_idle.sum())
     }
 
-@api_router.get("/analytics/idle-days")
-async def get_idle_days(hall_id: str, start_date: str, end_date: str, current_user: dict = Depends(get_current_user)):
-    # Get all booked dates for this hall
-    bookings = await db.bookings.find({
-        "hall_id": hall_id,
-        "event_date": {"$gte": start_date, "$lte": end_date},
-        "status": {"$nin": ["cancelled"]}
-    }, {"_id": 0, "event_date": 1}).to_list(1000)
-    
-    booked_dates = set(b['event_date'] for b in bookings)
-    
-    # Generate all dates in range
-    start = datetime.strptime(start_date, "%Y-%m-%d")
-    end = datetime.strptime(end_date, "%Y-%m-%d")
-    
-    idle_dates = []
-    current = start
-    while current <= end:
-        date_str = current.strftime("%Y-%m-%d")
-        if date_str not in booked_dates:
-            idle_dates.append(date_str)
-        current += timedelta(days=1)
-    
-    hall = await db.halls.find_one({"id": hall_id}, {"_id": 0})
-    
+# ==================== PANDAS ANALYTICS ====================
+# Booking-level analytics (analytics.py) run in a process pool so pandas work never blocks
+# the event loop. The loop only streams a projected cursor into columns and awaits the result.
+ANALYTICS_WORKERS = int(os.environ.get('ANALYTICS_WORKERS', '2'))
+ANALYTICS_CACHE = ResponseCache(ttl_seconds=15 * 60, max_entries=512)
+ANALYTICS_BATCH_SIZE = 2000
+ANALYTICS_POOL = {"executor": None}
+
+def get_analytics_pool() -> ProcessPoolExecutor:
+    """Started on first use; spawn keeps workers free of the parent's Mongo client and threads"""
+    if ANALYTICS_POOL["executor"] is None:
+        ANALYTICS_POOL["executor"] = ProcessPoolExecutor(
+            max_workers=ANALYTICS_WORKERS, mp_context=multiprocessing.get_context("spawn")
+        )
+    return ANALYTICS_POOL["executor"]
+
+async def invalidate_analytics_cache(booking: dict, previous: Optional[dict] = None):
+    for doc in (booking, previous):
+        if doc:
+            ANALYTICS_CACHE.invalidate(doc.get('tenant_id'))
+
+BOOKING_SYNC_LISTENERS.append(invalidate_analytics_cache)
+
+async def load_analytics_columns(tenant_filter: dict, start_date: Optional[str], end_date: Optional[str]) -> dict:
+    """Active bookings in the event date range as {column: list}, streamed in batches"""
+    query = {"status": {"$ne": "cancelled"}, "is_deleted": {"$ne": True}, **tenant_filter}
+    date_range = {op: value for op, value in (("$gte", start_date), ("$lte", end_date)) if value}
+    if date_range:
+        query["event_date"] = date_range
+    
+    columns = {name: [] for name in analytics.BOOKING_COLUMNS}
+    projection = {"_id": 0, **{name: 1 for name in analytics.BOOKING_COLUMNS}}
+    async for booking in db.bookings.find(query, projection).batch_size(ANALYTICS_BATCH_SIZE):
+        for name, values in columns.items():
+            values.append(booking.get(name))
+    return columns
+
+async def run_tenant_analysis(name: str, current_user: dict, start_date: Optional[str], end_date: Optional[str], **options) -> dict:
+    """Cached result of one analytics.py analysis over the tenant's bookings"""
+    await check_feature_access(current_user, 'analytics')
+    for value in (start_date, end_date):
+        if value:
+            try:
+                datetime.strptime(value, "%Y-%m-%d")
+            except ValueError:
+                raise HTTPException(status_code=400, detail="start_date and end_date must be YYYY-MM-DD")
+    tenant_filter = await get_tenant_filter(current_user)
+    # Super admin views span tenants and are not cached
+    cache_key = (tenant_filter['tenant_id'], name, start_date, end_date, tuple(sorted(options.items()))) if tenant_filter else None
+    cached = ANALYTICS_CACHE.get(cache_key) if cache_key else None
+    if cached is not None:
+        return cached
+    
+    columns = await load_analytics_columns(tenant_filter, start_date, end_date)
+    result = await asyncio.get_running_loop().run_in_executor(
+        get_analytics_pool(), analytics.run_analysis, name, columns, options
+    )
+    result = {"period": {"start": start_date, "end": end_date}, **result}
+    if cache_key:
+        ANALYTICS_CACHE.set(cache_key, result)
+    return result
+
+@api_router.get("/analytics/customer-lifetime-value")
+async def get_customer_lifetime_value(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    top: int = Query(20, ge=1, le=200),
+    current_user: dict = Depends(get_current_user)
+):
+    """Revenue and collections per customer, with the top customers by lifetime value"""
+    result = await run_tenant_analysis("customer-lifetime-value", current_user, start_date, end_date, top=top)
+    tenant_filter = await get_tenant_filter(current_user)
+    customers = await db.customers.find(
+        {"id": {"$in": [c['customer_id'] for c in result['top_customers']]}, **tenant_filter},
+        {"_id": 0, "id": 1, "name": 1, "phone": 1}
+    ).to_list(None)
+    by_id = {c['id']: c for c in customers}
     return {
-        "hall_id": hall_id,
-        "hall_name": hall['name'] if hall else "Unknown",
-        "period": {"start": start_date, "end": end_date},
-        "total_idle_days": len(idle_dates),
-        "idle_dates": idle_dates
+        **result,
+        "top_customers": [
+            {**c, "name": by_id.get(c['customer_id'], {}).get('name', 'Unknown'), "phone": by_id.get(c['customer_id'], {}).get('phone')}
+            for c in result['top_customers']
+        ]
     }
 
+@api_router.get("/analytics/event-mix")
+async def get_event_mix(start_date: Optional[str] = None, end_date: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+    """Share of bookings, revenue and guests per event type"""
+    return await run_tenant_analysis("event-mix", current_user, start_date, end_date)
+
+@api_router.get("/analytics/guest-trends")
+async def get_guest_trends(
+    start_date: Optional[str] = None,
+    end_date: Optional[str] = None,
+    window: int = Query(3, ge=1, le=12),
+    current_user: dict = Depends(get_current_user)
+):
+    """Average guest count per month with a rolling mean, overall and per event type"""
+    return await run_tenant_analysis("guest-trends", current_user, start_date, end_date, window=window)
+
+@api_router.get("/analytics/discount-leakage")
+async def get_discount_leakage(start_date: Optional[str] = None, end_date: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+    """Discounts given against gross charges, by month, event type and discount type"""
+    require_admin(current_user)
+    return await run_tenant_analysis("discount-leakage", current_user, start_date, end_date)
+
+@api_router.get("/analytics/repeat-customers")
+async def get_repeat_customers(start_date: Optional[str] = None, end_date: Optional[str] = None, current_user: dict = Depends(get_current_user)):
+    """Repeat-customer rate, repeat revenue share and new vs returning bookings per month"""
+    return await run_tenant_analysis("repeat-customers", current_user, start_date, end_date)
+
 # ==================== FINANCIAL REPORTS (GST) ====================
-@api_router.get("/reports/financial")
-async def get_financial_report(start_date: str, end_date: str, current_user: dict = Depends(get_current_user)):
-    if current_user['role'] != 'admin':
-        raise HTTPException(status_code=403, detail="Admin access required")
-    
-    # Get bookings in date range
-    bookings = await db.bookings.find({
-        "event_date": {"$gte": start_date, "$lte": end_date},
-        "status": {"$nin": ["cancelled"]}
-    }, {"_id": 0}).to_list(1000)
-    
-    # Get expenses in date range
-    expenses = await db.expenses.find({
-        "date": {"$gte": start_date, "$lte": end_date}
-    }, {"_id": 0}).to_list(1000)
+FINANCIAL_BATCH_SIZE = 2000
+NAME_LOOKUP_CHUNK = 5000
+FINANCIAL_BOOKING_PROJECTION = {
+    "_id": 0, "id": 1, "booking_number": 1, "customer_id": 1, "hall_id": 1,
+    "event_date": 1, "event_type": 1, "total_amount": 1, "advance_paid": 1,
+}
+
+async def fold_financial_bookings(months: dict, tenant_filter: dict, first_day: str, last_day: str):
+    """Stream active bookings in the range from a projected cursor into the month aggregates"""
+    async for booking in db.bookings.find({
+        "event_date": {"$gte": first_day, "$lte": last_day},
+        "status": {"$ne": "cancelled"},
+        "is_deleted": {"$ne": True},
+        **tenant_filter
+    }, FINANCIAL_BOOKING_PROJECTION).batch_size(FINANCIAL_BATCH_SIZE):
+        add_financial_booking(months, booking)
+
+async def fold_financial_expenses(months: dict, tenant_filter: dict, first_day: str, last_day: str):
+    """Stream expense totals per (month, booking, category), summed by the database, into the month aggregates"""
+    async for group in db.expenses.aggregate([
+        {"$match": {"date": {"$gte": first_day, "$lte": last_day}, **tenant_filter}},
+        {"$group": {
+            "_id": {"month": {"$substrBytes": ["$date", 0, 7]}, "booking_id": "$booking_id", "category": "$category"},
+            "amount": {"$sum": {"$ifNull": ["$amount", 0]}}
+        }}
+    ], batchSize=FINANCIAL_BATCH_SIZE):
+        add_financial_expense(months, {**group['_id'], "amount": group['amount']})
+
+async def names_by_id(collection, ids: set, tenant_filter: dict) -> dict:
+    """{id: name} with one $in query per NAME_LOOKUP_CHUNK ids"""
+    ids = list(ids)
+    names = {}
+    for i in range(0, len(ids), NAME_LOOKUP_CHUNK):
+        async for doc in collection.find({"id": {"$in": ids[i:i + NAME_LOOKUP_CHUNK]}, **tenant_filter}, {"_id": 0, "id": 1, "name": 1}):
+            names[doc['id']] = doc.get('name')
+    return names
+
+def empty_financial_month() -> dict:
+    return {"revenue": 0, "collected": 0, "events": [], "expenses": 0, "by_category": {}, "by_booking": {}}
+
+def add_financial_booking(months: dict, booking: dict):
+    """Fold an active booking into its event month: revenue and collected totals plus its breakdown
+    entry. The report lists every event, so entries are the one part kept per booking."""
+    month = months.setdefault(booking['event_date'][:7], empty_financial_month())
+    month['revenue'] += booking.get('total_amount') or 0
+    month['collected'] += booking.get('advance_paid') or 0
+    month['events'].append(booking)
+
+def add_financial_expense(months: dict, expense: dict):
+    """Fold an expense total into its month: overall, per category and per booking"""
+    month = months.setdefault(expense['month'], empty_financial_month())
+    amount = expense.get('amount') or 0
+    month['expenses'] += amount
+    category = expense.get('category') or 'other'
+    month['by_category'][category] = month['by_category'].get(category, 0) + amount
+    if expense.get('booking_id'):
+        month['by_booking'][expense['booking_id']] = month['by_booking'].get(expense['booking_id'], 0) + amount
+
+async def financial_month_aggregates(tenant_filter: dict, first_day: str, last_day: str) -> dict:
+    """{"YYYY-MM": aggregate} for every month from first_day to last_day"""
+    months = {period: empty_financial_month() for period in MonthPartialCache.months_between(first_day, last_day)}
+    await fold_financial_bookings(months, tenant_filter, first_day, last_day)
+    await fold_financial_expenses(months, tenant_filter, first_day, last_day)
+    return months
+
+def assemble_financial_report(start_date: str, end_date: str, months: list,
+                              customer_names: dict, hall_names: dict) -> dict:
+    """Totals, GST split and per-event breakdown from per-month aggregates; expenses join
+    bookings through the per-booking sums, O(bookings + months)"""
+    total_revenue = sum(month['revenue'] for month in months)
+    total_collected = sum(month['collected'] for month in months)
+    total_expenses = sum(month['expenses'] for month in months)
+    
+    # Expenses by category and by booking across the range
+    expense_by_category = {}
+    expense_by_booking = {}
+    for month in months:
+        for cat, amount in month['by_category'].items():
+            expense_by_category[cat] = expense_by_category.get(cat, 0) + amount
+        for booking_id, amount in month['by_booking'].items():
+            expense_by_booking[booking_id] = expense_by_booking.get(booking_id, 0) + amount
     
-    # Calculate totals
-    total_revenue = sum(b.get('total_amount', 0) for b in bookings)
-    total_collected = sum(b.get('advance_paid', 0) for b in bookings)
-    total_expenses = sum(e.get('amount', 0) for e in expenses)
+    # Event-wise breakdown
+    event_breakdown = []
+    for month in months:
+        for booking in month['events']:
+            revenue = booking.get('total_amount', 0)
+            booking_expenses = expense_by_booking.get(booking['id'], 0)
+            event_breakdown.append({
+                "booking_number": booking.get('booking_number'),
+                "customer": customer_names.get(booking.get('customer_id')) or 'Unknown',
+                "hall": hall_names.get(booking.get('hall_id')) or 'Unknown',
+                "event_date": booking['event_date'],
+                "event_type": booking.get('event_type'),
+                "revenue": revenue,
+                "collected": booking.get('advance_paid', 0),
+                "expenses": booking_expenses,
+                "profit": revenue - booking_expenses
+            })
     
     # GST calculations (18% = 9% CGST + 9% SGST)
     gst_rate = 18
@@ -3997,33 +6670,6 @@ async def get_financial_report(start_date: str, end_date: str, current_user: dic
     cgst = total_gst / 2
     sgst = total_gst / 2
     
-    # Group expenses by category
-    expense_by_category = {}
-    for exp in expenses:
-        cat = exp.get('category', 'other')
-        expense_by_category[cat] = expense_by_category.get(cat, 0) + exp.get('amount', 0)
-    
-    # Event-wise breakdown
-    event_breakdown = []
-    for booking in bookings:
-        customer = await db.customers.find_one({"id": booking['customer_id']}, {"_id": 0})
-        hall = await db.halls.find_one({"id": booking['hall_id']}, {"_id": 0})
-        
-        # Get expenses for this booking
-        booking_expenses = sum(e.get('amount', 0) for e in expenses if e.get('booking_id') == booking['id'])
-        
-        event_breakdown.append({
-            "booking_number": booking['booking_number'],
-            "customer": customer['name'] if customer else 'Unknown',
-            "hall": hall['name'] if hall else 'Unknown',
-            "event_date": booking['event_date'],
-            "event_type": booking['event_type'],
-            "revenue": booking['total_amount'],
-            "collected": booking['advance_paid'],
-            "expenses": booking_expenses,
-            "profit": booking['total_amount'] - booking_expenses
-        })
-    
     return {
         "period": {"start": start_date, "end": end_date},
         "revenue": {
@@ -4048,11 +6694,30 @@ async def get_financial_report(start_date: str, end_date: str, current_user: dic
         },
         "event_breakdown": event_breakdown,
         "summary": {
-            "total_events": len(bookings),
-            "avg_revenue_per_event": round(total_revenue / len(bookings), 2) if bookings else 0
+            "total_events": len(event_breakdown),
+            "avg_revenue_per_event": round(total_revenue / len(event_breakdown), 2) if event_breakdown else 0
         }
     }
 
+@api_router.get("/reports/financial")
+async def get_financial_report(start_date: str, end_date: str, current_user: dict = Depends(get_current_user)):
+    """Revenue, GST, expenses and per-event profit for the range, built from cached months.
+    Scoped to the caller's tenant like the other reports: bookings that are cancelled or soft
+    deleted are left out, and expenses count by their tenant_id (ones recorded before expenses
+    carried a tenant are attributed at startup by backfill_expense_tenants)."""
+    if current_user['role'] != 'admin':
+        raise HTTPException(status_code=403, detail="Admin access required")
+    parse_analytics_range(start_date, end_date, HALL_UTILIZATION_MAX_DAYS)
+    tenant_filter = await get_tenant_filter(current_user)
+    
+    # Per-month totals, expense sums and event entries, assembled from cached months
+    months = await REPORT_MONTH_CACHE.aggregates("financial", tenant_filter, start_date, end_date, financial_month_aggregates)
+    events = [booking for month in months for booking in month['events']]
+    customer_names = await names_by_id(db.customers, {b['customer_id'] for b in events if b.get('customer_id')}, tenant_filter)
+    hall_names = await names_by_id(db.halls, {b['hall_id'] for b in events if b.get('hall_id')}, tenant_filter)
+    
+    return assemble_financial_report(start_date, end_date, months, customer_names, hall_names)
+
 @api_router.get("/reports/gst-summary")
 async def get_gst_summary(year: int, month: Optional[int] = None, current_user: dict = Depends(get_current_user)):
     if current_user['role'] != 'admin':
@@ -4608,12 +7273,18 @@ async def reset_tenant_data(tenant_id: str, confirm: bool = False, current_user:
     
     # Delete all tenant-specific data
     collections_to_clear = ['bookings', 'party_plans', 'vendors', 'vendor_transactions', 
-                           'booking_vendors', 'payments', 'expenses', 'alerts', 'audit_logs']
+                           'vendor_ledger_checkpoints', 'vendor_balance_audits', 'vendor_aging', 'vendor_stats',
+                           'hall_occupancy', 'daily_rollups', 'booking_vendors', 'payments', 'expenses', 'alerts', 'audit_logs']
     
     deleted_counts = {}
     for collection in collections_to_clear:
         result = await db[collection].delete_many({"tenant_id": tenant_id})
         deleted_counts[collection] = result.deleted_count
+    PEAK_SEASON_CACHE.invalidate(tenant_id)
+    ANALYTICS_CACHE.invalidate(tenant_id)
+    REPORT_MONTH_CACHE.invalidate(tenant_id)
+    CALENDAR_CACHE.invalidate(tenant_id)
+    DASHBOARD_CACHE.invalidate(tenant_id)
     
     return {"message": "Tenant data reset", "deleted": deleted_counts}
 
@@ -4845,6 +7516,7 @@ async def restore_booking(booking_id: str, current_user: dict = Depends(get_curr
         {"id": booking_id},
         {"$set": {"is_deleted": False, "deleted_at": None}}
     )
+    await sync_booking_write({**booking, "is_deleted": False, "deleted_at": None}, booking)
     
     # Audit log
     await create_audit_log(
@@ -4900,6 +7572,17 @@ async def migrate_existing_data(current_user: dict = Depends(get_current_user)):
         )
         results[collection] += result2.modified_count
     
+    # Booking-derived rollups and caches are keyed by tenant
+    if results['bookings']:
+        await rebuild_hall_occupancy({})
+        await rebuild_daily_rollups({})
+        await evaluate_alerts_for_query({})
+        CALENDAR_CACHE.clear()
+        PEAK_SEASON_CACHE.clear()
+        ANALYTICS_CACHE.clear()
+    if results['bookings'] or results['expenses']:
+        REPORT_MONTH_CACHE.clear()
+    
     # Migrate users (except super_admin)
     user_result = await db.users.update_many(
         {"tenant_id": {"$exists": False}, "role": {"$ne": "super_admin"}},
@@ -5130,8 +7813,76 @@ app.add_middleware(
     allow_origins=os.environ.get('CORS_ORIGINS', '*').split(','),
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
 
+# ==================== BACKGROUND JOBS ====================
+# (name, interval in seconds, coroutine function)
+BACKGROUND_JOBS = [
+    ("readiness_scores", 15 * 60, refresh_all_readiness_scores),
+    ("vendor_balance_verifier", 24 * 60 * 60, verify_all_vendor_balances),
+    ("vendor_stats_nightly", 24 * 60 * 60, refresh_all_vendor_stats),
+    ("vendor_stats_stale", 5 * 60, refresh_stale_vendor_stats),
+    ("alerts_rollover", 60 * 60, roll_over_alerts),
+]
+
+async def run_periodic_job(name: str, interval_seconds: int, job):
+    """Run a job forever on a fixed interval, logging (not raising) failures"""
+    while True:
+        try:
+            await job()
+        except Exception:
+            logger.exception(f"Background job '{name}' failed")
+        await asyncio.sleep(interval_seconds)
+
+@app.on_event("startup")
+async def start_background_jobs():
+    await db.party_plans.create_index("booking_id")
+    await db.payments.create_index("booking_id")
+    await db.party_expenses.create_index("booking_id")
+    await db.party_plans.create_index([("tenant_id", 1), ("readiness_context.event_date", 1)])
+    await db.bookings.create_index([("tenant_id", 1), ("event_date", 1), ("id", 1)])
+    await db.bookings.create_index("id")
+    await db.vendor_payments.create_index([("vendor_id", 1), ("created_at", -1)])
+    await db.vendor_assignments.create_index("vendor_id")
+    await db.vendor_transactions.create_index([("vendor_id", 1), ("transaction_date", 1), ("created_at", 1), ("id", 1)])
+    await db.vendor_transactions.create_index([("booking_id", 1), ("vendor_id", 1)])
+    await db.booking_vendors.create_index("booking_id")
+    await db.booking_vendors.create_index([("tenant_id", 1), ("vendor_id", 1), ("event_date", 1), ("slot", 1)])
+    await db.vendor_aging.create_index("vendor_id", unique=True)
+    await db.vendor_stats.create_index("vendor_id", unique=True)
+    await db.vendor_stats.create_index("stale")
+    await db.hall_occupancy.create_index([("tenant_id", 1), ("date", 1)], unique=True)
+    await db.bookings.create_index([("tenant_id", 1), ("created_at", -1)])
+    await db.payments.create_index([("tenant_id", 1), ("payment_date", 1)])
+    await db.expenses.create_index([("tenant_id", 1), ("date", 1)])
+    await db.daily_rollups.create_index([("tenant_id", 1), ("date", 1), ("hall_id", 1)], unique=True)
+    await db.vendor_ledger_checkpoints.create_index([("vendor_id", 1), ("position", -1)])
+    await db.vendor_balance_audits.create_index([("tenant_id", 1), ("run_at", -1)])
+    await db.alerts.create_index("id", unique=True)
+    await db.alerts.create_index("booking_id")
+    await db.alerts.create_index([("tenant_id", 1), ("status", 1), ("priority_rank", 1), ("event_date", 1)])
+    for backfill in (
+        backfill_vendor_schedule, backfill_vendor_opening_payables, backfill_hall_occupancy,
+        backfill_party_plan_changes, backfill_expense_tenants, backfill_daily_rollups
+    ):
+        await run_startup_backfill(backfill)
+    app.state.background_tasks = [
+        asyncio.create_task(run_periodic_job(name, interval, job))
+        for name, interval, job in BACKGROUND_JOBS
+    ]
+    # Alerts are evaluated tenant by tenant behind the API; /alerts evaluates its own tenant first if needed
+    app.state.background_tasks.append(asyncio.create_task(run_startup_backfill(backfill_alerts)))
+
+async def run_startup_backfill(backfill):
+    """A failed backfill leaves its derived data stale but must not keep the API from starting"""
+    try:
+        await backfill()
+    except Exception:
+        logger.exception(f"Startup backfill {backfill.__name__} failed")
+
 @app.on_event("shutdown")
 async def shutdown_db_client():
     client.close()
+    if ANALYTICS_POOL["executor"] is not None:
+        ANALYTICS_POOL["executor"].shutdown(cancel_futures=True)
@@ -0,0 +1,138 @@
+"""
+Calendar and Availability Tests
+Tests for:
+- Month calendar with batched name lookups and per-month cache
+- Year occupancy heatmap served from the daily rollup
+- Public availability and venues caching headers
+- Next free slot search
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+# Test credentials
+TENANT_ADMIN_EMAIL = "admin@mayurbanquet.com"
+TENANT_ADMIN_PASSWORD = "admin123"
+
+
+class TestCalendar:
+    """Month calendar and year heatmap tests"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup test session with auth"""
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+
+        login_response = self.session.post(f"{BASE_URL}/api/auth/login", json={
+            "email": TENANT_ADMIN_EMAIL,
+            "password": TENANT_ADMIN_PASSWORD
+        })
+
+        if login_response.status_code == 200:
+            token = login_response.json().get("token")
+            self.session.headers.update({"Authorization": f"Bearer {token}"})
+        else:
+            pytest.skip(f"Login failed: {login_response.status_code} - {login_response.text}")
+
+    def _first_active_booking(self):
+        bookings = self.session.get(f"{BASE_URL}/api/bookings").json()
+        booking = next((b for b in bookings if b.get('status') != 'cancelled'), None)
+        if not booking:
+            pytest.skip("No active booking in tenant")
+        return booking
+
+    def test_01_calendar_resolves_names(self):
+        """Test GET /api/calendar returns events with hall names for the booking's month"""
+        booking = self._first_active_booking()
+        year, month = int(booking['event_date'][:4]), int(booking['event_date'][5:7])
+
+        response = self.session.get(f"{BASE_URL}/api/calendar", params={"month": month, "year": year})
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        events = response.json()
+        event = next(e for e in events if e['id'] == booking['id'])
+        assert event['hall'] != 'Unknown'
+        assert event['date'] == booking['event_date']
+
+        # Second call is served from the month cache and must be identical
+        again = self.session.get(f"{BASE_URL}/api/calendar", params={"month": month, "year": year})
+        assert again.json() == events
+        print(f"✓ Calendar {year}-{month:02d} has {len(events)} events")
+
+    def test_02_heatmap_matches_bookings(self):
+        """Test GET /api/calendar/heatmap marks the booking's hall and slot as taken"""
+        booking = self._first_active_booking()
+        year = int(booking['event_date'][:4])
+
+        rebuild = self.session.post(f"{BASE_URL}/api/calendar/heatmap/rebuild")
+        assert rebuild.status_code == 200
+
+        response = self.session.get(f"{BASE_URL}/api/calendar/heatmap", params={"year": year})
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        data = response.json()
+        assert len(data['booked']) in (365, 366)
+        assert len(data['free_slots']) == len(data['booked'])
+
+        hall_ids = [h['id'] for h in data['halls']]
+        if booking['hall_id'] in hall_ids:
+            from datetime import date
+            day = (date.fromisoformat(booking['event_date']) - date(year, 1, 1)).days
+            bit = data['slots'].index(booking.get('slot', 'day'))
+            assert data['booked'][day][hall_ids.index(booking['hall_id'])] & (1 << bit)
+        print(f"✓ Heatmap for {year} covers {len(data['halls'])} halls")
+
+    def test_03_search_skips_booked_slots(self):
+        """Test GET /api/availability/search never offers a slot that is already booked"""
+        booking = self._first_active_booking()
+        response = self.session.get(f"{BASE_URL}/api/availability/search", params={
+            "from": booking['event_date'], "to": booking['event_date'], "limit": 100
+        })
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        results = response.json()['results']
+        taken = (booking['hall_id'], booking['event_date'], booking.get('slot', 'day'))
+        assert taken not in [(r['hall_id'], r['date'], r['slot']) for r in results]
+
+        capacity = self.session.get(f"{BASE_URL}/api/availability/search", params={
+            "from": booking['event_date'], "min_capacity": 100000
+        })
+        assert capacity.json()['results'] == []
+
+        too_long = self.session.get(f"{BASE_URL}/api/availability/search", params={
+            "from": "2020-01-01", "to": "2030-01-01"
+        })
+        assert too_long.status_code == 400
+        print(f"✓ {len(results)} free slots on {booking['event_date']}")
+
+
+class TestPublicAvailability:
+    """Public (unauthenticated) availability endpoint tests"""
+
+    def test_01_venues_etag_revalidation(self):
+        """Test GET /api/public/venues sends an ETag and answers 304 when it matches"""
+        response = requests.get(f"{BASE_URL}/api/public/venues")
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        assert isinstance(response.json(), list)
+        etag = response.headers.get("ETag")
+        assert etag
+        assert "max-age" in response.headers.get("Cache-Control", "")
+
+        revalidated = requests.get(f"{BASE_URL}/api/public/venues", headers={"If-None-Match": etag})
+        assert revalidated.status_code == 304
+        print(f"✓ Public venues cached with ETag {etag}")
+
+    def test_02_availability_shape(self):
+        """Test GET /api/availability keeps its response shape and caching headers"""
+        response = requests.get(f"{BASE_URL}/api/availability", params={"date": "2030-01-15"})
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        data = response.json()
+        assert data["date"] == "2030-01-15"
+        assert "available_halls" in data
+        assert "booked_slots" in data
+        assert response.headers.get("ETag")
+        print(f"✓ {len(data['available_halls'])} halls available on 2030-01-15")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
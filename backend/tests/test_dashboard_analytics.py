@@ -0,0 +1,337 @@
+"""
+Dashboard and Analytics Tests
+Tests for:
+- Dashboard stat tiles from a single aggregation
+- Monthly revenue chart by calendar month
+- Daily rollup rebuild
+- Materialized alerts with resolve/dismiss state
+- Hall utilization from the occupancy matrix
+- Multi-hall idle days with weekend flags
+- Multi-year peak seasons with year-over-year changes
+- Customer, event mix, guest, discount and repeat-customer analytics
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+# Test credentials
+TENANT_ADMIN_EMAIL = "admin@mayurbanquet.com"
+TENANT_ADMIN_PASSWORD = "admin123"
+
+
+class TestDashboardStats:
+    """Dashboard stats tests"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup test session with auth"""
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+
+        login_response = self.session.post(f"{BASE_URL}/api/auth/login", json={
+            "email": TENANT_ADMIN_EMAIL,
+            "password": TENANT_ADMIN_PASSWORD
+        })
+
+        if login_response.status_code == 200:
+            token = login_response.json().get("token")
+            self.session.headers.update({"Authorization": f"Bearer {token}"})
+        else:
+            pytest.skip(f"Login failed: {login_response.status_code} - {login_response.text}")
+
+    def test_01_stats_tiles(self):
+        """Test GET /api/dashboard/stats returns every tile with named recent bookings"""
+        response = self.session.get(f"{BASE_URL}/api/dashboard/stats")
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        data = response.json()
+        for tile in ["total_bookings", "upcoming_events", "monthly_revenue", "pending_payments", "new_enquiries"]:
+            assert tile in data
+            assert data[tile] >= 0
+        assert len(data["recent_bookings"]) <= 5
+        for booking in data["recent_bookings"]:
+            assert "customer_name" in booking
+            assert "hall_name" in booking
+            assert "_id" not in booking
+        print(f"✓ Dashboard: {data['total_bookings']} bookings this month, {data['new_enquiries']} new enquiries")
+
+    def test_02_recent_bookings_newest_first(self):
+        """Test recent bookings are sorted by creation time, newest first"""
+        data = self.session.get(f"{BASE_URL}/api/dashboard/stats").json()
+        created = [b["created_at"] for b in data["recent_bookings"]]
+        assert created == sorted(created, reverse=True)
+        print("✓ Recent bookings sorted newest first")
+
+    def test_03_revenue_chart_calendar_months(self):
+        """Test GET /api/dashboard/revenue-chart returns consecutive calendar months with mode breakdown"""
+        response = self.session.get(f"{BASE_URL}/api/dashboard/revenue-chart", params={"months": 12})
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        data = response.json()
+        assert len(data) == 12
+
+        periods = [m["period"] for m in data]
+        assert len(set(periods)) == 12, "Months must not repeat"
+        for prev, cur in zip(periods, periods[1:]):
+            year, month = int(prev[:4]), int(prev[5:])
+            expected = f"{year + 1}-01" if month == 12 else f"{year}-{month + 1:02d}"
+            assert cur == expected, f"Gap between {prev} and {cur}"
+
+        for m in data:
+            assert abs(sum(m["by_mode"].values()) - m["revenue"]) < 0.01
+        print(f"✓ Revenue chart {periods[0]} to {periods[-1]}")
+
+    def test_04_revenue_chart_default(self):
+        """Test the default chart still returns six months with month and revenue keys"""
+        data = self.session.get(f"{BASE_URL}/api/dashboard/revenue-chart").json()
+        assert len(data) == 6
+        assert all("month" in m and "revenue" in m for m in data)
+        print("✓ Default revenue chart has 6 months")
+
+    def test_05_rollup_rebuild_keeps_chart(self):
+        """Test POST /api/reports/rollups/rebuild is idempotent for the revenue chart"""
+        first = self.session.post(f"{BASE_URL}/api/reports/rollups/rebuild")
+        assert first.status_code == 200, f"Expected 200, got {first.status_code}: {first.text}"
+        before = self.session.get(f"{BASE_URL}/api/dashboard/revenue-chart", params={"months": 12}).json()
+
+        second = self.session.post(f"{BASE_URL}/api/reports/rollups/rebuild")
+        assert second.json()["documents"] == first.json()["documents"]
+        after = self.session.get(f"{BASE_URL}/api/dashboard/revenue-chart", params={"months": 12}).json()
+
+        assert [m["revenue"] for m in after] == [m["revenue"] for m in before]
+        print(f"✓ Rebuilt {first.json()['documents']} rollup documents")
+
+
+class TestAlerts:
+    """Materialized alerts tests"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup test session with auth"""
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+
+        login_response = self.session.post(f"{BASE_URL}/api/auth/login", json={
+            "email": TENANT_ADMIN_EMAIL,
+            "password": TENANT_ADMIN_PASSWORD
+        })
+
+        if login_response.status_code == 200:
+            token = login_response.json().get("token")
+            self.session.headers.update({"Authorization": f"Bearer {token}"})
+            self.user = login_response.json().get("user")
+        else:
+            pytest.skip(f"Login failed: {login_response.status_code} - {login_response.text}")
+
+    def test_01_evaluate_and_list_open_alerts(self):
+        """Test POST /api/alerts/evaluate then GET /api/alerts returns the tenant's open alerts by priority"""
+        response = self.session.post(f"{BASE_URL}/api/alerts/evaluate")
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        open_count = response.json()["open_alerts"]
+
+        alerts = self.session.get(f"{BASE_URL}/api/alerts", params={"limit": 1000}).json()
+        assert len(alerts) == min(open_count, 1000)
+        ranks = [{"high": 0, "medium": 1, "low": 2}[a["priority"]] for a in alerts]
+        assert ranks == sorted(ranks), "Alerts should be sorted by priority"
+        for alert in alerts:
+            assert alert["status"] == "open" and alert["is_resolved"] is False
+            assert alert["tenant_id"] == self.user.get("tenant_id")
+        print(f"✓ {len(alerts)} open alerts")
+
+    def test_02_dismissed_alert_stays_closed(self):
+        """Test a dismissed alert leaves the open list and survives re-evaluation"""
+        alerts = self.session.get(f"{BASE_URL}/api/alerts").json()
+        if not alerts:
+            pytest.skip("No open alerts to dismiss")
+        alert_id = alerts[0]["id"]
+
+        response = self.session.put(f"{BASE_URL}/api/alerts/{alert_id}/dismiss")
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        assert response.json()["status"] == "dismissed"
+
+        self.session.post(f"{BASE_URL}/api/alerts/evaluate")
+        open_ids = [a["id"] for a in self.session.get(f"{BASE_URL}/api/alerts", params={"limit": 1000}).json()]
+        dismissed_ids = [a["id"] for a in self.session.get(f"{BASE_URL}/api/alerts", params={"status": "dismissed", "limit": 1000}).json()]
+        assert alert_id not in open_ids
+        assert alert_id in dismissed_ids
+        print(f"✓ Alert {alert_id} stays dismissed")
+
+    def test_03_unknown_alert_and_status(self):
+        """Test 404 for an unknown alert and 400 for an unknown status filter"""
+        assert self.session.put(f"{BASE_URL}/api/alerts/alert-missing/resolve").status_code == 404
+        assert self.session.get(f"{BASE_URL}/api/alerts", params={"status": "snoozed"}).status_code == 400
+        print("✓ Alert errors handled")
+
+
+class TestHallUtilization:
+    """Hall utilization analytics tests"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup test session with auth"""
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+
+        login_response = self.session.post(f"{BASE_URL}/api/auth/login", json={
+            "email": TENANT_ADMIN_EMAIL,
+            "password": TENANT_ADMIN_PASSWORD
+        })
+
+        if login_response.status_code == 200:
+            token = login_response.json().get("token")
+            self.session.headers.update({"Authorization": f"Bearer {token}"})
+        else:
+            pytest.skip(f"Login failed: {login_response.status_code} - {login_response.text}")
+
+    def test_01_multi_year_utilization(self):
+        """Test GET /api/analytics/hall-utilization over three years keeps the day and slot splits consistent"""
+        response = self.session.get(f"{BASE_URL}/api/analytics/hall-utilization", params={
+            "start_date": "2024-01-01", "end_date": "2026-12-31"
+        })
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        data = response.json()
+        period = data["period"]
+        assert period["total_days"] == 1096
+        assert period["weekdays"] + period["weekend_days"] == period["total_days"]
+
+        for hall in data["halls"]:
+            assert hall["booked_days"] + hall["idle_days"] == period["total_days"]
+            assert hall["weekday"]["booked_days"] + hall["weekend"]["booked_days"] == hall["booked_days"]
+            assert hall["booked_days"] <= hall["booked_slots"] <= hall["booked_days"] * len(data["slots"])
+            assert hall["longest_idle_streak"]["days"] <= hall["idle_days"]
+            assert abs(hall["weekday"]["revenue"] + hall["weekend"]["revenue"] - hall["total_revenue"]) < 0.01
+        revenues = [h["total_revenue"] for h in data["halls"]]
+        assert revenues == sorted(revenues, reverse=True)
+        print(f"✓ Utilization for {len(data['halls'])} halls over {period['total_days']} days")
+
+    def test_02_invalid_range(self):
+        """Test reversed or malformed ranges are rejected"""
+        reversed_range = self.session.get(f"{BASE_URL}/api/analytics/hall-utilization", params={
+            "start_date": "2026-12-31", "end_date": "2026-01-01"
+        })
+        assert reversed_range.status_code == 400
+        malformed = self.session.get(f"{BASE_URL}/api/analytics/hall-utilization", params={
+            "start_date": "2026-13-01", "end_date": "2026-12-31"
+        })
+        assert malformed.status_code == 400
+        print("✓ Invalid ranges rejected")
+
+    def test_03_idle_days_all_halls(self):
+        """Test GET /api/analytics/idle-days without hall_id covers every hall with consistent runs"""
+        response = self.session.get(f"{BASE_URL}/api/analytics/idle-days", params={
+            "start_date": "2024-01-01", "end_date": "2026-12-31"
+        })
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        data = response.json()
+        for hall in data["halls"]:
+            assert hall["total_idle_days"] == len(hall["idle_dates"])
+            assert set(hall["weekend_idle_dates"]) <= set(hall["idle_dates"])
+            assert sum(r["days"] for r in hall["idle_runs"]) == hall["total_idle_days"]
+            assert sum(r["weekend_days"] for r in hall["idle_runs"]) == hall["total_weekend_idle_days"]
+        weekend_idle = [h["total_weekend_idle_days"] for h in data["halls"]]
+        assert weekend_idle == sorted(weekend_idle, reverse=True)
+        print(f"✓ {data['total_weekend_idle_days']} weekend idle days across {len(data['halls'])} halls")
+
+    def test_04_idle_days_single_hall(self):
+        """Test hall_id returns that hall's entry in the original shape"""
+        all_halls = self.session.get(f"{BASE_URL}/api/analytics/idle-days", params={
+            "start_date": "2026-01-01", "end_date": "2026-03-31"
+        }).json()["halls"]
+        if not all_halls:
+            pytest.skip("No halls")
+        expected = all_halls[0]
+        response = self.session.get(f"{BASE_URL}/api/analytics/idle-days", params={
+            "hall_id": expected["hall_id"], "start_date": "2026-01-01", "end_date": "2026-03-31"
+        })
+        assert response.status_code == 200
+        data = response.json()
+        assert data["hall_name"] == expected["hall_name"]
+        assert data["idle_dates"] == expected["idle_dates"]
+        print(f"✓ {data['hall_name']} idle {data['total_idle_days']} days")
+    def test_05_peak_seasons_multi_year(self):
+        """Test GET /api/analytics/peak-seasons over three years chains YoY changes between years"""
+        response = self.session.get(f"{BASE_URL}/api/analytics/peak-seasons", params={"year": 2026, "years": 3})
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        data = response.json()
+        assert [y["year"] for y in data["years"]] == [2024, 2025, 2026]
+        assert data["year"] == 2026 and data["monthly_data"] == data["years"][-1]["monthly_data"]
+
+        for previous, current in zip(data["years"], data["years"][1:]):
+            assert len(current["monthly_data"]) == 12
+            for prev_month, month in zip(previous["monthly_data"], current["monthly_data"]):
+                assert month["yoy"]["bookings"]["change"] == month["bookings"] - prev_month["bookings"]
+            assert current["total_bookings"] == sum(m["bookings"] for m in current["monthly_data"])
+        print(f"✓ Peak seasons for {len(data['years'])} years, 2026 peak {data['peak_month']}")
+
+    def test_06_peak_seasons_single_year_matches(self):
+        """Test the single-year call returns the same months as the multi-year call"""
+        single = self.session.get(f"{BASE_URL}/api/analytics/peak-seasons", params={"year": 2025}).json()
+        multi = self.session.get(f"{BASE_URL}/api/analytics/peak-seasons", params={"year": 2026, "years": 2}).json()
+        assert single["monthly_data"] == multi["years"][0]["monthly_data"]
+        assert self.session.get(f"{BASE_URL}/api/analytics/peak-seasons", params={"year": 2026, "years": 50}).status_code == 400
+        print("✓ Single and multi-year peak seasons agree")
+
+class TestBookingAnalytics:
+    """Process-pool booking analytics tests"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup test session with auth"""
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+
+        login_response = self.session.post(f"{BASE_URL}/api/auth/login", json={
+            "email": TENANT_ADMIN_EMAIL,
+            "password": TENANT_ADMIN_PASSWORD
+        })
+
+        if login_response.status_code == 200:
+            token = login_response.json().get("token")
+            self.session.headers.update({"Authorization": f"Bearer {token}"})
+        else:
+            pytest.skip(f"Login failed: {login_response.status_code} - {login_response.text}")
+
+    def get(self, path, **params):
+        response = self.session.get(f"{BASE_URL}/api/analytics/{path}", params=params)
+        if response.status_code == 403:
+            pytest.skip("Analytics feature not enabled for tenant")
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        return response.json()
+
+    def test_01_customer_lifetime_value(self):
+        """Test GET /api/analytics/customer-lifetime-value ranks customers by revenue"""
+        data = self.get("customer-lifetime-value", top=5)
+        values = [c["lifetime_value"] for c in data["top_customers"]]
+        assert len(values) <= 5
+        assert values == sorted(values, reverse=True)
+        assert all("name" in c for c in data["top_customers"])
+        print(f"✓ CLV over {data['customers']} customers")
+
+    def test_02_event_mix_and_repeat_customers_agree(self):
+        """Test event mix shares add up and repeat customers never exceed customers"""
+        mix = self.get("event-mix")
+        if mix["total_bookings"]:
+            assert abs(sum(e["booking_share"] for e in mix["event_types"]) - 100) < 1
+        repeat = self.get("repeat-customers")
+        assert repeat["repeat_customers"] <= repeat["customers"]
+        assert sum(m["bookings"] for m in repeat["months"]) == mix["total_bookings"]
+        print(f"✓ {len(mix['event_types'])} event types, repeat rate {repeat['repeat_rate']}%")
+
+    def test_03_guest_trends_and_discounts(self):
+        """Test guest trends cover consecutive months and discount totals match the monthly rows"""
+        trends = self.get("guest-trends", start_date="2024-01-01", end_date="2026-12-31", window=3)
+        assert trends["window"] == 3
+        assert [m["period"] for m in trends["months"]] == sorted(m["period"] for m in trends["months"])
+        leakage = self.get("discount-leakage", start_date="2024-01-01", end_date="2026-12-31")
+        assert abs(sum(m["discount"] for m in leakage["by_month"]) - leakage["discount"]) < 1
+        print(f"✓ Discount leakage {leakage['leakage_rate']}%")
+
+    def test_04_invalid_date(self):
+        """Test malformed dates are rejected"""
+        response = self.session.get(f"{BASE_URL}/api/analytics/event-mix", params={"start_date": "01-01-2026"})
+        assert response.status_code in (400, 403)
+        print("✓ Malformed date rejected")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
@@ -93,6 +93,26 @@ class TestEliteVendorSystem:
         
         print(f"✓ All {len(vendors)} vendors are active")
     
+    def test_vendor_directory_sorts_by_scorecard(self):
+        """GET /api/vendors/directory sorts and filters by precomputed vendor stats"""
+        refresh = self.session.post(f"{BASE_URL}/api/vendors/stats/refresh")
+        assert refresh.status_code == 200, f"Expected 200, got {refresh.status_code}: {refresh.text}"
+        
+        response = self.session.get(f"{BASE_URL}/api/vendors/directory", params={
+            "sort": "outstanding_exposure", "order": "desc", "max_cancellation_rate": 100
+        })
+        assert response.status_code == 200
+        vendors = response.json()
+        exposures = [v['stats']['outstanding_exposure'] for v in vendors if v['stats'].get('outstanding_exposure') is not None]
+        assert exposures == sorted(exposures, reverse=True)
+        for vendor in vendors:
+            assert set(vendor['stats']) >= {"events_served", "cancellation_rate", "avg_agreed_amount"}
+        
+        invalid = self.session.get(f"{BASE_URL}/api/vendors/directory", params={"sort": "phone"})
+        assert invalid.status_code == 400
+        
+        print(f"✓ Directory sorted by outstanding exposure across {len(vendors)} vendors")
+    
     # ==================== VENDOR LEDGER TESTS ====================
     
     def test_vendor_ledger_returns_transaction_history(self):
@@ -139,6 +159,154 @@ class TestEliteVendorSystem:
         assert response.status_code == 404, f"Expected 404, got {response.status_code}"
         print("✓ Invalid vendor ID returns 404")
     
+    def test_vendor_ledger_pages_carry_running_balance(self):
+        """GET /api/vendors/{id}/ledger pages newest-first with a running balance per row"""
+        vendor_data = {
+            "name": f"TEST_Vendor_{uuid.uuid4().hex[:6]}",
+            "vendor_type": "catering",
+            "phone": "9876543212"
+        }
+        create_response = self.session.post(f"{BASE_URL}/api/vendors", json=vendor_data)
+        assert create_response.status_code == 200
+        vendor_id = create_response.json()['id']
+        
+        entries = [("debit", 10000, "2024-01-01"), ("payment", 3000, "2024-01-02"),
+                   ("debit", 5000, "2024-01-03"), ("credit", 1000, "2024-01-04"),
+                   ("payment", 4000, "2024-01-05")]
+        for txn_type, amount, txn_date in entries:
+            response = self.session.post(f"{BASE_URL}/api/vendors/{vendor_id}/transactions", json={
+                "vendor_id": vendor_id, "transaction_type": txn_type,
+                "amount": amount, "transaction_date": txn_date
+            })
+            assert response.status_code == 200
+        
+        page1 = self.session.get(f"{BASE_URL}/api/vendors/{vendor_id}/ledger", params={"page": 1, "page_size": 2}).json()
+        page3 = self.session.get(f"{BASE_URL}/api/vendors/{vendor_id}/ledger", params={"page": 3, "page_size": 2}).json()
+        
+        assert page1['pagination']['total'] == 5
+        assert page1['pagination']['total_pages'] == 3
+        assert [t['running_balance'] for t in page1['transactions']] == [7000, 11000]
+        assert [t['running_balance'] for t in page3['transactions']] == [10000]
+        assert page1['transactions'][0]['running_balance'] == page1['summary']['balance']
+        
+        print(f"✓ Ledger pages carry running balances (closing balance {page1['summary']['balance']})")
+    
+    def test_vendor_balances_verify_without_drift(self):
+        """POST /api/vendors/balances/verify finds no drift after normal ledger writes"""
+        response = self.session.post(f"{BASE_URL}/api/vendors/balances/verify", params={"repair": "false"})
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        report = response.json()
+        assert report['vendors_drifted'] == 0, f"Unexpected drift: {report['drifted']}"
+        assert report['repaired'] is False
+        
+        audits = self.session.get(f"{BASE_URL}/api/vendors/balances/audits", params={"limit": 1}).json()
+        assert audits[0]['id'] == report['id']
+        
+        print(f"✓ Verified {report['vendors_checked']} vendor balances against the ledger")
+    
+    def test_vendor_balances_verify_counts_legacy_payments(self):
+        """add-payable and /vendor-payments writes are not reported as drift"""
+        vendor_data = {
+            "name": f"TEST_Vendor_{uuid.uuid4().hex[:6]}",
+            "vendor_type": "decor",
+            "phone": "9876543214"
+        }
+        create_response = self.session.post(f"{BASE_URL}/api/vendors", json=vendor_data)
+        assert create_response.status_code == 200
+        vendor_id = create_response.json()['id']
+        
+        payable = self.session.put(f"{BASE_URL}/api/vendors/{vendor_id}/add-payable", params={"amount": 5000})
+        assert payable.status_code == 200, f"Expected 200, got {payable.status_code}: {payable.text}"
+        payment = self.session.post(f"{BASE_URL}/api/vendor-payments", json={"vendor_id": vendor_id, "amount": 2000})
+        assert payment.status_code == 200, f"Expected 200, got {payment.status_code}: {payment.text}"
+        
+        report = self.session.post(f"{BASE_URL}/api/vendors/balances/verify", params={"repair": "false"}).json()
+        assert vendor_id not in [d['vendor_id'] for d in report['drifted']], f"Unexpected drift: {report['drifted']}"
+        
+        vendors = self.session.get(f"{BASE_URL}/api/vendors").json()
+        vendor = next(v for v in vendors if v['id'] == vendor_id)
+        assert vendor['total_payable'] == 5000
+        assert vendor['total_paid'] == 2000
+        assert vendor['outstanding_balance'] == 3000
+        
+        print("✓ Legacy payables and payments reconcile with the ledger")
+    
+    def test_vendor_aging_matches_payments_oldest_first(self):
+        """GET /api/vendors/aging buckets open debits after FIFO payment matching"""
+        vendor_data = {
+            "name": f"TEST_Vendor_{uuid.uuid4().hex[:6]}",
+            "vendor_type": "catering",
+            "phone": "9876543213"
+        }
+        create_response = self.session.post(f"{BASE_URL}/api/vendors", json=vendor_data)
+        assert create_response.status_code == 200
+        vendor_id = create_response.json()['id']
+        
+        entries = [("debit", 10000, "2024-01-01"), ("debit", 5000, "2024-02-20"), ("payment", 12000, "2024-03-01")]
+        for txn_type, amount, txn_date in entries:
+            response = self.session.post(f"{BASE_URL}/api/vendors/{vendor_id}/transactions", json={
+                "vendor_id": vendor_id, "transaction_type": txn_type,
+                "amount": amount, "transaction_date": txn_date
+            })
+            assert response.status_code == 200
+        
+        response = self.session.get(f"{BASE_URL}/api/vendors/aging", params={"as_of": "2024-03-31"})
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        row = next(r for r in response.json()['vendors'] if r['vendor_id'] == vendor_id)
+        
+        # The payment settles the January debit first, leaving 3000 of the February debit open
+        assert row['total_open'] == 3000
+        assert row['buckets']['31_60'] == 3000
+        assert row['oldest_open_date'] == "2024-02-20"
+        assert row['warning'] is True
+        
+        # Before the payment both debits were still open
+        response = self.session.get(f"{BASE_URL}/api/vendors/aging", params={"as_of": "2024-02-25"})
+        assert response.status_code == 200
+        row = next(r for r in response.json()['vendors'] if r['vendor_id'] == vendor_id)
+        assert row['total_open'] == 15000
+        assert row['oldest_open_date'] == "2024-01-01"
+        
+        print(f"✓ Aging report buckets {row['total_open']} open for test vendor")
+    
+    def test_vendor_schedule_lists_assigned_booking(self):
+        """GET /api/vendors/{id}/schedule shows the vendor's assignment on the booking's date and slot"""
+        bookings = self.session.get(f"{BASE_URL}/api/bookings").json()
+        booking = next((b for b in bookings if b.get('status') != 'cancelled'), None)
+        if not booking:
+            pytest.skip("No active booking to assign a vendor to")
+        
+        vendor_data = {
+            "name": f"TEST_Vendor_{uuid.uuid4().hex[:6]}",
+            "vendor_type": "dj",
+            "phone": "9876543214"
+        }
+        vendor_id = self.session.post(f"{BASE_URL}/api/vendors", json=vendor_data).json()['id']
+        assign = self.session.post(f"{BASE_URL}/api/bookings/{booking['id']}/vendors", json={
+            "booking_id": booking['id'], "vendor_id": vendor_id
+        })
+        assert assign.status_code == 200, f"Expected 200, got {assign.status_code}: {assign.text}"
+        
+        response = self.session.get(f"{BASE_URL}/api/vendors/{vendor_id}/schedule", params={
+            "start": booking['event_date'], "end": booking['event_date']
+        })
+        assert response.status_code == 200
+        entries = response.json()['entries']
+        assert [e['booking_id'] for e in entries] == [booking['id']]
+        assert entries[0]['slot'] == booking.get('slot', 'day')
+        assert entries[0]['conflict'] is False
+        
+        print(f"✓ Vendor schedule shows booking on {booking['event_date']}")
+    
+    def test_vendor_schedule_rejects_malformed_dates(self):
+        """GET /api/vendors/{id}/schedule returns 400 for a malformed start date"""
+        vendors = self.session.get(f"{BASE_URL}/api/vendors").json()
+        if not vendors:
+            pytest.skip("No vendors")
+        response = self.session.get(f"{BASE_URL}/api/vendors/{vendors[0]['id']}/schedule", params={"start": "2024-13-45"})
+        assert response.status_code == 400
+        print("✓ Malformed schedule start rejected")
+    
     # ==================== TRANSACTION CREATION TESTS ====================
     
     def test_create_debit_transaction(self):
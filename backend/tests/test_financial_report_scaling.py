@@ -0,0 +1,245 @@
+"""
+Financial Report Scaling Tests
+Runs GET /api/reports/financial's handler in-process against an in-memory stand-in for the
+Motor collections it reads, and checks the work it does structurally:
+- One bookings query and one expense aggregation per run of uncached months, whatever the size
+- Name lookups batched per NAME_LOOKUP_CHUNK ids
+- Whole cached months are not re-queried; only a partly covered month is
+- Expenses join to their own booking
+- Queries issued and cursor batch sizes are the same at 10k and 50k bookings
+The wall-clock benchmark (10k to 50k bookings) is opt-in: set RUN_BENCHMARKS=1.
+Importing server does not open a database connection.
+"""
+import asyncio
+import gc
+import math
+import os
+import sys
+import time
+import random
+from collections import Counter
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MONGO_URL", "mongodb://localhost:27017")
+os.environ.setdefault("DB_NAME", "benchmark")
+
+server = pytest.importorskip("server")
+
+TENANT_ID = "tenant-benchmark"
+ADMIN = {"role": "admin", "tenant_id": TENANT_ID}
+SIZES = [10000, 25000, 50000]
+EXPENSES_PER_BOOKING = 3
+CATEGORIES = ["decor", "vendor", "staff", "logistics", "food", "utilities", "other"]
+
+
+class Cursor:
+    def __init__(self, docs, streamed, batch_sizes):
+        self.docs = docs
+        self.streamed = streamed
+        self.batch_sizes = batch_sizes
+
+    def batch_size(self, size):
+        self.batch_sizes.append(size)
+        return self
+
+    async def __aiter__(self):
+        for doc in self.docs:
+            self.streamed[0] += 1
+            yield doc
+
+
+class Collection:
+    """The find/aggregate subset the financial report uses, counting queries and streamed documents"""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.queries = 0
+        self.streamed = [0]
+        self.batch_sizes = []
+
+    def matches(self, doc, query):
+        for field, condition in query.items():
+            value = doc.get(field)
+            if not isinstance(condition, dict):
+                if value != condition:
+                    return False
+            elif "$in" in condition and value not in condition["$in"]:
+                return False
+            elif "$gte" in condition and not condition["$gte"] <= value <= condition["$lte"]:
+                return False
+            elif "$ne" in condition and value == condition["$ne"]:
+                return False
+        return True
+
+    def find(self, query, projection=None):
+        self.queries += 1
+        query = {
+            field: {**condition, "$in": set(condition["$in"])} if isinstance(condition, dict) and "$in" in condition else condition
+            for field, condition in query.items()
+        }
+        return Cursor([doc for doc in self.docs if self.matches(doc, query)], self.streamed, self.batch_sizes)
+
+    def aggregate(self, pipeline, batchSize=None):
+        # Only the expense grouping: $match, then $group on (month, booking, category)
+        self.queries += 1
+        if batchSize:
+            self.batch_sizes.append(batchSize)
+        groups = {}
+        for doc in self.docs:
+            if self.matches(doc, pipeline[0]["$match"]):
+                key = (doc["date"][:7], doc.get("booking_id"), doc.get("category"))
+                groups[key] = groups.get(key, 0) + doc["amount"]
+        return Cursor([
+            {"_id": {"month": month, "booking_id": booking_id, "category": category}, "amount": amount}
+            for (month, booking_id, category), amount in groups.items()
+        ], self.streamed, self.batch_sizes)
+
+
+class Database:
+    def __init__(self, bookings, expenses, customers, halls):
+        self.bookings = Collection(bookings)
+        self.expenses = Collection(expenses)
+        self.customers = Collection([{"id": k, "name": v, "tenant_id": TENANT_ID} for k, v in customers.items()])
+        self.halls = Collection([{"id": k, "name": v, "tenant_id": TENANT_ID} for k, v in halls.items()])
+
+    def queries(self):
+        return Counter({name: getattr(self, name).queries for name in ("bookings", "expenses", "customers", "halls")})
+
+
+def synthetic_report_input(bookings_count):
+    rng = random.Random(bookings_count)
+    customers = {f"cust-{i}": f"Customer {i}" for i in range(bookings_count // 3)}
+    halls = {f"hall-{i}": f"Hall {i}" for i in range(50)}
+    customer_ids, hall_ids = list(customers), list(halls)
+    bookings, expenses = [], []
+    for i in range(bookings_count):
+        event_date = f"2025-{rng.randint(1, 12):02d}-{rng.randint(1, 28):02d}"
+        total = rng.randint(50000, 500000)
+        bookings.append({
+            "id": f"booking-{i}", "booking_number": f"MSB-{i:06d}", "tenant_id": TENANT_ID,
+            "customer_id": rng.choice(customer_ids), "hall_id": rng.choice(hall_ids),
+            "event_date": event_date, "event_type": "wedding", "status": "confirmed",
+            "total_amount": total, "advance_paid": total * 0.3
+        })
+        for _ in range(EXPENSES_PER_BOOKING):
+            expenses.append({"date": event_date, "booking_id": f"booking-{i}", "tenant_id": TENANT_ID,
+                             "category": rng.choice(CATEGORIES), "amount": rng.randint(100, 5000)})
+    return bookings, expenses, customers, halls
+
+
+@pytest.fixture
+def report_db(monkeypatch):
+    """Install an in-memory database for a size and return it; the month cache starts empty"""
+    def install(size):
+        database = Database(*synthetic_report_input(size))
+        monkeypatch.setattr(server, "db", database)
+        server.REPORT_MONTH_CACHE.clear()
+        return database
+    yield install
+    server.REPORT_MONTH_CACHE.clear()
+
+
+def financial_report(start_date, end_date):
+    return asyncio.run(server.get_financial_report(start_date, end_date, current_user=ADMIN))
+
+
+class TestFinancialReportScaling:
+    """Financial report query shape tests"""
+
+    @pytest.mark.parametrize("size", [1000, 50000])
+    def test_01_queries_do_not_grow_with_bookings(self, report_db, size):
+        """Test a year of uncached months costs one bookings query and one expense aggregation"""
+        database = report_db(size)
+        report = financial_report("2025-01-01", "2025-12-31")
+
+        customers = len({b["customer_id"] for b in database.bookings.docs})
+        assert database.queries() == Counter({
+            "bookings": 1, "expenses": 1, "customers": math.ceil(customers / server.NAME_LOOKUP_CHUNK), "halls": 1
+        })
+        # Each booking is read once; expenses arrive pre-summed per (month, booking, category)
+        assert database.bookings.streamed[0] == size
+        assert database.expenses.streamed[0] <= len(database.expenses.docs)
+        assert report["summary"]["total_events"] == size
+        assert abs(report["expenses"]["total"] - sum(e["amount"] for e in database.expenses.docs)) < 0.01
+        print(f"✓ {size} bookings in {sum(database.queries().values())} queries")
+
+    def test_02_cached_months_are_not_requeried(self, report_db):
+        """Test a range inside cached months issues no queries and a mid-month start only queries that month"""
+        database = report_db(5000)
+        financial_report("2025-01-01", "2025-12-31")
+
+        before = database.queries()
+        whole = financial_report("2025-03-01", "2025-06-30")
+        assert database.queries() - before == Counter({"customers": 1, "halls": 1})
+
+        before = database.queries()
+        partial = financial_report("2025-03-10", "2025-06-30")
+        assert database.queries() - before == Counter({"bookings": 1, "expenses": 1, "customers": 1, "halls": 1})
+
+        march_first_days = sum(1 for b in database.bookings.docs if "2025-03-01" <= b["event_date"] < "2025-03-10")
+        assert partial["summary"]["total_events"] == whole["summary"]["total_events"] - march_first_days
+        print("✓ Cached whole months served without queries")
+
+    def test_03_expenses_join_to_their_booking(self, report_db):
+        """Test each event's expenses and profit come from its own expense rows only"""
+        database = report_db(1000)
+        report = financial_report("2025-01-01", "2025-12-31")
+
+        expected = {}
+        for expense in database.expenses.docs:
+            expected[expense["booking_id"]] = expected.get(expense["booking_id"], 0) + expense["amount"]
+        names = {c["id"]: c["name"] for c in database.customers.docs}
+        events = {event["booking_number"]: event for event in report["event_breakdown"]}
+        for booking in database.bookings.docs:
+            event = events[booking["booking_number"]]
+            assert event["expenses"] == expected.get(booking["id"], 0)
+            assert event["profit"] == booking["total_amount"] - event["expenses"]
+            assert event["customer"] == names[booking["customer_id"]]
+        print("✓ Expenses joined to the right bookings")
+
+    def test_04_query_shape_constant_from_10k_to_50k(self, report_db):
+        """Test 10k and 50k bookings issue the same queries with the same cursor batch sizes"""
+        shapes = {}
+        for size in (SIZES[0], SIZES[-1]):
+            database = report_db(size)
+            financial_report("2025-01-01", "2025-12-31")
+            customers = len({b["customer_id"] for b in database.bookings.docs})
+            queries = database.queries()
+            # Customer names are the one lookup batched by id count, NAME_LOOKUP_CHUNK per query
+            assert queries.pop("customers") == math.ceil(customers / server.NAME_LOOKUP_CHUNK)
+            shapes[size] = (
+                queries,
+                database.bookings.batch_sizes,
+                database.expenses.batch_sizes
+            )
+        assert shapes[SIZES[0]] == shapes[SIZES[-1]]
+        assert shapes[SIZES[-1]][1] == [server.FINANCIAL_BATCH_SIZE]
+        assert shapes[SIZES[-1]][2] == [server.FINANCIAL_BATCH_SIZE]
+        print(f"✓ {SIZES[0]} and {SIZES[-1]} bookings: {dict(shapes[SIZES[0]][0])} plus customer chunks")
+
+    @pytest.mark.skipif(not os.environ.get("RUN_BENCHMARKS"), reason="timing benchmark; set RUN_BENCHMARKS=1")
+    def test_05_benchmark_cost_per_booking(self, report_db):
+        """Benchmark: cost per booking at 50k stays within 2x of the cost at 10k"""
+        per_booking = {}
+        for size in SIZES:
+            report_db(size)
+            timings = []
+            gc.disable()
+            try:
+                for _ in range(3):
+                    server.REPORT_MONTH_CACHE.clear()
+                    started = time.perf_counter()
+                    financial_report("2025-01-01", "2025-12-31")
+                    timings.append(time.perf_counter() - started)
+            finally:
+                gc.enable()
+            per_booking[size] = min(timings) / size
+            print(f"✓ {size:>6} bookings: {min(timings) * 1000:7.1f} ms ({per_booking[size] * 1e6:.2f} µs/booking)")
+
+        assert per_booking[SIZES[-1]] < 2 * per_booking[SIZES[0]], \
+            f"Cost per booking grew from {per_booking[SIZES[0]] * 1e6:.2f} to {per_booking[SIZES[-1]] * 1e6:.2f} µs"
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "-s", "--tb=short"])
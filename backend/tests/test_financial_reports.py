@@ -0,0 +1,86 @@
+"""
+Financial Report Tests
+Tests for:
+- Ranges assembled from cached months match the sum of their parts
+- Writes to a closed month show up in the next report
+"""
+import pytest
+import requests
+import os
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+# Test credentials
+TENANT_ADMIN_EMAIL = "admin@mayurbanquet.com"
+TENANT_ADMIN_PASSWORD = "admin123"
+
+
+class TestFinancialReport:
+    """Financial report tests"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup test session with auth"""
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+
+        login_response = self.session.post(f"{BASE_URL}/api/auth/login", json={
+            "email": TENANT_ADMIN_EMAIL,
+            "password": TENANT_ADMIN_PASSWORD
+        })
+
+        if login_response.status_code == 200:
+            token = login_response.json().get("token")
+            self.session.headers.update({"Authorization": f"Bearer {token}"})
+            if login_response.json().get("user", {}).get("role") != "admin":
+                pytest.skip("Financial report restricted to admin role")
+        else:
+            pytest.skip(f"Login failed: {login_response.status_code} - {login_response.text}")
+
+    def report(self, start_date, end_date):
+        response = self.session.get(f"{BASE_URL}/api/reports/financial", params={
+            "start_date": start_date, "end_date": end_date
+        })
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        return response.json()
+
+    def test_01_overlapping_ranges_agree(self):
+        """Test a range equals the sum of two adjacent sub-ranges, including mid-month boundaries"""
+        whole = self.report("2025-01-10", "2025-06-20")
+        first = self.report("2025-01-10", "2025-03-14")
+        second = self.report("2025-03-15", "2025-06-20")
+
+        assert whole["summary"]["total_events"] == first["summary"]["total_events"] + second["summary"]["total_events"]
+        assert abs(whole["revenue"]["total"] - first["revenue"]["total"] - second["revenue"]["total"]) < 0.05
+        dates = [e["event_date"] for e in whole["event_breakdown"]]
+        assert all("2025-01-10" <= d <= "2025-06-20" for d in dates)
+        print(f"✓ {whole['summary']['total_events']} events split consistently across ranges")
+
+    def test_02_expense_in_closed_month_is_reported(self):
+        """Test POST /api/expenses dated in a past month is reflected in the next report"""
+        before = self.report("2025-02-01", "2025-02-28")["expenses"]["total"]
+        created = self.session.post(f"{BASE_URL}/api/expenses", json={
+            "category": "other", "description": "TEST_report_cache", "amount": 1234, "date": "2025-02-14"
+        })
+        assert created.status_code == 200, f"Expected 200, got {created.status_code}: {created.text}"
+        try:
+            after = self.report("2025-02-01", "2025-02-28")["expenses"]["total"]
+            assert abs(after - before - 1234) < 0.01
+        finally:
+            self.session.delete(f"{BASE_URL}/api/expenses/{created.json()['id']}")
+
+        restored = self.report("2025-02-01", "2025-02-28")["expenses"]["total"]
+        assert abs(restored - before) < 0.01
+        print("✓ Expense writes invalidate the cached month")
+
+    def test_03_invalid_range(self):
+        """Test a reversed range is rejected"""
+        response = self.session.get(f"{BASE_URL}/api/reports/financial", params={
+            "start_date": "2025-06-01", "end_date": "2025-01-01"
+        })
+        assert response.status_code == 400
+        print("✓ Reversed range rejected")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
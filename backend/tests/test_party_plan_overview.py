@@ -0,0 +1,277 @@
+"""
+Party Planning Overview Tests
+Tests for:
+- Readiness board served from materialized scores
+- Batch readiness refresh
+- Change warnings derived from the plan's booking snapshot
+- Confirmed bookings with party plan summary and cursor paging
+- Portfolio profit snapshots (JSON table and CSV stream)
+"""
+import pytest
+import requests
+import os
+from datetime import datetime, timedelta
+
+BASE_URL = os.environ.get('REACT_APP_BACKEND_URL', '').rstrip('/')
+
+# Test credentials
+TENANT_ADMIN_EMAIL = "admin@mayurbanquet.com"
+TENANT_ADMIN_PASSWORD = "admin123"
+
+
+class TestReadinessBoard:
+    """Readiness board tests"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup test session with auth"""
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+
+        login_response = self.session.post(f"{BASE_URL}/api/auth/login", json={
+            "email": TENANT_ADMIN_EMAIL,
+            "password": TENANT_ADMIN_PASSWORD
+        })
+
+        if login_response.status_code == 200:
+            token = login_response.json().get("token")
+            self.session.headers.update({"Authorization": f"Bearer {token}"})
+        else:
+            pytest.skip(f"Login failed: {login_response.status_code} - {login_response.text}")
+
+    def test_01_refresh_readiness_board(self):
+        """Test POST /api/party-plans/readiness-board/refresh re-scores upcoming plans"""
+        response = self.session.post(f"{BASE_URL}/api/party-plans/readiness-board/refresh")
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        data = response.json()
+        assert "evaluated" in data
+        assert data["evaluated"] >= 0
+        print(f"✓ Refreshed {data['evaluated']} party plans")
+
+    def test_02_get_readiness_board(self):
+        """Test GET /api/party-plans/readiness-board returns sorted upcoming events"""
+        response = self.session.get(f"{BASE_URL}/api/party-plans/readiness-board")
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        data = response.json()
+        assert "period" in data
+        assert "events" in data
+        assert data["total_events"] == len(data["events"])
+
+        dates = [e["readiness_context"]["event_date"] for e in data["events"]]
+        assert dates == sorted(dates), "Board should be sorted by event date"
+        for event in data["events"]:
+            assert 0 <= event["readiness_score"] <= 100
+            assert data["period"]["start"] <= event["readiness_context"]["event_date"] <= data["period"]["end"]
+        print(f"✓ Readiness board has {data['total_events']} events")
+
+    def test_03_board_not_shadowed_by_plan_route(self):
+        """Test readiness-board is not captured by GET /api/party-plans/{booking_id}"""
+        response = self.session.get(f"{BASE_URL}/api/party-plans/readiness-board", params={"days": 7})
+        assert response.status_code == 200
+        assert isinstance(response.json(), dict)
+        assert "events" in response.json()
+        print("✓ Readiness board route resolves correctly")
+
+    def test_04_days_bounded(self):
+        """Test the board horizon is validated"""
+        for days in (0, 366):
+            response = self.session.get(f"{BASE_URL}/api/party-plans/readiness-board", params={"days": days})
+            assert response.status_code == 422, f"days={days}: expected 422, got {response.status_code}"
+        print("✓ Out-of-range days rejected")
+
+    def test_05_moved_booking_leaves_old_date(self):
+        """Test PUT /api/bookings/{id} with a new date re-scores the plan's board entry"""
+        board = self.session.get(f"{BASE_URL}/api/party-plans/readiness-board").json()
+        if not board["events"]:
+            pytest.skip("No upcoming party plans to move")
+        event = board["events"][0]
+        original_date = event["readiness_context"]["event_date"]
+        moved_date = (datetime.strptime(original_date, "%Y-%m-%d") + timedelta(days=200)).strftime("%Y-%m-%d")
+
+        response = self.session.put(f"{BASE_URL}/api/bookings/{event['booking_id']}", json={"event_date": moved_date})
+        if response.status_code != 200:
+            pytest.skip(f"Could not move booking: {response.status_code} - {response.text}")
+        try:
+            board = self.session.get(f"{BASE_URL}/api/party-plans/readiness-board").json()
+            assert event["booking_id"] not in [e["booking_id"] for e in board["events"]]
+            far = self.session.get(f"{BASE_URL}/api/party-plans/readiness-board", params={"days": 365}).json()
+            moved = [e for e in far["events"] if e["booking_id"] == event["booking_id"]]
+            assert moved and moved[0]["readiness_context"]["event_date"] == moved_date
+        finally:
+            self.session.put(f"{BASE_URL}/api/bookings/{event['booking_id']}", json={"event_date": original_date})
+        print(f"✓ Moved booking re-scored from {original_date} to {moved_date}")
+
+
+class TestBookingChangeWarnings:
+    """Party plan change warnings tests"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup test session with auth"""
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+
+        login_response = self.session.post(f"{BASE_URL}/api/auth/login", json={
+            "email": TENANT_ADMIN_EMAIL,
+            "password": TENANT_ADMIN_PASSWORD
+        })
+
+        if login_response.status_code == 200:
+            token = login_response.json().get("token")
+            self.session.headers.update({"Authorization": f"Bearer {token}"})
+        else:
+            pytest.skip(f"Login failed: {login_response.status_code} - {login_response.text}")
+
+    def guest_count_warnings(self, booking_id):
+        plan = self.session.get(f"{BASE_URL}/api/party-plans/{booking_id}").json()
+        return [w for w in plan.get("change_warnings", []) if w.startswith("Guest count changed")]
+
+    def test_01_warnings_follow_snapshot(self):
+        """Test repeated edits keep one warning per field and reverting clears it"""
+        plans = self.session.get(f"{BASE_URL}/api/party-plans").json()
+        plan = next((p for p in plans if p.get("booking_snapshot", {}).get("guest_count")
+                     and not self.guest_count_warnings(p["booking_id"])), None)
+        if not plan:
+            pytest.skip("No party plan with an unchanged guest count")
+        booking_id = plan["booking_id"]
+        original = plan["booking_snapshot"]["guest_count"]
+
+        try:
+            for guest_count in (original + 5, original + 10):
+                response = self.session.put(f"{BASE_URL}/api/bookings/{booking_id}", json={"guest_count": guest_count})
+                assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+            warnings = self.guest_count_warnings(booking_id)
+            assert warnings == [f"Guest count changed from {original} to {original + 10}"]
+        finally:
+            self.session.put(f"{BASE_URL}/api/bookings/{booking_id}", json={"guest_count": original})
+
+        assert self.guest_count_warnings(booking_id) == []
+        print("✓ Change warnings track the current drift from the plan snapshot")
+
+
+class TestConfirmedBookingsOverview:
+    """Confirmed bookings overview tests"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup test session with auth"""
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+
+        login_response = self.session.post(f"{BASE_URL}/api/auth/login", json={
+            "email": TENANT_ADMIN_EMAIL,
+            "password": TENANT_ADMIN_PASSWORD
+        })
+
+        if login_response.status_code == 200:
+            token = login_response.json().get("token")
+            self.session.headers.update({"Authorization": f"Bearer {token}"})
+            self.user = login_response.json().get("user")
+        else:
+            pytest.skip(f"Login failed: {login_response.status_code} - {login_response.text}")
+
+    def test_01_plan_summary_only(self):
+        """Test GET /api/confirmed-bookings embeds a plan summary, not the full plan"""
+        response = self.session.get(f"{BASE_URL}/api/confirmed-bookings")
+        if response.status_code == 403:
+            pytest.skip("Confirmed bookings restricted to admin role")
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        data = response.json()
+        assert isinstance(data, list)
+        for booking in data:
+            assert "has_party_plan" in booking
+            if booking["has_party_plan"]:
+                assert set(booking["party_plan"].keys()) <= {"id", "readiness_score", "booking_changed"}
+        print(f"✓ {len(data)} confirmed bookings with plan summaries")
+
+    def test_02_cursor_paging(self):
+        """Test paging with limit and X-Next-Cursor covers the same rows as one call"""
+        response = self.session.get(f"{BASE_URL}/api/confirmed-bookings", params={"limit": 500})
+        if response.status_code == 403:
+            pytest.skip("Confirmed bookings restricted to admin role")
+        all_ids = [b["id"] for b in response.json()]
+
+        paged_ids = []
+        cursor = None
+        for _ in range(len(all_ids) + 1):
+            params = {"limit": 2}
+            if cursor:
+                params["cursor"] = cursor
+            page = self.session.get(f"{BASE_URL}/api/confirmed-bookings", params=params)
+            assert page.status_code == 200
+            paged_ids.extend(b["id"] for b in page.json())
+            cursor = page.headers.get("X-Next-Cursor")
+            if not cursor:
+                break
+
+        assert paged_ids == all_ids, "Cursor pages should match the unpaged ordering"
+        print(f"✓ Cursor paging returned {len(paged_ids)} bookings")
+
+
+class TestProfitSnapshots:
+    """Portfolio profit snapshot tests"""
+
+    @pytest.fixture(autouse=True)
+    def setup(self):
+        """Setup test session with auth"""
+        self.session = requests.Session()
+        self.session.headers.update({"Content-Type": "application/json"})
+
+        login_response = self.session.post(f"{BASE_URL}/api/auth/login", json={
+            "email": TENANT_ADMIN_EMAIL,
+            "password": TENANT_ADMIN_PASSWORD
+        })
+
+        if login_response.status_code == 200:
+            token = login_response.json().get("token")
+            self.session.headers.update({"Authorization": f"Bearer {token}"})
+        else:
+            pytest.skip(f"Login failed: {login_response.status_code} - {login_response.text}")
+
+    def test_01_snapshots_match_single_booking_endpoint(self):
+        """Test each portfolio row matches GET /api/party-plans/{id}/profit-snapshot"""
+        response = self.session.get(f"{BASE_URL}/api/party-plans/profit-snapshots", params={
+            "start": "2020-01-01", "end": "2030-12-31"
+        })
+        assert response.status_code == 200, f"Expected 200, got {response.status_code}: {response.text}"
+        data = response.json()
+        assert data["totals"]["events"] == len(data["rows"])
+
+        for row in data["rows"][:3]:
+            single = self.session.get(f"{BASE_URL}/api/party-plans/{row['booking_id']}/profit-snapshot").json()
+            assert row["booking_revenue"] == single["booking_revenue"]
+            assert row["payments_received"] == single["payments_received"]
+            assert row["total_expenses"] == single["total_expenses"]
+            assert row["staff_costs"] == single["staff_costs"]
+            assert row["profit_margin"] == single["profit_margin"]
+        print(f"✓ {len(data['rows'])} profit snapshots consistent with single-booking endpoint")
+
+    def test_02_sorting(self):
+        """Test sort and order parameters"""
+        response = self.session.get(f"{BASE_URL}/api/party-plans/profit-snapshots", params={
+            "start": "2020-01-01", "end": "2030-12-31", "sort": "estimated_profit", "order": "desc"
+        })
+        assert response.status_code == 200
+        profits = [r["estimated_profit"] for r in response.json()["rows"]]
+        assert profits == sorted(profits, reverse=True)
+
+        invalid = self.session.get(f"{BASE_URL}/api/party-plans/profit-snapshots", params={
+            "start": "2020-01-01", "end": "2030-12-31", "sort": "customer_phone"
+        })
+        assert invalid.status_code == 400
+        print("✓ Profit snapshots sorted correctly")
+
+    def test_03_csv_export(self):
+        """Test format=csv streams a CSV with a header row"""
+        response = self.session.get(f"{BASE_URL}/api/party-plans/profit-snapshots", params={
+            "start": "2020-01-01", "end": "2030-12-31", "format": "csv"
+        })
+        assert response.status_code == 200
+        assert response.headers["content-type"].startswith("text/csv")
+        lines = response.text.strip().splitlines()
+        assert lines[0].startswith("booking_number,event_date")
+        print(f"✓ CSV export returned {len(lines) - 1} rows")
+
+
+if __name__ == "__main__":
+    pytest.main([__file__, "-v", "--tb=short"])
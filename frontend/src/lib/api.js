@@ -76,7 +76,7 @@ export const bookingsAPI = {
     cancel: (id) => api.delete(`/bookings/${id}`),
     getInvoice: (id) => api.get(`/bookings/${id}/invoice`, { responseType: 'blob' }),
     getKitchenInvoice: (id) => api.get(`/bookings/${id}/kitchen-invoice`, { responseType: 'blob' }),
-    getConfirmed: () => api.get('/confirmed-bookings'),
+    getConfirmed: (params) => api.get('/confirmed-bookings', { params }),
 };
 
 // Payments API
@@ -129,12 +129,13 @@ export const calendarAPI = {
 // Availability API (public)
 export const availabilityAPI = {
     check: (date, hallId) => api.get('/availability', { params: { date, hall_id: hallId } }),
+    search: (params) => api.get('/availability/search', { params }),
 };
 
 // Dashboard API
 export const dashboardAPI = {
     getStats: () => api.get('/dashboard/stats'),
-    getRevenueChart: () => api.get('/dashboard/revenue-chart'),
+    getRevenueChart: (params) => api.get('/dashboard/revenue-chart', { params }),
     getEventDistribution: () => api.get('/dashboard/event-distribution'),
 };
 
@@ -146,12 +147,12 @@ export const seedAPI = {
 // Vendor API
 export const vendorAPI = {
     getAll: () => api.get('/vendors'),
-    getDirectory: () => api.get('/vendors/directory'),
+    getDirectory: (params) => api.get('/vendors/directory', { params }),
     create: (data) => api.post('/vendors', data),
     update: (id, data) => api.put(`/vendors/${id}`, data),
     delete: (id) => api.delete(`/vendors/${id}`),
     // Ledger
-    getLedger: (vendorId) => api.get(`/vendors/${vendorId}/ledger`),
+    getLedger: (vendorId, params) => api.get(`/vendors/${vendorId}/ledger`, { params }),
     createTransaction: (vendorId, data) => api.post(`/vendors/${vendorId}/transactions`, data),
     // Legacy assignments
     getAssignments: (bookingId) => api.get('/vendor-assignments', { params: { booking_id: bookingId } }),
@@ -177,14 +178,22 @@ export const expenseAPI = {
 
 // Alerts API
 export const alertsAPI = {
-    getAll: () => api.get('/alerts'),
+    getAll: (params) => api.get('/alerts', { params }),
+    resolve: (id) => api.put(`/alerts/${id}/resolve`),
+    dismiss: (id) => api.put(`/alerts/${id}/dismiss`),
+    evaluate: () => api.post('/alerts/evaluate'),
 };
 
 // Analytics API
 export const analyticsAPI = {
     getHallUtilization: (startDate, endDate) => api.get('/analytics/hall-utilization', { params: { start_date: startDate, end_date: endDate } }),
-    getPeakSeasons: (year) => api.get('/analytics/peak-seasons', { params: { year } }),
+    getPeakSeasons: (year, years) => api.get('/analytics/peak-seasons', { params: { year, years } }),
     getIdleDays: (hallId, startDate, endDate) => api.get('/analytics/idle-days', { params: { hall_id: hallId, start_date: startDate, end_date: endDate } }),
+    getCustomerLifetimeValue: (params) => api.get('/analytics/customer-lifetime-value', { params }),
+    getEventMix: (params) => api.get('/analytics/event-mix', { params }),
+    getGuestTrends: (params) => api.get('/analytics/guest-trends', { params }),
+    getDiscountLeakage: (params) => api.get('/analytics/discount-leakage', { params }),
+    getRepeatCustomers: (params) => api.get('/analytics/repeat-customers', { params }),
 };
 
 // Financial Reports API